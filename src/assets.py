@@ -0,0 +1,356 @@
+import hashlib
+import html
+import json
+import os
+import posixpath
+import re
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit
+
+from htmlnode import LeafNode, ParentNode
+from links import to_site_path
+from output import atomic_write, copy_file, link_file
+
+ASSET_CACHE_NAME = ".assets.json"
+# Bump when the cached fields change
+ASSET_CACHE_VERSION = 1
+HASH_CHUNK_SIZE = 1 << 16
+# Hex digits of the content hash put in a file name ("logo.3f2a9c01d4.png")
+NAME_HASH_LENGTH = 10
+# Hashing is I/O-bound and hashlib releases the GIL, so threads are enough
+HASH_WORKERS = 8
+# Static pages are linked by their name and are never fingerprinted
+PAGE_EXTENSIONS = (".html", ".htm")
+# href="..." / src='...' / href=... inside markup
+_URL_ATTRIBUTE = re.compile(r"""(\b(?:href|src)\s*=\s*)(?:(["'])(.*?)\2|([^\s"'=<>`]+))""", re.I | re.S)
+
+
+def _png_size(f):
+    header = f.read(24)
+    if len(header) == 24 and header[12:16] == b"IHDR":
+        return struct.unpack(">II", header[16:24])
+    return None
+
+
+def _gif_size(f):
+    header = f.read(10)
+    if len(header) == 10:
+        return struct.unpack("<HH", header[6:10])
+    return None
+
+
+def _jpeg_size(f):
+    # Walks the segments up to the first start-of-frame marker, which holds
+    # the dimensions; everything in between is skipped with seeks
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        while byte == b"\xff":
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker == 0x01 or 0xd0 <= marker <= 0xd9:
+            # Markers without a payload
+            continue
+        length = f.read(2)
+        if len(length) < 2:
+            return None
+        length = struct.unpack(">H", length)[0]
+        if 0xc0 <= marker <= 0xcf and marker not in (0xc4, 0xc8, 0xcc):
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:5])
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+        # The next segment must start with a marker
+        if f.read(1) != b"\xff":
+            return None
+        f.seek(-1, os.SEEK_CUR)
+
+
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", _png_size),
+    (b"GIF87a", _gif_size),
+    (b"GIF89a", _gif_size),
+    (b"\xff\xd8", _jpeg_size),
+)
+
+
+def image_size(path):
+    """
+    (width, height) of a PNG, GIF or JPEG file, read from its header, or
+    None for other files and for images whose header cannot be parsed.
+    """
+    try:
+        with open(path, "rb") as f:
+            start = f.read(8)
+            for signature, parse in _SIGNATURES:
+                if start.startswith(signature):
+                    f.seek(0)
+                    return parse(f)
+    except (OSError, struct.error):
+        pass
+    return None
+
+
+def hash_asset(path):
+    """(content hash, image size or None) of one static file."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest(), image_size(path)
+
+
+def hashed_name(rel_path, digest):
+    """Output path of a fingerprinted file: "img/logo.png" -> "img/logo.<hash>.png"."""
+    root, extension = posixpath.splitext(rel_path)
+    return f"{root}.{digest[:NAME_HASH_LENGTH]}{extension}"
+
+
+class Asset():
+    __slots__ = ("digest", "path", "size")
+
+    def __init__(self, digest, path, size=None):
+        # Content hash, fingerprinted output path and (width, height) of images
+        self.digest = digest
+        self.path = path
+        self.size = size
+
+
+class AssetMap():
+    """
+    Fingerprinted static files, by their "/"-separated path under the static
+    directory. Sent once to every build worker, where for_page() gives the
+    rewriter for one page.
+    """
+
+    def __init__(self, assets):
+        self.assets = assets
+
+    def __len__(self):
+        return len(self.assets)
+
+    def __getitem__(self, rel_path):
+        return self.assets[rel_path]
+
+    def files(self):
+        """Fingerprinted output paths, which links may point to as well."""
+        return [asset.path for asset in self.assets.values()]
+
+    def is_current(self, used):
+        """Whether assets recorded by a page ({path: digest}) are all unchanged."""
+        if used is None:
+            return False
+        for rel_path, digest in used.items():
+            asset = self.assets.get(rel_path)
+            if asset is None or asset.digest != digest:
+                return False
+        return True
+
+    def for_page(self, page_path):
+        return PageAssets(self, page_path)
+
+
+class PageAssets():
+    """
+    Rewrites the blocks of one page (output path page_path): a href and
+    img src pointing to a static file point to its fingerprinted copy
+    instead, and images get width and height unless they have either one.
+    used maps the static files the page refers to to their hash, for the
+    build manifest.
+    """
+
+    def __init__(self, asset_map, page_path):
+        self.asset_map = asset_map
+        self.page_path = page_path
+        self.used = {}
+
+    def _url(self, url):
+        rel_path = to_site_path(url, self.page_path)
+        asset = self.asset_map.assets.get(rel_path) if rel_path is not None else None
+        if asset is None:
+            return url, None
+        self.used[rel_path] = asset.digest
+        parts = urlsplit(url)
+        # Only the file name changes, so relative and absolute URLs stay so
+        path = posixpath.join(posixpath.dirname(parts.path), posixpath.basename(asset.path))
+        return urlunsplit(parts._replace(path=path)), asset
+
+    def _leaf(self, node):
+        props = node.props
+        if node.tag == "img" and props and "src" in props:
+            url, asset = self._url(props["src"])
+            if asset is None:
+                return node
+            props = dict(props, src=url)
+            if asset.size is not None and "width" not in props and "height" not in props:
+                props["width"], props["height"] = (str(number) for number in asset.size)
+        elif node.tag == "a" and props and "href" in props:
+            url, asset = self._url(props["href"])
+            if asset is None:
+                return node
+            props = dict(props, href=url)
+        else:
+            return node
+        return LeafNode(node.tag, node.value, props)
+
+    def rewrite_markup(self, text):
+        """
+        text (HTML, such as a page template) with the href and src attribute
+        values that point to static files pointing to their fingerprinted
+        copies.
+        """
+        def replace(match):
+            quote = match.group(2) or ""
+            url = html.unescape(match.group(3) if quote else match.group(4))
+            new_url, asset = self._url(url)
+            if asset is None:
+                return match.group(0)
+            return f"{match.group(1)}{quote}{html.escape(new_url, quote=bool(quote))}{quote}"
+        return _URL_ATTRIBUTE.sub(replace, text)
+
+    def rewrite(self, block):
+        """
+        block with its asset URLs rewritten. Only the nodes that change (and
+        their parents) are copied; the parsed tree is left as it is, so
+        cached trees keep the original URLs.
+        """
+        done = {}
+        stack = [(block, False)]
+        while stack:
+            current, visited = stack.pop()
+            if not isinstance(current, ParentNode):
+                done[id(current)] = self._leaf(current)
+            elif not visited:
+                stack.append((current, True))
+                stack.extend((child, False) for child in current.children or ())
+            else:
+                children = [done[id(child)] for child in current.children]
+                if all(new is old for new, old in zip(children, current.children)):
+                    done[id(current)] = current
+                else:
+                    done[id(current)] = ParentNode(current.tag, children, current.props)
+        return done[id(block)]
+
+
+class AssetCache():
+    """
+    Hash and image size of every static file, keyed on its path and checked
+    against its size and mtime, so unchanged files are never read again.
+    Kept as JSON in the output directory, like the build manifest.
+    """
+
+    def __init__(self, entries=None):
+        # rel path -> [size, mtime_ns, digest, [width, height] or None]
+        self.entries = entries if entries is not None else {}
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        if data.get("version") != ASSET_CACHE_VERSION:
+            return cls()
+        return cls(data.get("assets", {}))
+
+    def save(self, path):
+        data = {"version": ASSET_CACHE_VERSION, "assets": self.entries}
+        atomic_write(path, json.dumps(data, separators=(",", ":"), sort_keys=True).encode("utf-8"))
+
+    def lookup(self, rel_path, st):
+        entry = self.entries.get(rel_path)
+        if entry is not None and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            return entry[2], tuple(entry[3]) if entry[3] is not None else None
+        return None
+
+
+class AssetStats():
+    def __init__(self):
+        self.assets = 0
+        self.hashed = 0
+        self.published = 0
+        self.removed = 0
+
+    def summary(self):
+        return (f"assets: {self.assets} fingerprinted, {self.hashed} hashed, "
+                f"{self.published} published, {self.removed} removed")
+
+
+def _static_files(static_dir):
+    for root, dirs, names in os.walk(static_dir):
+        dirs.sort()
+        rel_dir = os.path.relpath(root, static_dir)
+        for name in sorted(names):
+            if not name.lower().endswith(PAGE_EXTENSIONS):
+                yield os.path.normpath(os.path.join(rel_dir, name)).replace(os.sep, "/")
+
+
+def _publish(source_path, dest_path):
+    # Hashed names are content-addressed: an existing file is already right
+    if os.path.exists(dest_path):
+        return False
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    # A plain copy that is itself a hard link (copy_tree with hardlink) shares
+    # its bytes with the file in the static directory, which may be edited in
+    # place; the hashed name gets a copy of its own then. Otherwise sharing
+    # is safe, as copy_tree replaces plain copies instead of writing to them.
+    if os.stat(source_path).st_nlink > 1 or not link_file(source_path, dest_path):
+        copy_file(source_path, dest_path)
+    return True
+
+
+def fingerprint_assets(static_dir, dest_dir, workers=HASH_WORKERS):
+    """
+    Hashes the files under static_dir (files whose size and mtime match
+    dest_dir/.assets.json are not read) and publishes each one in dest_dir
+    under its fingerprinted name as well, hard-linked to its plain copy
+    (which must already be there) where possible, unless that copy is a
+    hard link itself. Hashing runs on a thread
+    pool of workers threads. Fingerprinted copies of earlier versions are
+    removed. Returns (AssetMap, AssetStats).
+    """
+    cache_path = os.path.join(dest_dir, ASSET_CACHE_NAME)
+    cache = AssetCache.load(cache_path)
+    stats = AssetStats()
+    assets = {}
+    stale = []
+    entries = {}
+    for rel_path in _static_files(static_dir):
+        source_path = os.path.join(static_dir, rel_path)
+        st = os.stat(source_path)
+        found = cache.lookup(rel_path, st)
+        if found is None:
+            stale.append((rel_path, source_path, st))
+            continue
+        digest, size = found
+        assets[rel_path] = Asset(digest, hashed_name(rel_path, digest), size)
+        entries[rel_path] = cache.entries[rel_path]
+    if stale:
+        with ThreadPoolExecutor(workers, thread_name_prefix="assets") as pool:
+            hashed = pool.map(hash_asset, [source_path for _, source_path, _ in stale])
+            for (rel_path, _, st), (digest, size) in zip(stale, hashed):
+                assets[rel_path] = Asset(digest, hashed_name(rel_path, digest), size)
+                entries[rel_path] = [st.st_size, st.st_mtime_ns, digest, list(size) if size else None]
+        stats.hashed = len(stale)
+    for rel_path, asset in assets.items():
+        if _publish(os.path.join(dest_dir, rel_path), os.path.join(dest_dir, asset.path)):
+            stats.published += 1
+    for rel_path, entry in cache.entries.items():
+        old_path = hashed_name(rel_path, entry[2])
+        asset = assets.get(rel_path)
+        if asset is None or asset.path != old_path:
+            try:
+                os.remove(os.path.join(dest_dir, old_path))
+                stats.removed += 1
+            except FileNotFoundError:
+                pass
+    cache.entries = entries
+    cache.save(cache_path)
+    stats.assets = len(assets)
+    return AssetMap(assets), stats
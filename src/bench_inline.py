@@ -0,0 +1,97 @@
+"""
+Throughput benchmark for the inline markdown tokenizer, in MB/s.
+
+Compares the single-pass iter_text_nodes with the usual multi-pass approach
+that splits the text once per delimiter and runs one regex per link type.
+
+    python3 src/bench_inline.py [megabytes]
+"""
+import re
+import sys
+import time
+
+from inline_markdown import iter_text_nodes
+from textnode import TextNode, TextType
+
+LINE = (
+    "Plain words then **bold words** and _italic words_ with `inline code`, "
+    "a [link to docs](https://example.com/docs) and ![a picture](/img/pic.png). "
+    "Some snake_case_names, a stray * star and a 2 * 3 product.\n"
+)
+
+
+def split_nodes_delimiter(old_nodes, delimiter, text_type):
+    new_nodes = []
+    for node in old_nodes:
+        if node.text_type != TextType.TEXT:
+            new_nodes.append(node)
+            continue
+        parts = node.text.split(delimiter)
+        if len(parts) % 2 == 0:
+            new_nodes.append(node)
+            continue
+        for i, part in enumerate(parts):
+            if part:
+                new_nodes.append(TextNode(part, TextType.TEXT if i % 2 == 0 else text_type))
+    return new_nodes
+
+
+def split_nodes_pattern(old_nodes, pattern, text_type):
+    new_nodes = []
+    for node in old_nodes:
+        if node.text_type != TextType.TEXT:
+            new_nodes.append(node)
+            continue
+        pos = 0
+        for match in pattern.finditer(node.text):
+            if match.start() > pos:
+                new_nodes.append(TextNode(node.text[pos:match.start()], TextType.TEXT))
+            new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+            pos = match.end()
+        if pos < len(node.text):
+            new_nodes.append(TextNode(node.text[pos:], TextType.TEXT))
+    return new_nodes
+
+
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
+
+def multi_pass(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_pattern(nodes, IMAGE_PATTERN, TextType.IMAGE)
+    nodes = split_nodes_pattern(nodes, LINK_PATTERN, TextType.LINK)
+    return nodes
+
+
+def single_pass(text):
+    return list(iter_text_nodes(text))
+
+
+def throughput(func, paragraphs, size):
+    start = time.perf_counter()
+    count = 0
+    for paragraph in paragraphs:
+        count += len(func(paragraph))
+    elapsed = time.perf_counter() - start
+    return size / elapsed / 2**20, count
+
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 8
+    lines = max(1, int(megabytes * 2**20 / len(LINE)))
+    # Paragraphs of 10 lines, as the block parser would hand them over
+    paragraph = LINE * 10
+    paragraphs = [paragraph] * max(1, lines // 10)
+    size = len(paragraph) * len(paragraphs)
+    print(f"input: {size / 2**20:.1f} MB in {len(paragraphs)} paragraphs")
+    for name, func in (("single pass", single_pass), ("multi pass", multi_pass)):
+        mb_per_s, count = throughput(func, paragraphs, size)
+        print(f"{name:<12} {mb_per_s:8.1f} MB/s  {count} nodes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Memory benchmark for node storage.
+
+Compares the old dict-backed node classes, the current __slots__ classes,
+hash-consed nodes from a NodeInterner and the flat NodeArena on the same
+synthetic page.
+
+    python3 src/bench_memory.py [paragraphs]
+"""
+import sys
+import tracemalloc
+
+from htmlnode import LeafNode, ParentNode
+from interning import NodeInterner
+from nodearena import NodeArena
+from textnode import TextNode, TextType
+
+
+class DictHTMLNode():
+    # Layout of HTMLNode before __slots__: one __dict__ per instance
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+class DictTextNode():
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+# Values are built once up front so every variant measures only node overhead
+WORDS = [f"word {i}" for i in range(16)]
+
+
+def build_dict_nodes(paragraphs):
+    return [
+        DictHTMLNode("p", None, [
+            DictHTMLNode(None, WORDS[i % 16], None, {}),
+            DictHTMLNode("b", WORDS[(i + 1) % 16], None, {}),
+            DictHTMLNode("a", WORDS[(i + 2) % 16], None, {"href": "/page"}),
+        ], {})
+        for i in range(paragraphs)
+    ]
+
+
+def build_slot_nodes(paragraphs):
+    return [
+        ParentNode("p", [
+            LeafNode(None, WORDS[i % 16], {}),
+            LeafNode("b", WORDS[(i + 1) % 16], {}),
+            LeafNode("a", WORDS[(i + 2) % 16], {"href": "/page"}),
+        ], {})
+        for i in range(paragraphs)
+    ]
+
+
+def build_interned_nodes(paragraphs):
+    # The interner is returned too: its tables are part of the cost
+    interner = NodeInterner()
+    return interner, [
+        interner.parent("p", [
+            interner.leaf(None, WORDS[i % 16], {}),
+            interner.leaf("b", WORDS[(i + 1) % 16], {}),
+            interner.leaf("a", WORDS[(i + 2) % 16], {"href": "/page"}),
+        ], {})
+        for i in range(paragraphs)
+    ]
+
+
+def build_arena(paragraphs):
+    arena = NodeArena()
+    for i in range(paragraphs):
+        arena.add_parent("p", [
+            arena.add_leaf(None, WORDS[i % 16]),
+            arena.add_leaf("b", WORDS[(i + 1) % 16]),
+            arena.add_leaf("a", WORDS[(i + 2) % 16], {"href": "/page"}),
+        ])
+    return arena
+
+
+def build_dict_text_nodes(count):
+    return [DictTextNode(WORDS[i % 16], TextType.BOLD) for i in range(count)]
+
+
+def build_slot_text_nodes(count):
+    return [TextNode(WORDS[i % 16], TextType.BOLD) for i in range(count)]
+
+
+def measure(builder, size):
+    tracemalloc.start()
+    result = builder(size)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def main():
+    paragraphs = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rows = [
+        ("HTMLNode (dict)", build_dict_nodes, paragraphs, paragraphs * 4),
+        ("HTMLNode (__slots__)", build_slot_nodes, paragraphs, paragraphs * 4),
+        ("HTMLNode (interned)", build_interned_nodes, paragraphs, paragraphs * 4),
+        ("NodeArena", build_arena, paragraphs, paragraphs * 4),
+        ("TextNode (dict)", build_dict_text_nodes, paragraphs * 3, paragraphs * 3),
+        ("TextNode (__slots__)", build_slot_text_nodes, paragraphs * 3, paragraphs * 3),
+    ]
+    print(f"{'variant':<22}{'nodes':>10}{'MiB':>10}{'bytes/node':>12}")
+    for name, builder, size, nodes in rows:
+        used = measure(builder, size)
+        print(f"{name:<22}{nodes:>10}{used / 2**20:>10.1f}{used / nodes:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
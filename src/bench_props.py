@@ -0,0 +1,82 @@
+"""
+Benchmark for props_to_html on a props-heavy synthetic page.
+
+Compares the cached, escaping props_to_html against the old uncached
+list-and-join version, with and without escaping.
+
+    python3 src/bench_props.py [nodes]
+"""
+import html
+import sys
+import timeit
+
+from htmlnode import LeafNode, props_cache_clear, props_cache_info
+
+
+def uncached_props_to_html(props):
+    # props_to_html as it was before the attribute-string cache
+    if props is None or not props:
+        return ""
+    attribute_parts = []
+    for key, value in props.items():
+        attribute_parts.append(f'{key}="{value}"')
+    return " " + " ".join(attribute_parts)
+
+
+def escaping_props_to_html(props):
+    # The old version with html.escape bolted on, for a like-for-like comparison
+    if props is None or not props:
+        return ""
+    attribute_parts = []
+    for key, value in props.items():
+        attribute_parts.append(f'{key}="{html.escape(str(value), quote=True)}"')
+    return " " + " ".join(attribute_parts)
+
+
+def synthetic_page(count):
+    # A few dozen distinct props dicts repeated across the page, as in real
+    # navigation links, post classes and images.
+    props_variants = (
+        [{"href": f"/posts/{i}"} for i in range(20)]
+        + [{"class": "post"}, {"class": "post featured"}]
+        + [{"src": f"/images/{i}.png", "alt": f"Image {i}"} for i in range(10)]
+    )
+    return [
+        LeafNode("a", f"node {i}", dict(props_variants[i % len(props_variants)]))
+        for i in range(count)
+    ]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    nodes = synthetic_page(count)
+    repeat = 5
+
+    def run_uncached():
+        for node in nodes:
+            uncached_props_to_html(node.props)
+
+    def run_escaping():
+        for node in nodes:
+            escaping_props_to_html(node.props)
+
+    def run_cached():
+        for node in nodes:
+            node.props_to_html()
+
+    props_cache_clear()
+    uncached = min(timeit.repeat(run_uncached, number=1, repeat=repeat))
+    escaping = min(timeit.repeat(run_escaping, number=1, repeat=repeat))
+    cached = min(timeit.repeat(run_cached, number=1, repeat=repeat))
+    info = props_cache_info()
+    print(f"nodes: {count}")
+    print(f"uncached, no escaping: {uncached * 1000:8.1f} ms  {count / uncached:12,.0f} nodes/s")
+    print(f"uncached, escaping:    {escaping * 1000:8.1f} ms  {count / escaping:12,.0f} nodes/s")
+    print(f"cached, escaping:      {cached * 1000:8.1f} ms  {count / cached:12,.0f} nodes/s")
+    print(f"speedup vs escaping:   {escaping / cached:.2f}x")
+    print(f"speedup vs unescaped:  {uncached / cached:.2f}x")
+    print(f"cache:    hits={info.hits} misses={info.misses} size={info.currsize}/{info.maxsize}")
+
+
+if __name__ == "__main__":
+    main()
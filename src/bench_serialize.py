@@ -0,0 +1,53 @@
+"""
+Benchmark for the nodecodec tree cache on a synthetic markdown page.
+
+Compares getting a page's blocks by parsing its markdown, by unpickling
+them and by decoding the nodecodec format, eagerly and lazily (first block
+only), along with the size of each serialized form.
+
+    python3 src/bench_serialize.py [sections]
+"""
+import pickle
+import sys
+import timeit
+
+from block_markdown import iter_blocks
+from nodecodec import LazyDocument, dumps, loads
+
+
+def synthetic_markdown(sections):
+    parts = []
+    for i in range(sections):
+        parts.append(f"## Section {i}\n\n")
+        parts.append(f"Some **bold** text, a [link](/posts/{i}) and `code` in paragraph {i}.\n\n")
+        parts.append("".join(f"- item *{j}* with [ref](/r/{j})\n" for j in range(5)) + "\n")
+        parts.append("> a quote\n> over two lines\n\n")
+    return "".join(parts)
+
+
+def main():
+    sections = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    markdown = synthetic_markdown(sections)
+    lines = markdown.splitlines(keepends=True)
+    blocks = list(iter_blocks(lines))
+    pickled = pickle.dumps(blocks, pickle.HIGHEST_PROTOCOL)
+    encoded = dumps(blocks)
+    repeat = 5
+
+    cases = [
+        ("parse markdown", lambda: list(iter_blocks(lines))),
+        ("pickle.loads", lambda: pickle.loads(pickled)),
+        ("nodecodec loads", lambda: loads(encoded)),
+        ("nodecodec first block", lambda: LazyDocument(encoded)[0]),
+        ("pickle.dumps", lambda: pickle.dumps(blocks, pickle.HIGHEST_PROTOCOL)),
+        ("nodecodec dumps", lambda: dumps(blocks)),
+    ]
+    print(f"{len(blocks)} blocks, markdown {len(markdown.encode())} bytes, "
+          f"pickle {len(pickled)} bytes, nodecodec {len(encoded)} bytes")
+    for name, run in cases:
+        best = min(timeit.repeat(run, number=1, repeat=repeat))
+        print(f"{name:<24} {best * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
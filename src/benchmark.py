@@ -0,0 +1,227 @@
+"""
+Benchmark suite for the node hot paths.
+
+Generates synthetic documents and times each stage on its own:
+
+    textnode      TextNode construction
+    convert       text_node_to_html_node
+    props         props_to_html
+    leaf_html     LeafNode.to_html
+    parent_html   ParentNode.to_html of the whole tree
+
+For every stage it reports ops/s and peak traced memory at several document
+sizes (the scaling curve). Results can be saved as a JSON baseline and later
+runs compared against it; a stage that got slower than the tolerance allows
+is reported as a regression and the exit status is 1.
+
+    ./bench.sh --size 20000 --save baseline.json
+    ./bench.sh --size 20000 --compare baseline.json
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from htmlnode import ParentNode
+from main import text_node_to_html_node
+from textnode import TextNode, TextType
+
+BASELINE_VERSION = 1
+WORDS = ["lorem", "ipsum", "dolor", "sit", "amet", "static", "site", "node", "render", "tree"]
+STYLED_TYPES = [TextType.TEXT, TextType.BOLD, TextType.ITALIC, TextType.CODE]
+
+
+class Document():
+    """Synthetic page: the TextNodes, the LeafNodes made from them and a tree."""
+
+    def __init__(self, size, depth=3, props_density=0.2, seed=0):
+        rng = random.Random(seed)
+        self.specs = []
+        for i in range(size):
+            text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 8)))
+            if rng.random() < props_density:
+                if rng.random() < 0.5:
+                    self.specs.append((text, TextType.LINK, f"/posts/{rng.randint(0, 50)}"))
+                else:
+                    self.specs.append((text, TextType.IMAGE, f"/img/{rng.randint(0, 50)}.png"))
+            else:
+                self.specs.append((text, rng.choice(STYLED_TYPES), None))
+        self.text_nodes = [TextNode(*spec) for spec in self.specs]
+        self.leaves = [text_node_to_html_node(node) for node in self.text_nodes]
+        self.tree = self._nest(self.leaves, depth)
+
+    @staticmethod
+    def _nest(leaves, depth):
+        # Paragraphs of 8 leaves, then each level groups 8 nodes of the one below
+        level = [ParentNode("p", leaves[i:i + 8]) for i in range(0, len(leaves), 8)]
+        tags = ["section", "article", "div"]
+        for d in range(max(0, depth - 1)):
+            level = [ParentNode(tags[d % len(tags)], level[i:i + 8], {"class": f"level-{d}"})
+                     for i in range(0, len(level), 8)]
+        return ParentNode("body", level)
+
+
+def bench_textnode(doc):
+    specs = doc.specs
+
+    # Results are kept so the peak memory includes the nodes built
+    def run():
+        return [TextNode(*spec) for spec in specs]
+    return run, len(specs)
+
+
+def bench_convert(doc):
+    nodes = doc.text_nodes
+
+    def run():
+        return [text_node_to_html_node(node) for node in nodes]
+    return run, len(nodes)
+
+
+def bench_props(doc):
+    leaves = doc.leaves
+
+    def run():
+        return [leaf.props_to_html() for leaf in leaves]
+    return run, len(leaves)
+
+
+def bench_leaf_html(doc):
+    leaves = doc.leaves
+
+    def run():
+        return [leaf.to_html() for leaf in leaves]
+    return run, len(leaves)
+
+
+def bench_parent_html(doc):
+    tree = doc.tree
+
+    def run():
+        return tree.to_html()
+    # Counted per leaf rendered, so the numbers compare across sizes
+    return run, len(doc.leaves)
+
+
+BENCHMARKS = {
+    "textnode": bench_textnode,
+    "convert": bench_convert,
+    "props": bench_props,
+    "leaf_html": bench_leaf_html,
+    "parent_html": bench_parent_html,
+}
+
+
+def measure(setup, doc, repeat):
+    run, ops = setup(doc)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    # Separate traced run: tracemalloc would distort the timing
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ops_per_sec": ops / best, "seconds": best, "peak_kib": peak / 1024}
+
+
+def run_suite(size, depth, props_density, steps, repeat, names):
+    sizes = sorted({max(1, size * (i + 1) // steps) for i in range(steps)})
+    results = {name: {} for name in names}
+    for n in sizes:
+        doc = Document(n, depth, props_density)
+        for name in names:
+            results[name][str(n)] = measure(BENCHMARKS[name], doc, repeat)
+    return sizes, results
+
+
+def print_report(sizes, results):
+    print(f"{'benchmark':<13}{'size':>9}{'ops/s':>14}{'ms':>10}{'peak KiB':>11}")
+    for name, by_size in results.items():
+        for n in sizes:
+            r = by_size[str(n)]
+            print(f"{name:<13}{n:>9}{r['ops_per_sec']:>14,.0f}{r['seconds'] * 1000:>10.2f}{r['peak_kib']:>11.1f}")
+
+
+def compare(results, baseline, tolerance):
+    """Stages/sizes whose ops/s fell more than tolerance below the baseline."""
+    regressions = []
+    for name, by_size in baseline.get("results", {}).items():
+        for n, old in by_size.items():
+            new = results.get(name, {}).get(n)
+            if new is None:
+                continue
+            ratio = new["ops_per_sec"] / old["ops_per_sec"]
+            if ratio < 1 - tolerance:
+                regressions.append((name, n, ratio))
+    return regressions
+
+
+def mismatched_params(params, baseline):
+    """
+    Parameters (and the file version) that differ between this run and a
+    baseline, as (name, baseline value, value of this run). Results of
+    different documents cannot be compared.
+    """
+    mismatches = []
+    if baseline.get("version") != BASELINE_VERSION:
+        mismatches.append(("version", baseline.get("version"), BASELINE_VERSION))
+    saved = baseline.get("params", {})
+    for name, value in params.items():
+        if saved.get(name) != value:
+            mismatches.append((name, saved.get(name), value))
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark node construction, conversion and rendering.")
+    parser.add_argument("--size", type=int, default=20000, help="leaves in the largest document")
+    parser.add_argument("--depth", type=int, default=3, help="nesting depth of the tree")
+    parser.add_argument("--props-density", type=float, default=0.2, help="share of link/image nodes")
+    parser.add_argument("--steps", type=int, default=3, help="points on the scaling curve")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per point (best is kept)")
+    parser.add_argument("--only", choices=sorted(BENCHMARKS), action="append", help="run only these")
+    parser.add_argument("--save", metavar="PATH", help="write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before flagging")
+    args = parser.parse_args(argv)
+
+    params = {"size": args.size, "depth": args.depth, "props_density": args.props_density,
+              "steps": args.steps}
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        # Checked before running anything: the run would be wasted
+        mismatches = mismatched_params(params, baseline)
+        for name, saved, value in mismatches:
+            print(f"{args.compare} was made with {name}={saved}, this run has {name}={value}", file=sys.stderr)
+        if mismatches:
+            print("refusing to compare; rerun with the baseline's parameters", file=sys.stderr)
+            return 2
+
+    names = args.only or list(BENCHMARKS)
+    sizes, results = run_suite(args.size, args.depth, args.props_density, args.steps, args.repeat, names)
+    print_report(sizes, results)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"version": BASELINE_VERSION, "params": params, "results": results}, f, indent=1)
+        print(f"baseline saved to {args.save}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for name, n, ratio in regressions:
+            print(f"REGRESSION {name} at size {n}: {ratio:.0%} of baseline ops/s")
+        if regressions:
+            return 1
+        print(f"no regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
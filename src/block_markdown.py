@@ -0,0 +1,152 @@
+from htmlnode import LeafNode, ParentNode
+from inline_markdown import iter_text_nodes
+from main import text_nodes_to_html_nodes
+
+PARAGRAPH = "paragraph"
+HEADING = "heading"
+CODE = "code"
+QUOTE = "quote"
+UNORDERED_LIST = "unordered_list"
+ORDERED_LIST = "ordered_list"
+
+CODE_FENCE = "```"
+# Bump whenever this module or inline_markdown changes the trees built from
+# a given source: parsed trees cached by the build are keyed on it
+PARSER_VERSION = 1
+
+
+def text_to_children(text, interner=None):
+    """Inline markdown -> list of LeafNodes. Never empty, so it can always be
+    used as ParentNode children. With an interning.NodeInterner the leaves
+    are shared immutable nodes."""
+    children = text_nodes_to_html_nodes(iter_text_nodes(text), interner)
+    if children:
+        return children
+    return [LeafNode(None, "") if interner is None else interner.leaf(None, "")]
+
+
+def _heading_level(line):
+    level = len(line) - len(line.lstrip("#"))
+    if 1 <= level <= 6 and line[level:level + 1] == " " and line[level + 1:].strip():
+        return level
+    return 0
+
+
+def _list_item_text(line):
+    """Text of an unordered list line ("- x" / "* x"), or None."""
+    if line.startswith("- ") or line.startswith("* "):
+        return line[2:]
+    return None
+
+
+def _ordered_item_text(line):
+    """Text of an ordered list line ("1. x"), or None."""
+    digits = len(line) - len(line.lstrip("0123456789"))
+    if digits and line[digits:digits + 2] == ". ":
+        return line[digits + 2:]
+    return None
+
+
+def _line_kind(line):
+    if line.startswith(CODE_FENCE):
+        return CODE
+    if _heading_level(line):
+        return HEADING
+    if line.startswith(">"):
+        return QUOTE
+    if _list_item_text(line) is not None:
+        return UNORDERED_LIST
+    if _ordered_item_text(line) is not None:
+        return ORDERED_LIST
+    return PARAGRAPH
+
+
+def _build_block(kind, lines, inline):
+    if kind == HEADING:
+        line = lines[0]
+        level = _heading_level(line)
+        return ParentNode(f"h{level}", inline(line[level + 1:].strip()))
+    if kind == CODE:
+        return ParentNode("pre", [LeafNode("code", "".join(lines))])
+    if kind == QUOTE:
+        text = " ".join(line[1:].strip() for line in lines)
+        return ParentNode("blockquote", inline(text.strip()))
+    if kind == UNORDERED_LIST or kind == ORDERED_LIST:
+        return ParentNode(
+            "ul" if kind == UNORDERED_LIST else "ol",
+            [ParentNode("li", inline(item.strip())) for item in lines],
+        )
+    return ParentNode("p", inline(" ".join(line.strip() for line in lines)))
+
+
+def iter_blocks(lines, inline=text_to_children):
+    """
+    Parses markdown from an iterable of lines (e.g. an open file) and yields
+    one ParentNode per top-level block as soon as the block is complete, so
+    only the current block is ever held in memory.
+
+    Blocks are separated by blank lines, except that a heading is always a
+    single line and a change of block kind (paragraph -> list, ...) starts a
+    new block. Supported: "#" to "######" headings, ``` code fences, "> "
+    quotes, "- "/"* " unordered and "1. " ordered lists, paragraphs.
+    Continuation lines without a marker extend the last list item.
+
+    inline turns the text of a block into its child nodes; it defaults to
+    text_to_children and is replaced by the build profiler.
+    """
+    kind = None
+    block = []
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if kind == CODE:
+            if line.startswith(CODE_FENCE):
+                yield _build_block(kind, block, inline)
+                kind, block = None, []
+            else:
+                block.append(line + "\n")
+            continue
+
+        stripped = line.strip()
+        if not stripped:
+            if kind is not None:
+                yield _build_block(kind, block, inline)
+                kind, block = None, []
+            continue
+
+        line_kind = _line_kind(line)
+        if line_kind == PARAGRAPH and kind in (UNORDERED_LIST, ORDERED_LIST, QUOTE):
+            # Lazy continuation of the current list item or quote
+            if kind == QUOTE:
+                block.append("> " + stripped)
+            else:
+                block[-1] += " " + stripped
+            continue
+        if kind is not None and (line_kind != kind or kind == HEADING):
+            yield _build_block(kind, block, inline)
+            kind, block = None, []
+
+        if line_kind == CODE:
+            kind = CODE
+        elif line_kind == UNORDERED_LIST:
+            kind = line_kind
+            block.append(_list_item_text(line))
+        elif line_kind == ORDERED_LIST:
+            kind = line_kind
+            block.append(_ordered_item_text(line))
+        else:
+            kind = line_kind
+            block.append(line)
+
+    if kind is not None:
+        # Also closes a code fence left open at the end of the file
+        yield _build_block(kind, block, inline)
+
+
+def iter_file_blocks(path, inline=text_to_children):
+    with open(path, encoding="utf-8") as f:
+        yield from iter_blocks(f, inline)
+
+
+def block_text(node):
+    """Concatenated text of the leaves directly below a block node."""
+    return "".join(child.value for child in node.children if isinstance(child, LeafNode))
@@ -0,0 +1,675 @@
+import hashlib
+import io
+import json
+import os
+import time
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+
+from assets import fingerprint_assets
+from block_markdown import PARSER_VERSION, block_text, iter_blocks, iter_file_blocks
+from fragment_cache import FragmentCache, prune_store
+from htmlnode import collapse_whitespace, escape_text, props_cache_clear
+from links import HOME_PAGE, check_links as resolve_links
+from memory import MemoryBudget, format_size, peak_rss
+from nodecodec import DECODE_ERRORS, NodeEncoder, load_file
+from output import OutputWriter, atomic_open, atomic_write, copy_tree
+from site_index import PageCollector, SiteStore, page_url, write_site_index
+from template import load_template
+
+MANIFEST_NAME = ".manifest.json"
+# Bump when the output for unchanged inputs changes, or the page records
+# kept here do, to force a full rebuild
+MANIFEST_VERSION = 5
+
+CONTENT_EXTENSION = ".md"
+HASH_CHUNK_SIZE = 1 << 16
+# Sources at least this large are streamed straight to disk, never buffered
+STREAM_THRESHOLD = 1 << 20
+# Page records of a build with a memory budget are kept here, not in memory
+SITE_STORE_NAME = ".site.sqlite"
+# Pages per task sent to a pool worker, and tasks queued per worker: results
+# are consumed as they arrive instead of all being held until the end
+MAX_CHUNK_SIZE = 256
+CHUNKS_PER_WORKER = 2
+TREE_EXTENSION = ".ssnt"
+# Only this many leading blocks are searched for the h1 giving a page its
+# title, so a page without one is not held in memory whole when the
+# template needs the title before the content
+TITLE_BLOCKS = 32
+
+
+def file_hash(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_pages(content_dir):
+    """Returns the content files under content_dir as sorted relative paths."""
+    pages = []
+    for root, dirs, files in os.walk(content_dir):
+        dirs.sort()
+        for name in files:
+            if name.endswith(CONTENT_EXTENSION):
+                pages.append(os.path.relpath(os.path.join(root, name), content_dir))
+    return sorted(pages)
+
+
+def output_path(rel_source):
+    return rel_source[:-len(CONTENT_EXTENSION)] + ".html"
+
+
+class HashingWriter():
+    """
+    Text stream that encodes what it is given, writes it to a binary file and
+    hashes it on the way, so the output hash costs no second read.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.digest = hashlib.blake2b(digest_size=16)
+        self.size = 0
+
+    def write(self, text):
+        self.write_bytes(text.encode("utf-8"))
+
+    def write_bytes(self, data):
+        self.digest.update(data)
+        self.size += len(data)
+        self.f.write(data)
+
+    def hexdigest(self):
+        return self.digest.hexdigest()
+
+
+def _page_blocks(source_path, profiler):
+    if profiler is None:
+        yield from iter_file_blocks(source_path)
+        return
+    # Reading lines, building blocks and their inline content are timed as
+    # separate phases; "tree" keeps only the block parsing itself
+    with open(source_path, encoding="utf-8") as f:
+        lines = profiler.timed_iter("read", f, len)
+        yield from profiler.timed_iter("tree", iter_blocks(lines, profiler.inline))
+
+
+def tree_path(tree_cache_dir, source_digest):
+    """
+    Cached tree of a source. The parser version is part of the name, so a
+    parser change makes every cached tree miss instead of being reused.
+    """
+    return os.path.join(tree_cache_dir, f"{source_digest}.p{PARSER_VERSION}{TREE_EXTENSION}")
+
+
+def _cached_blocks(source_path, tree_file, profiler):
+    """
+    Blocks of a page, read from its cached tree in tree_file when there is a
+    usable one. The whole tree is decoded before the first block is
+    yielded, so a damaged file is found before anything is rendered.
+    Otherwise the source is parsed and the blocks are written to tree_file
+    (replacing a damaged one) as they are produced.
+    """
+    document = load_file(tree_file)
+    if document is not None:
+        if profiler is not None:
+            profiler.begin("tree")
+        try:
+            blocks = list(document)
+        except DECODE_ERRORS:
+            blocks = None
+        if profiler is not None:
+            profiler.end()
+        if blocks is not None:
+            yield from blocks
+            return
+    with atomic_open(tree_file) as f:
+        encoder = NodeEncoder(f)
+        for block in _page_blocks(source_path, profiler):
+            encoder.add(block)
+            yield block
+        encoder.close()
+
+
+def page_title(source_path):
+    """Title of a page without an h1: its file name without extension."""
+    return os.path.splitext(os.path.basename(source_path))[0]
+
+
+def _title_html(title, minify):
+    title = escape_text(title)
+    return collapse_whitespace(title) if minify else title
+
+
+def write_page(writer, blocks, template, default_title, render=None):
+    """
+    Fills a compiled Template with blocks and writes the result to writer.
+    The page title is the first h1 among the first TITLE_BLOCKS blocks (or
+    default_title). If the template needs the title before the content,
+    blocks are held back only until the title is known, so a streaming
+    blocks iterable is consumed as it is written and at most TITLE_BLOCKS
+    blocks are held. render(block) writes one block; by default
+    block.render_to(writer), minified if the template is. The title is
+    escaped for the template and returned as plain text.
+    """
+    if render is None:
+        def render(block):
+            block.render_to(writer, minify=template.minify)
+    values = {}
+    title = None
+    held = []
+    head_written = "title" not in template.head_slots
+    if head_written:
+        template.write_head(writer.write_bytes, values)
+    for count, block in enumerate(blocks, 1):
+        if title is None:
+            if block.tag == "h1":
+                title = block_text(block)
+            elif count >= TITLE_BLOCKS:
+                title = default_title
+            if title is not None:
+                values["title"] = _title_html(title, template.minify)
+        if head_written:
+            render(block)
+            continue
+        held.append(block)
+        if "title" in values:
+            template.write_head(writer.write_bytes, values)
+            head_written = True
+            for held_block in held:
+                render(held_block)
+            held = []
+    if title is None:
+        title = default_title
+        values["title"] = _title_html(title, template.minify)
+    if not head_written:
+        template.write_head(writer.write_bytes, values)
+        for held_block in held:
+            render(held_block)
+    template.write_tail(writer.write_bytes, values)
+    return title
+
+
+def _fill_page(writer, source_path, template, fragment_cache, profiler, tree_file, collector, assets):
+    if tree_file is None:
+        blocks = _page_blocks(source_path, profiler)
+    else:
+        blocks = _cached_blocks(source_path, tree_file, profiler)
+    if assets is not None:
+        blocks = map(assets.rewrite, blocks)
+    if profiler is None:
+        def render(block):
+            block.render_to(writer, fragment_cache=fragment_cache, minify=template.minify)
+    else:
+        def render(block):
+            profiler.render(block, writer, template.minify, fragment_cache)
+    if collector is not None:
+        render_block = render
+
+        def render(block):
+            collector.add(block)
+            render_block(block)
+    title = write_page(writer, blocks, template, page_title(source_path), render)
+    if collector is not None:
+        collector.title = title
+
+
+def render_page(source_path, dest_path, template, fragment_cache=None, profiler=None, output=None,
+                tree_file=None, collector=None, assets=None):
+    """
+    Renders one content file to dest_path, streaming: each block is parsed,
+    rendered and written before the next one is read (see write_page).
+    The file is replaced atomically. With an OutputWriter, pages from
+    sources under STREAM_THRESHOLD bytes are rendered to memory and handed
+    to its thread pool instead, so the disk write overlaps with rendering
+    the next page. With a profiler, the page is written here and the final
+    flush and rename are timed as phase "write" too. With tree_file, the parsed blocks are cached there (see
+    nodecodec) and reused instead of parsing the source again. Returns
+    (output hash, output size). A site_index.PageCollector is fed every block
+    as it is rendered. With an assets.PageAssets, blocks have their asset
+    URLs rewritten before they are rendered or collected.
+    """
+    if output is not None and os.path.getsize(source_path) < STREAM_THRESHOLD:
+        buffer = io.BytesIO()
+        writer = HashingWriter(buffer)
+        _fill_page(writer, source_path, template, fragment_cache, profiler, tree_file, collector, assets)
+        output.submit(dest_path, buffer.getvalue())
+    else:
+        with atomic_open(dest_path) as f:
+            writer = HashingWriter(f)
+            _fill_page(writer, source_path, template, fragment_cache, profiler, tree_file, collector, assets)
+            if profiler is not None:
+                profiler.begin("write")
+        if profiler is not None:
+            profiler.end()
+    return writer.hexdigest(), writer.size
+
+
+def discard_page(source_path, template):
+    """
+    Renders one content file like render_page but keeps nothing of the
+    output, for profiling a page again. Returns (output hash, output size).
+    """
+    writer = HashingWriter(io.BytesIO())
+    _fill_page(writer, source_path, template, None, None, None, None, None)
+    return writer.hexdigest(), writer.size
+
+
+# Template, fragment cache and assets of the build a pool worker belongs to, set once
+# per process by _init_worker so they are not pickled again for every page.
+# The profiler and output writer are only ever set for serial builds.
+_worker_template = None
+_worker_fragment_cache = None
+_worker_collect = False
+_worker_budget = None
+_worker_assets = None
+_worker_profiler = None
+_worker_output = None
+
+
+def _init_worker(template, fragment_cache_dir, collect=False, memory_budget=None, asset_map=None,
+                 profiler=None, output=None):
+    global _worker_template, _worker_fragment_cache, _worker_collect, _worker_budget
+    global _worker_assets, _worker_profiler, _worker_output
+    _worker_template = template
+    _worker_collect = collect
+    _worker_assets = asset_map
+    _worker_fragment_cache = None
+    if fragment_cache_dir is not None:
+        _worker_fragment_cache = FragmentCache(directory=fragment_cache_dir)
+    _worker_budget = None
+    if memory_budget is not None:
+        _worker_budget = MemoryBudget(memory_budget)
+        _worker_budget.on_pressure(props_cache_clear)
+        if _worker_fragment_cache is not None:
+            _worker_budget.on_pressure(_worker_fragment_cache.drop_memory)
+    _worker_profiler = profiler
+    _worker_output = output
+
+
+def _render_job(paths):
+    source_path, dest_path, tree_file, page_path = paths
+    cache = _worker_fragment_cache
+    profiler = _worker_profiler
+    collector = PageCollector() if _worker_collect else None
+    assets = _worker_assets.for_page(page_path) if _worker_assets is not None else None
+    before = cache.stats() if cache is not None else None
+    start = time.perf_counter()
+    if profiler is None:
+        digest, size = render_page(source_path, dest_path, _worker_template, cache, None, _worker_output,
+                                   tree_file, collector, assets)
+    else:
+        digest, size = profiler.page(source_path, lambda: render_page(
+            source_path, dest_path, _worker_template, cache, profiler, _worker_output, tree_file,
+            collector, assets))
+    elapsed = time.perf_counter() - start
+    fragment_stats = None
+    if cache is not None:
+        fragment_stats = {key: value - before[key] for key, value in cache.stats().items()}
+    info = collector.info() if collector is not None else None
+    used = assets.used if assets is not None else None
+    if _worker_budget is not None:
+        _worker_budget.check()
+    return digest, size, os.getpid(), elapsed, fragment_stats, info, used
+
+
+def _render_chunk(jobs):
+    return [_render_job(job) for job in jobs]
+
+
+def _uses_pool(workers, jobs, profiler):
+    # A profiled build renders every page in this process, so that the
+    # profiler sees all of them
+    return workers > 1 and len(jobs) > 1 and profiler is None
+
+
+def _render_all(jobs, template, workers, fragment_cache_dir=None, profiler=None, collect=False,
+                memory_budget=None, asset_map=None):
+    """
+    Renders (source_path, dest_path, tree_file, page_path) jobs, in a process
+    pool when workers > 1, and yields the results in the order of jobs.
+    Workers get file paths and stream their page to disk themselves; only
+    the hashes and timings (and with collect, the PageCollector info, and
+    with an asset_map, the assets each page uses) come back. Only a few
+    chunks of jobs are queued per worker at a time, so results never pile
+    up. A serial build hands pages to an OutputWriter instead. With
+    memory_budget (bytes), every process drops its caches whenever it goes
+    over budget, and fewer rendered pages wait for the disk.
+    """
+    initargs = (template, fragment_cache_dir, collect, memory_budget, asset_map)
+    if not _uses_pool(workers, jobs, profiler):
+        max_pending = 64
+        if memory_budget is not None:
+            # A quarter of the budget for pages waiting to be written
+            max_pending = max(1, min(max_pending, memory_budget // (4 * STREAM_THRESHOLD)))
+        # A profiled build writes its pages itself, so the real disk writes
+        # are what its "write" phase measures
+        output = OutputWriter(max_pending=max_pending) if profiler is None else nullcontext()
+        with output as output:
+            _init_worker(*initargs, profiler, output)
+            try:
+                for job in jobs:
+                    yield _render_job(job)
+            finally:
+                _init_worker(None, None)
+        return
+    chunksize = max(1, min(MAX_CHUNK_SIZE, len(jobs) // (workers * 4)))
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=initargs) as pool:
+        queued = deque()
+        for start in range(0, len(jobs), chunksize):
+            if len(queued) >= workers * CHUNKS_PER_WORKER:
+                yield from queued.popleft().result()
+            queued.append(pool.submit(_render_chunk, jobs[start:start + chunksize]))
+        while queued:
+            yield from queued.popleft().result()
+
+
+class Manifest():
+    """
+    Record of the inputs and outputs of the last build: the template hash and,
+    per content file, the source hash (plus size/mtime to skip rehashing),
+    the hash and size of the page written for it and, with fingerprinted
+    assets, the hash of every asset the page refers to.
+    """
+
+    def __init__(self, template=None, pages=None):
+        self.template = template
+        self.pages = pages if pages is not None else {}
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        if data.get("version") != MANIFEST_VERSION:
+            return cls()
+        return cls(data.get("template"), data.get("pages", {}))
+
+    def save(self, path):
+        data = {"version": MANIFEST_VERSION, "template": self.template, "pages": self.pages}
+        atomic_write(path, json.dumps(data, indent=1, sort_keys=True).encode("utf-8"))
+
+    def source_hash(self, rel_source, source_path):
+        """Hash of a source file, reusing the recorded one if size and mtime match."""
+        st = os.stat(source_path)
+        entry = self.pages.get(rel_source)
+        if entry and entry["source_size"] == st.st_size and entry["source_mtime_ns"] == st.st_mtime_ns:
+            return entry["source"], st
+        return file_hash(source_path), st
+
+    def is_fresh(self, rel_source, source_digest, dest_path):
+        entry = self.pages.get(rel_source)
+        if entry is None or entry["source"] != source_digest:
+            return False
+        try:
+            return os.path.getsize(dest_path) == entry["output_size"]
+        except OSError:
+            return False
+
+    def record(self, rel_source, source_digest, source_stat, output_digest, output_size, info=None,
+               assets=None):
+        entry = self.pages[rel_source] = {
+            "source": source_digest,
+            "source_size": source_stat.st_size,
+            "source_mtime_ns": source_stat.st_mtime_ns,
+            "output": output_digest,
+            "output_size": output_size,
+        }
+        if info is not None:
+            entry["info"] = info
+        if assets is not None:
+            entry["assets"] = assets
+
+
+class BuildResult():
+    def __init__(self):
+        self.built = []
+        self.skipped = []
+        self.removed = []
+        # pid -> [pages rendered, seconds spent rendering]
+        self.worker_stats = {}
+        # Whether pages were rendered in a pool of worker processes
+        self.pooled = False
+        # Summed FragmentCache.stats() of all workers, when a cache was used
+        self.fragment_stats = None
+        # output.CopyStats of the static files, when there were any
+        self.static_stats = None
+        # assets.AssetStats, when static files were fingerprinted
+        self.asset_stats = None
+        # links.LinkReport, when links were checked
+        self.link_report = None
+        # Peak RSS in bytes of the build process and of its largest worker
+        self.peak_rss = None
+        self.peak_worker_rss = None
+
+    def add_timing(self, pid, seconds):
+        stats = self.worker_stats.setdefault(pid, [0, 0.0])
+        stats[0] += 1
+        stats[1] += seconds
+
+    def add_fragment_stats(self, stats):
+        if self.fragment_stats is None:
+            self.fragment_stats = dict.fromkeys(stats, 0)
+        for key, value in stats.items():
+            self.fragment_stats[key] += value
+
+    def summary(self):
+        return (f"{len(self.built)} built, {len(self.skipped)} unchanged, "
+                f"{len(self.removed)} removed")
+
+    def fragment_report(self):
+        stats = self.fragment_stats
+        return (f"fragment cache: {stats['hits']} hits, {stats['misses']} misses, "
+                f"{stats['bytes_saved']} bytes and {stats['time_saved']:.3f}s saved")
+
+    def worker_report(self):
+        lines = []
+        for number, pid in enumerate(sorted(self.worker_stats), 1):
+            pages, seconds = self.worker_stats[pid]
+            lines.append(f"worker {number} (pid {pid}): {pages} pages in {seconds:.3f}s")
+        return "\n".join(lines)
+
+    def memory_report(self):
+        report = f"peak RSS: {format_size(self.peak_rss)}"
+        if self.peak_worker_rss:
+            report += f" (largest worker {format_size(self.peak_worker_rss)})"
+        return report
+
+    def __repr__(self):
+        return f"BuildResult({self.summary()})"
+
+
+def build_site(content_dir, template_path, dest_dir, force=False, jobs=1, fragment_cache_dir=None,
+               profiler=None, static_dir=None, hardlink=False, tree_cache_dir=None, site_url=None,
+               memory_budget=None, check_links=False, minify=False, fingerprint=False):
+    """
+    Renders every content file under content_dir into dest_dir. Pages whose
+    source, template and output are unchanged since the last build (as
+    recorded in dest_dir/.manifest.json) are skipped. With jobs > 1 the
+    remaining pages are rendered by that many worker processes. With
+    fragment_cache_dir, repeated subtrees are rendered through a FragmentCache
+    stored there, whose least recently used fragments are removed after the
+    build once it outgrows fragment_cache.MAX_STORE_BYTES. With an instrument.Profiler the build runs in this process
+    and records per-phase timings into it. Files under static_dir are
+    mirrored into dest_dir (hard-linked with hardlink) before pages render.
+    With tree_cache_dir, parsed pages are kept there keyed by source hash, so
+    pages rebuilt for another reason than their own source changing (a new
+    template, --force, a missing output) are not parsed again.
+    With site_url, sitemap.xml, feed.xml and a sharded search index are
+    written too, from page data collected while pages render and kept in
+    the manifest for the pages that are skipped. With check_links, the
+    links recorded the same way are resolved against the site's pages and
+    static files, and result.link_report lists broken links and orphans.
+    With memory_budget (bytes), each build process releases its caches when
+    it goes over the budget, and the page data is kept in an SQLite file
+    (dest_dir/.site.sqlite) and streamed from there. With minify, the
+    template and the pages are written minified. With fingerprint, static
+    files are also published under names holding their content hash (see
+    assets.fingerprint_assets), pages and the template link to those, images
+    get their size, and a page is rebuilt when an asset it uses changes.
+    """
+    result = BuildResult()
+    manifest_path = os.path.join(dest_dir, MANIFEST_NAME)
+    manifest = Manifest.load(manifest_path)
+
+    os.makedirs(dest_dir, exist_ok=True)
+    if tree_cache_dir is not None:
+        os.makedirs(tree_cache_dir, exist_ok=True)
+    if static_dir is not None:
+        result.static_stats = copy_tree(static_dir, dest_dir, hardlink=hardlink)
+    asset_map = None
+    if fingerprint and static_dir is not None:
+        if profiler is not None:
+            profiler.begin("assets")
+        asset_map, result.asset_stats = fingerprint_assets(static_dir, dest_dir)
+        if profiler is not None:
+            profiler.end()
+
+    template_digest = file_hash(template_path)
+    if minify:
+        # Switching minify on or off changes every page, like a new template
+        template_digest += ":minify"
+    if asset_map is None:
+        template = load_template(template_path, minify)
+    else:
+        # Asset URLs in the layout are rewritten too; the assets it uses are
+        # part of it, so a change to one of them rebuilds every page
+        template_assets = asset_map.for_page(HOME_PAGE)
+        template = load_template(template_path, minify, template_assets.rewrite_markup)
+        template_digest += ":fingerprint:" + ",".join(
+            f"{rel_path}={digest}" for rel_path, digest in sorted(template_assets.used.items()))
+    # Every page embeds the template, so a new template makes all of them stale
+    stale = force or manifest.template != template_digest
+    manifest.template = template_digest
+    collect = site_url is not None or check_links
+    store = None
+    if collect and memory_budget is not None:
+        store = SiteStore(os.path.join(dest_dir, SITE_STORE_NAME))
+    if profiler is not None:
+        profiler.begin("scan")
+    sources = find_pages(content_dir)
+    pending = []
+    for rel_source in sources:
+        source_path = os.path.join(content_dir, rel_source)
+        dest_path = os.path.join(dest_dir, output_path(rel_source))
+        source_digest, source_stat = manifest.source_hash(rel_source, source_path)
+        # A page built without its page record has to be rendered again to get it
+        if store is not None:
+            has_info = store.has_page(rel_source)
+        else:
+            has_info = not collect or "info" in manifest.pages.get(rel_source, {})
+        if asset_map is not None:
+            has_info = has_info and asset_map.is_current(manifest.pages.get(rel_source, {}).get("assets"))
+        if not stale and has_info and manifest.is_fresh(rel_source, source_digest, dest_path):
+            result.skipped.append(rel_source)
+            continue
+        pending.append((rel_source, source_path, dest_path, source_digest, source_stat))
+    if profiler is not None:
+        profiler.end()
+
+    render_jobs = []
+    for rel_source, source_path, dest_path, source_digest, _ in pending:
+        tree_file = None
+        if tree_cache_dir is not None:
+            tree_file = tree_path(tree_cache_dir, source_digest)
+        render_jobs.append((source_path, dest_path, tree_file, output_path(rel_source).replace(os.sep, "/")))
+    result.pooled = _uses_pool(jobs, render_jobs, profiler)
+    rendered = _render_all(render_jobs, template, jobs, fragment_cache_dir, profiler, collect, memory_budget,
+                           asset_map)
+    for page, (digest, size, pid, seconds, fragment_stats, info, used) in zip(pending, rendered):
+        rel_source, _, _, source_digest, source_stat = page
+        if store is not None:
+            store.put(rel_source, page_url(output_path(rel_source)), source_stat.st_mtime_ns, info)
+            info = None
+        manifest.record(rel_source, source_digest, source_stat, digest, size, info, used)
+        result.built.append(rel_source)
+        result.add_timing(pid, seconds)
+        if fragment_stats is not None:
+            result.add_fragment_stats(fragment_stats)
+
+    # Pages whose content file was deleted
+    for rel_source in sorted(set(manifest.pages) - set(sources)):
+        try:
+            os.remove(os.path.join(dest_dir, output_path(rel_source)))
+        except FileNotFoundError:
+            pass
+        del manifest.pages[rel_source]
+        result.removed.append(rel_source)
+    if store is not None:
+        # Also drops pages recorded by builds whose manifest was lost since
+        store.retain(sources)
+
+    if site_url is not None:
+        if profiler is not None:
+            profiler.begin("site index")
+        if store is not None:
+            site_title = store.title("index" + CONTENT_EXTENSION) or site_url
+            write_site_index(dest_dir, site_url, site_title, store, store.postings())
+        else:
+            _write_site_index(dest_dir, site_url, manifest)
+        if profiler is not None:
+            profiler.end()
+    if check_links:
+        if store is not None:
+            links = store.links()
+        else:
+            links = ((rel_source, tag, url) for rel_source, entry in manifest.pages.items()
+                     for tag, url in entry["info"]["links"])
+        pages = {rel_source: output_path(rel_source).replace(os.sep, "/") for rel_source in sources}
+        files = _site_files(static_dir)
+        if asset_map is not None:
+            files.extend(asset_map.files())
+        result.link_report = resolve_links(pages, files, links, site_url)
+    if store is not None:
+        store.close()
+    if fragment_cache_dir is not None:
+        prune_store(fragment_cache_dir)
+    if tree_cache_dir is not None:
+        _prune_trees(tree_cache_dir, {entry["source"] for entry in manifest.pages.values()})
+    manifest.save(manifest_path)
+    result.peak_rss = peak_rss()
+    if result.pooled:
+        result.peak_worker_rss = peak_rss(children=True)
+    return result
+
+
+def _write_site_index(dest_dir, site_url, manifest):
+    pages = []
+    for rel_source in sorted(manifest.pages):
+        entry = manifest.pages[rel_source]
+        page = dict(entry["info"])
+        page["url"] = page_url(output_path(rel_source))
+        page["modified_ns"] = entry["source_mtime_ns"]
+        pages.append(page)
+    # The feed is named after the home page, if there is one
+    home = manifest.pages.get("index" + CONTENT_EXTENSION)
+    site_title = home["info"]["title"] if home is not None else site_url
+    write_site_index(dest_dir, site_url, site_title, pages)
+
+
+def _site_files(static_dir):
+    """Output paths ("/"-separated) of the static files, for the link check."""
+    files = []
+    if static_dir is None:
+        return files
+    for root, _, names in os.walk(static_dir):
+        rel_dir = os.path.relpath(root, static_dir)
+        for name in names:
+            files.append(os.path.normpath(os.path.join(rel_dir, name)).replace(os.sep, "/"))
+    return files
+
+
+def _prune_trees(tree_cache_dir, source_digests):
+    """
+    Removes cached trees of sources that no longer exist in this form, and
+    trees written by another parser version.
+    """
+    keep = {os.path.basename(tree_path(tree_cache_dir, digest)) for digest in source_digests}
+    for name in os.listdir(tree_cache_dir):
+        if name.endswith(TREE_EXTENSION) and name not in keep:
+            os.remove(os.path.join(tree_cache_dir, name))
@@ -0,0 +1,208 @@
+import os
+import time
+from collections import OrderedDict
+
+from htmlnode import PREFORMATTED_TAGS, ParentNode, subtree_digests
+
+# Appended to structural hashes to key a fragment by how it was rendered.
+# Fragments stored before output was escaped had no suffix and never match.
+_MODE_SUFFIX = {False: b"e", True: b"m"}
+# Size the on-disk store is trimmed to after each build (see prune_store)
+MAX_STORE_BYTES = 256 * 2**20
+
+
+class _CaptureEnd():
+    """Stack marker: the subtree opened at out[start] is fully rendered."""
+
+    __slots__ = ("digest", "start", "started")
+
+    def __init__(self, digest, start, started):
+        self.digest = digest
+        self.start = start
+        self.started = started
+
+
+class FragmentCache():
+    """
+    Cache of rendered HTML for ParentNode subtrees, keyed by their structural
+    hash (see htmlnode.subtree_digests). Subtrees with fewer than min_nodes
+    nodes are cheaper to render than to hash and look up, so they are never
+    cached.
+
+    Entries live in an in-memory LRU of max_entries. With a directory they
+    are also written to disk, one file per fragment, so they survive across
+    builds and are shared by build worker processes. A fragment read from
+    disk has its mtime bumped, so prune_store can drop the least recently
+    used ones.
+    """
+
+    def __init__(self, max_entries=1024, min_nodes=8, directory=None):
+        self.max_entries = max_entries
+        self.min_nodes = min_nodes
+        self.directory = directory
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.time_saved = 0.0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key[2:] + ".html")
+
+    def get(self, digest):
+        """Cached (html, seconds it took to render) for a digest, or None."""
+        key = digest.hex()
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        elif self.directory is not None:
+            entry = self._load(key)
+            if entry is not None:
+                self._remember(key, entry)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.bytes_saved += len(entry[0])
+        self.time_saved += entry[1]
+        return entry
+
+    def put(self, digest, html, seconds):
+        key = digest.hex()
+        self._remember(key, (html, seconds))
+        if self.directory is not None:
+            self._store(key, html, seconds)
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def drop_memory(self):
+        """Forgets the in-memory entries; those on disk are kept."""
+        self._entries.clear()
+
+    def _load(self, key):
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                seconds = float(f.readline())
+                html = f.read()
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return html, seconds
+
+    def _store(self, key, html, seconds):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written under a unique name and renamed, as several build
+        # processes may store the same fragment at once
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(f"{seconds!r}\n")
+            f.write(html)
+        os.replace(tmp_path, path)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes_saved": self.bytes_saved,
+            "time_saved": self.time_saved,
+        }
+
+    def iter_html(self, node, *, minify=False):
+        """
+        Same output as node.iter_html(minify=minify), but every ParentNode
+        subtree of at least min_nodes nodes is looked up first. A hit is
+        emitted as one chunk without visiting the subtree; a miss is rendered,
+        captured and stored. Output is yielded as it is produced, except
+        inside a subtree that is being captured. Minified and regular
+        renderings of a subtree are cached separately.
+        """
+        digests = subtree_digests(node)
+        suffix = _MODE_SUFFIX[bool(minify)]
+        out = []
+        captures = 0
+        stack = [node]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                chunk = item
+            elif isinstance(item, _CaptureEnd):
+                fragment = "".join(out[item.start:])
+                del out[item.start:]
+                self.put(item.digest, fragment, time.perf_counter() - item.started)
+                captures -= 1
+                chunk = fragment
+            elif isinstance(item, ParentNode):
+                digest, size = digests[id(item)]
+                digest += suffix
+                if minify and item.tag in PREFORMATTED_TAGS:
+                    # Rendered as is, like HTMLNode.iter_html does
+                    chunk = "".join(item.iter_html())
+                elif size >= self.min_nodes:
+                    entry = self.get(digest)
+                    if entry is not None:
+                        chunk = entry[0]
+                    else:
+                        stack.append(_CaptureEnd(digest, len(out), time.perf_counter()))
+                        captures += 1
+                        chunk = None
+                else:
+                    chunk = None
+                if chunk is None:
+                    item._check_renderable()
+                    chunk = f"<{item.tag}{item.props_to_html(minify)}>"
+                    stack.append(f"</{item.tag}>")
+                    stack.extend(reversed(item.children))
+            else:
+                chunk = item.to_html(minify=minify)
+
+            if captures:
+                out.append(chunk)
+            else:
+                yield chunk
+
+
+def prune_store(directory, max_bytes=MAX_STORE_BYTES):
+    """
+    Trims the on-disk store of a FragmentCache to max_bytes by removing the
+    least recently used fragments (oldest mtime first), along with
+    temporary files left by interrupted writes. Returns the number of files
+    removed. Run between builds: a fragment removed while a worker still
+    wants it is only a miss.
+    """
+    files = []
+    total = 0
+    removed = 0
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                if name.endswith(".tmp"):
+                    os.remove(path)
+                    removed += 1
+                    continue
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime_ns, path, st.st_size))
+            total += st.st_size
+    if total <= max_bytes:
+        return removed
+    files.sort()
+    for _, path, size in files:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+        total -= size
+    return removed
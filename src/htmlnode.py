@@ -1,47 +1,257 @@
+import hashlib
+import html
+import re
+from functools import lru_cache
+from types import MappingProxyType
+
+# Shared, read-only stand-in for an empty props dict. Nodes created with
+# props={} point at this one object instead of keeping their own empty dict.
+EMPTY_PROPS = MappingProxyType({})
+
+# Upper bound on the number of distinct props dicts / attribute values kept
+# pre-rendered. Real pages repeat a small set of them thousands of times.
+PROPS_CACHE_SIZE = 4096
+
+
+def _escape(value):
+    return html.escape(str(value), quote=True)
+
+
+_escape_attribute = lru_cache(maxsize=PROPS_CACHE_SIZE)(_escape)
+
+# Elements whose whitespace is content: minify leaves their subtrees alone
+PREFORMATTED_TAGS = frozenset(("pre", "code", "textarea", "script", "style"))
+
+# HTML whitespace only: a no-break space is content
+_WHITESPACE = re.compile(r"[ \t\n\r\f]+")
+# Attribute values that need no quotes (HTML: no whitespace, quotes, =, <, > or `)
+_UNQUOTED_VALUE = re.compile(r"[^\s\"'=<>`]+")
+
+
+def escape_text(value):
+    """
+    Escapes &, < and > in text content. Most text has none of them, so it
+    is checked for them first and then returned as is, without copying.
+    """
+    if not isinstance(value, str):
+        value = str(value)
+    if "&" in value or "<" in value or ">" in value:
+        return value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return value
+
+
+def collapse_whitespace(text):
+    """Every run of whitespace as one space, as the browser displays it."""
+    if "  " in text or "\n" in text or "\t" in text or "\r" in text or "\f" in text:
+        return _WHITESPACE.sub(" ", text)
+    return text
+
+
+def _format_props(items, escape):
+    return "".join(f' {key}="{escape(value)}"' for key, value in items)
+
+
+def _format_props_minified(items, escape):
+    parts = []
+    for key, value in items:
+        value = escape(value)
+        if not value:
+            # An attribute without a value is the same as one set to ""
+            parts.append(f" {key}")
+        elif _UNQUOTED_VALUE.fullmatch(value):
+            parts.append(f" {key}={value}")
+        else:
+            parts.append(f' {key}="{value}"')
+    return "".join(parts)
+
+
+@lru_cache(maxsize=PROPS_CACHE_SIZE)
+def _render_props(items):
+    return _format_props(items, _escape_attribute)
+
+
+@lru_cache(maxsize=PROPS_CACHE_SIZE)
+def _render_props_minified(items):
+    return _format_props_minified(items, _escape_attribute)
+
+
+def props_to_html(props, minify=False):
+    """
+    Renders a props dict as an HTML attribute string (' key="value" ...').
+    Results are cached by the (key, value) pairs, so repeated props dicts are
+    formatted and escaped only once. With minify, quotes are left out where
+    the value does not need them and empty values are left out entirely.
+    """
+    if not props:
+        return ""
+    items = tuple(props.items())
+    try:
+        return _render_props_minified(items) if minify else _render_props(items)
+    except TypeError:
+        # Unhashable value: render it without caching
+        return (_format_props_minified if minify else _format_props)(items, _escape)
+
+
+def props_cache_info():
+    """Hit/miss counters of the props cache (functools CacheInfo)."""
+    return _render_props.cache_info()
+
+
+def props_cache_clear():
+    _render_props.cache_clear()
+    _render_props_minified.cache_clear()
+    _escape_attribute.cache_clear()
+
+
+def _hash_field(digest, value):
+    # Length-prefixed, so ("ab", "c") and ("a", "bc") hash differently
+    data = b"\xff" if value is None else str(value).encode("utf-8")
+    digest.update(len(data).to_bytes(8, "little"))
+    digest.update(data)
+
+
+def subtree_digests(node):
+    """
+    Structural hashes of node and every node below it, in one post-order
+    walk. Returns {id(node): (digest bytes, number of nodes in the subtree)}.
+    The hash covers tag, value, props (in order) and the children's hashes,
+    so equal subtrees get equal digests in any process.
+    """
+    digests = {}
+    stack = [(node, False)]
+    while stack:
+        current, visited = stack.pop()
+        children = current.children or ()
+        if children and not visited:
+            stack.append((current, True))
+            stack.extend((child, False) for child in children)
+            continue
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(b"P" if children else b"L")
+        _hash_field(digest, current.tag)
+        _hash_field(digest, current.value)
+        for key, value in (current.props or {}).items():
+            _hash_field(digest, key)
+            _hash_field(digest, value)
+        size = 1
+        for child in children:
+            child_digest, child_size = digests[id(child)]
+            digest.update(child_digest)
+            size += child_size
+        digests[id(current)] = (digest.digest(), size)
+    return digests
 
 
 class HTMLNode():
+    # No per-instance __dict__: a site holds millions of these at once.
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self,tag = None,value = None,children = None,props = None):
         self.tag = tag
         self.value = value
         self.children = children
-        self.props = props
+        self.props = EMPTY_PROPS if props is not None and not props else props
 
-    def to_html(self):
+    def to_html(self, *, fragment_cache=None, minify=False):
         raise(NotImplementedError)
+
+    def structural_hash(self):
+        """Stable hex hash of this subtree (see subtree_digests)."""
+        return subtree_digests(self)[id(self)][0].hex()
+
+    def iter_html(self, *, fragment_cache=None, minify=False):
+        """
+        Yields the HTML of this node and its whole subtree as string chunks.
+        The tree is walked with an explicit stack instead of recursion, so deeply
+        nested documents do not hit the recursion limit and no subtree string is
+        copied more than once. With a FragmentCache, large subtrees rendered
+        before are taken from the cache instead. Text and attribute values are
+        escaped. With minify, whitespace in text is collapsed and attribute
+        quotes are dropped where possible, in the same walk; subtrees of
+        PREFORMATTED_TAGS are rendered as they are.
+        """
+        if fragment_cache is not None:
+            yield from fragment_cache.iter_html(self, minify=minify)
+            return
+        stack = [self]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                # Closing tag pushed by the ParentNode that opened it
+                yield item
+            elif isinstance(item, ParentNode):
+                if minify and item.tag in PREFORMATTED_TAGS:
+                    yield from item.iter_html()
+                    continue
+                item._check_renderable()
+                yield f"<{item.tag}{item.props_to_html(minify)}>"
+                stack.append(f"</{item.tag}>")
+                stack.extend(reversed(item.children))
+            else:
+                yield item.to_html(minify=minify)
+
+    def render_to(self, stream, buffer_size=1024, *, fragment_cache=None, minify=False):
+        """
+        Writes the HTML of this node to a file-like object with a write() method.
+        Chunks are joined in batches of buffer_size so memory stays bounded
+        while the number of write() calls stays low.
+        """
+        buffer = []
+        for chunk in self.iter_html(fragment_cache=fragment_cache, minify=minify):
+            buffer.append(chunk)
+            if len(buffer) >= buffer_size:
+                stream.write("".join(buffer))
+                buffer.clear()
+        if buffer:
+            stream.write("".join(buffer))
     
-    def props_to_html(self):
-        if self.props is None or not self.props: # Check if props is None or empty dict
+    def props_to_html(self, minify=False):
+        # Same as the module-level props_to_html, inlined for the hot path
+        props = self.props
+        if not props:
             return ""
-        attribute_parts = []
-        for key, value in self.props.items():
-            # Format each key-value pair as key="value"
-            # Ensure values are strings or convertible to strings
-            attribute_parts.append(f'{key}="{value}"')
-        
-        return " " + " ".join(attribute_parts)
+        items = tuple(props.items())
+        try:
+            return _render_props_minified(items) if minify else _render_props(items)
+        except TypeError:
+            return (_format_props_minified if minify else _format_props)(items, _escape)
     
     def __repr__(self):
+        props = {} if self.props is EMPTY_PROPS else self.props
         return (f"HTMLNode(tag={self.tag!r}, value={self.value!r}, "
-                f"children={self.children!r}, props={self.props!r})")
+                f"children={self.children!r}, props={props!r})")
     
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         if value is None:
             raise ValueError("LeafNode requires a value")
         super().__init__(tag, value, children=None, props=props)
 
-    def to_html(self):
+    def to_html(self, *, fragment_cache=None, minify=False):
+        # fragment_cache is accepted for a uniform signature; a leaf is
+        # never worth caching
         if self.value is None:
             raise ValueError("Invalid HTML: LeafNode must have a value")
-        
+
+        # escape_text, inlined for the hot path
+        value = self.value
+        if value.__class__ is not str:
+            value = str(value)
+        if "&" in value or "<" in value or ">" in value:
+            value = escape_text(value)
+        if minify and self.tag not in PREFORMATTED_TAGS:
+            value = collapse_whitespace(value)
         if self.tag is None:
-            return self.value
+            return value
         
-        attributes_html = self.props_to_html()
-        return f"<{self.tag}{attributes_html}>{self.value}</{self.tag}>"
+        attributes_html = self.props_to_html(minify)
+        return f"<{self.tag}{attributes_html}>{value}</{self.tag}>"
     
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children , props=None):
        
         if tag is None or tag == "":
@@ -52,14 +262,64 @@ class ParentNode(HTMLNode):
         
         super().__init__(tag, value=None, children=children, props=props)
 
-    def to_html(self):
+    def _check_renderable(self):
         if self.tag is None or self.tag == "":
             raise ValueError("Invalid HTML: ParentNode requires a tag to render")
         if self.children is None or len(self.children) == 0:
             raise ValueError("Invalid HTML: ParentNode requires children to render")
-        children_html_string = ""
-        for child in self.children:
-            children_html_string += child.to_html()
-        attributes_html = self.props_to_html()
-        return f"<{self.tag}{attributes_html}>{children_html_string}</{self.tag}>"
-        
+
+    def to_html(self, *, fragment_cache=None, minify=False):
+        """
+        Same output as iter_html, joined. The walk appends to one list
+        instead of going through the generator and renders leaves in place
+        (LeafNode.to_html, inlined), so a leaf costs no call and no trip
+        through the stack; on shallow pages, which are mostly leaves, those
+        were most of the time.
+        """
+        if fragment_cache is not None:
+            return "".join(fragment_cache.iter_html(self, minify=minify))
+        self._check_renderable()
+        if minify and self.tag in PREFORMATTED_TAGS:
+            return self.to_html()
+        parts = [f"<{self.tag}{self.props_to_html(minify) if self.props else ''}>"]
+        append = parts.append
+        # The stack holds the children iterator and closing tag of every open
+        # parent; leaves never go on it
+        stack = []
+        children = iter(self.children)
+        closing = f"</{self.tag}>"
+        while True:
+            for item in children:
+                tag = item.tag
+                if isinstance(item, ParentNode):
+                    if minify and tag in PREFORMATTED_TAGS:
+                        append(item.to_html())
+                        continue
+                    item._check_renderable()
+                    append(f"<{tag}{item.props_to_html(minify) if item.props else ''}>")
+                    stack.append((children, closing))
+                    children = iter(item.children)
+                    closing = f"</{tag}>"
+                    break
+                value = item.value
+                if value is None:
+                    raise ValueError("Invalid HTML: LeafNode must have a value")
+                if value.__class__ is not str:
+                    value = str(value)
+                if "&" in value or "<" in value or ">" in value:
+                    value = escape_text(value)
+                if minify and tag not in PREFORMATTED_TAGS:
+                    value = collapse_whitespace(value)
+                if tag is None:
+                    append(value)
+                elif item.props:
+                    append(f"<{tag}{item.props_to_html(minify)}>{value}</{tag}>")
+                else:
+                    append(f"<{tag}>{value}</{tag}>")
+            else:
+                append(closing)
+                if not stack:
+                    break
+                children, closing = stack.pop()
+        return "".join(parts)
+
@@ -0,0 +1,178 @@
+import re
+
+from textnode import TextNode, TextType
+
+# Characters that can start inline markup. Everything between two of them is
+# plain text and is skipped in one step.
+_MARKUP_START = re.compile(r"[`*_!\[]")
+
+
+def _is_word_char(text, index):
+    return index >= 0 and text[index:index + 1].isalnum()
+
+
+def _is_space(text, index):
+    # Start and end of the text count as whitespace
+    return index < 0 or not text[index:index + 1].strip()
+
+
+class _Scanner():
+    """
+    State of one pass over a string. Remembers from where on each delimiter
+    no longer occurs, so a run of unmatched delimiters costs one failed
+    search instead of one search to the end of the text per occurrence, and
+    the last closer found for each delimiter, so every candidate closer is
+    examined once per pass however many openers look past it.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        # needle -> position from which the needle does not occur any more
+        self.exhausted = {}
+        # delimiter -> (start, closer): the first valid closer at or after
+        # start is closer (-1: there is none)
+        self.closers = {}
+
+    def find(self, needle, start):
+        if start >= self.exhausted.get(needle, len(self.text) + 1):
+            return -1
+        index = self.text.find(needle, start)
+        if index == -1:
+            self.exhausted[needle] = start
+        return index
+
+    def find_closer(self, delimiter, start):
+        """
+        Next delimiter at or after start that can close a span: not preceded
+        by whitespace; for "_", not followed by a letter or digit nor part
+        of a run of underscores; for "*", not part of a run of asterisks;
+        for "**", at the end of its run ("***" closes on its last two).
+        Openers are tried left to right, so start only grows within a pass
+        and the last answer usually holds.
+        """
+        known = self.closers.get(delimiter)
+        if known is not None and known[0] <= start and (known[1] == -1 or start <= known[1]):
+            return known[1]
+        text = self.text
+        end = self.find(delimiter, start)
+        while end != -1 and (
+            _is_space(text, end - 1)
+            or (delimiter == "_" and (
+                _is_word_char(text, end + 1) or text[end - 1] == "_" or text.startswith("_", end + 1)))
+            or (delimiter == "*" and (text[end - 1] == "*" or text.startswith("*", end + 1)))
+            or (delimiter == "**" and text.startswith("*", end + 2))
+        ):
+            end = self.find(delimiter, end + 1)
+        self.closers[delimiter] = (start, end)
+        return end
+
+    def can_open(self, i, delimiter):
+        # An opener must be followed by non-whitespace; "_" must not be
+        # preceded by a letter or digit (snake_case words are not emphasis)
+        # and "*" must not be the tail of an unmatched "**"
+        if _is_space(self.text, i + len(delimiter)):
+            return False
+        if delimiter == "*":
+            return not (i > 0 and self.text[i - 1] == "*")
+        return not (delimiter[0] == "_" and _is_word_char(self.text, i - 1))
+
+    def match_code(self, i):
+        end = self.find("`", i + 1)
+        if end == -1:
+            return None
+        return TextNode(self.text[i + 1:end], TextType.CODE), end + 1
+
+    def match_bold(self, i):
+        if not self.can_open(i, "**"):
+            return None
+        end = self.find_closer("**", i + 3)
+        if end == -1:
+            return None
+        return TextNode(self.text[i + 2:end], TextType.BOLD), end + 2
+
+    def match_italic(self, i, delimiter):
+        if not self.can_open(i, delimiter):
+            return None
+        end = self.find_closer(delimiter, i + 2)
+        if end == -1:
+            return None
+        return TextNode(self.text[i + 1:end], TextType.ITALIC), end + 1
+
+    def match_link(self, i, text_type):
+        # i points at "[", which is preceded by "!" for images
+        text = self.text
+        close = self.find("]", i + 1)
+        if close == -1 or not text.startswith("(", close + 1):
+            return None
+        url_end = self.find(")", close + 2)
+        if url_end == -1:
+            return None
+        return TextNode(text[i + 1:close], text_type, text[close + 2:url_end]), url_end + 1
+
+
+def iter_text_nodes(text):
+    """
+    Splits inline markdown into TextNodes in a single left-to-right pass:
+
+        `code`  **bold**  _italic_ / *italic*  [link](url)  ![alt](url)
+
+    Rules:
+    - Markup does not nest. Delimiters inside a matched span are kept as
+      literal text of that span ("**a _b_**" is one BOLD node "a _b_").
+    - A delimiter without a closer is plain text.
+    - "*", "**" and "_" open only before non-whitespace and close only after
+      it, and "_" inside a word (snake_case) is not emphasis.
+    - Runs of two or more underscores ("__init__", "a__b") are plain text;
+      "__" is not a bold delimiter.
+    - A single "*" never opens or closes on part of a run of asterisks, so
+      "*a **b** c*" is one ITALIC node; "**" closes at the end of its run,
+      so "***x***" is BOLD "*x*".
+    - Consecutive plain text is always emitted as a single TEXT node.
+    """
+    scanner = _Scanner(text)
+    text_start = 0
+    pos = 0
+    search = _MARKUP_START.search
+    while True:
+        found = search(text, pos)
+        if found is None:
+            break
+        i = found.start()
+        char = text[i]
+        start = i
+        if char == "`":
+            match = scanner.match_code(i)
+        elif char == "*" and text.startswith("**", i):
+            match = scanner.match_bold(i)
+            if match is None:
+                # "**" never closed: the pair is literal text
+                pos = i + 2
+                continue
+        elif char == "_" and text.startswith("__", i):
+            # The whole run of underscores is literal text
+            pos = i + 2
+            while text.startswith("_", pos):
+                pos += 1
+            continue
+        elif char == "*" or char == "_":
+            match = scanner.match_italic(i, char)
+        elif char == "[":
+            match = scanner.match_link(i, TextType.LINK)
+        elif text.startswith("![", i):
+            match = scanner.match_link(i + 1, TextType.IMAGE)
+        else:
+            match = None
+        if match is None:
+            pos = i + 1
+            continue
+        node, pos = match
+        if text_start < start:
+            yield TextNode(text[text_start:start], TextType.TEXT)
+        yield node
+        text_start = pos
+    if text_start < len(text):
+        yield TextNode(text[text_start:], TextType.TEXT)
+
+
+def text_to_textnodes(text):
+    return list(iter_text_nodes(text))
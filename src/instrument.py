@@ -0,0 +1,203 @@
+import cProfile
+import json
+import os
+import time
+
+from htmlnode import PREFORMATTED_TAGS, ParentNode
+from inline_markdown import iter_text_nodes
+from main import text_nodes_to_html_nodes
+
+# Chrome trace events kept per build; phases of huge builds are still summed
+MAX_TRACE_EVENTS = 200_000
+
+
+class _Frame():
+    __slots__ = ("name", "label", "start", "child_time")
+
+    def __init__(self, name, label, start):
+        self.name = name
+        self.label = label
+        self.start = start
+        self.child_time = 0.0
+
+
+class Profiler():
+    """
+    Opt-in build instrumentation. Nothing in the build calls into it unless a
+    Profiler is passed in, so a normal build pays one `is None` check per page.
+
+    Records, per phase (read, tree, tokenize, convert, render, write, ...),
+    the number of calls, the exclusive time (time spent in nested phases is
+    charged to them, not to the enclosing one) and the bytes handled; per
+    node type and tag the count, render time and bytes of HTML produced; and
+    the time of every page. Phases and pages are also recorded as Chrome
+    trace events (chrome://tracing, Perfetto).
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.nodes = {}
+        self.pages = []
+        self.events = []
+        self._stack = []
+        self._origin = time.perf_counter()
+
+    # --- phases ---
+
+    def begin(self, name, label=None):
+        self._stack.append(_Frame(name, label or name, time.perf_counter()))
+
+    def end(self, nbytes=0):
+        now = time.perf_counter()
+        frame = self._stack.pop()
+        elapsed = now - frame.start
+        if self._stack:
+            self._stack[-1].child_time += elapsed
+        stats = self.phases.setdefault(frame.name, [0, 0.0, 0])
+        stats[0] += 1
+        stats[1] += elapsed - frame.child_time
+        stats[2] += nbytes
+        self._event(frame.label, frame.start, elapsed)
+        return elapsed
+
+    def _event(self, name, start, elapsed):
+        if len(self.events) < MAX_TRACE_EVENTS:
+            self.events.append({
+                "name": name, "ph": "X", "pid": os.getpid(), "tid": 0,
+                "ts": (start - self._origin) * 1e6, "dur": elapsed * 1e6,
+            })
+
+    def timed_iter(self, name, iterable, measure=None):
+        """Wraps an iterator so producing each item is timed as phase name."""
+        iterator = iter(iterable)
+        while True:
+            self.begin(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.end()
+                return
+            self.end(measure(item) if measure else 0)
+            yield item
+
+    def inline(self, text):
+        """Instrumented block_markdown.text_to_children."""
+        self.begin("tokenize")
+        text_nodes = list(iter_text_nodes(text))
+        self.end(len(text))
+        self.begin("convert")
+        children = text_nodes_to_html_nodes(text_nodes)
+        self.end()
+        return children
+
+    def page(self, name, render):
+        """Calls render() as phase "page", traced under the page's name."""
+        self.begin("page", name)
+        try:
+            return render()
+        finally:
+            self.pages.append((self.end(), name))
+
+    # --- rendering ---
+
+    def render(self, node, writer, minify=False, fragment_cache=None):
+        """
+        Renders node to writer like HTMLNode.render_to, charging the time and
+        bytes of every node to its (type, tag) and the writes to "write".
+        With a FragmentCache, node is rendered through it like in a build;
+        cached subtrees are not visited then, so the time and bytes of the
+        whole node go to ("FragmentCache", tag).
+        """
+        self.begin("render")
+        if fragment_cache is not None:
+            self._render_cached(node, writer, minify, fragment_cache)
+            self.end()
+            return
+        stack = [node]
+        while stack:
+            item = stack.pop()
+            start = time.perf_counter()
+            if isinstance(item, str):
+                chunk = item
+                key = None
+            elif isinstance(item, ParentNode):
+                key = ("ParentNode", item.tag)
+                if minify and item.tag in PREFORMATTED_TAGS:
+                    chunk = "".join(item.iter_html())
+                else:
+                    item._check_renderable()
+                    chunk = f"<{item.tag}{item.props_to_html(minify)}>"
+                    stack.append(f"</{item.tag}>")
+                    stack.extend(reversed(item.children))
+            else:
+                chunk = item.to_html(minify=minify)
+                key = (type(item).__name__, item.tag)
+            if key is not None:
+                stats = self.nodes.setdefault(key, [0, 0.0, 0])
+                stats[0] += 1
+                stats[1] += time.perf_counter() - start
+                stats[2] += len(chunk)
+            self.begin("write")
+            writer.write(chunk)
+            self.end(len(chunk))
+        self.end()
+
+    def _render_cached(self, node, writer, minify, fragment_cache):
+        stats = self.nodes.setdefault(("FragmentCache", node.tag), [0, 0.0, 0])
+        stats[0] += 1
+        chunks = fragment_cache.iter_html(node, minify=minify)
+        while True:
+            start = time.perf_counter()
+            chunk = next(chunks, None)
+            if chunk is None:
+                break
+            stats[1] += time.perf_counter() - start
+            stats[2] += len(chunk)
+            self.begin("write")
+            writer.write(chunk)
+            self.end(len(chunk))
+
+    # --- reports ---
+
+    def summary(self):
+        lines = [f"{'phase':<12}{'calls':>10}{'seconds':>11}{'MB':>10}"]
+        for name, (calls, seconds, nbytes) in sorted(self.phases.items(), key=lambda kv: -kv[1][1]):
+            if name == "page":
+                continue
+            lines.append(f"{name:<12}{calls:>10}{seconds:>11.4f}{nbytes / 2**20:>10.2f}")
+        lines.append("")
+        lines.append(f"{'node':<24}{'count':>10}{'seconds':>11}{'MB':>10}")
+        for (kind, tag), (count, seconds, nbytes) in sorted(self.nodes.items(), key=lambda kv: -kv[1][1]):
+            label = f"{kind} <{tag}>" if tag is not None else f"{kind} (text)"
+            lines.append(f"{label:<24}{count:>10}{seconds:>11.4f}{nbytes / 2**20:>10.2f}")
+        if self.pages:
+            lines.append("")
+            lines.append("slowest pages:")
+            for seconds, name in self.slowest(5):
+                lines.append(f"  {seconds:8.4f}s  {name}")
+        return "\n".join(lines)
+
+    def slowest(self, count):
+        return sorted(self.pages, reverse=True)[:count]
+
+    def write_trace(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+    def write_report(self, directory, rerender=None, slowest=0):
+        """
+        Writes summary.txt and trace.json to directory. With rerender (a
+        function taking a page name) and slowest > 0, the slowest pages are
+        rendered again under cProfile and dumped as <n>-<page>.prof.
+        """
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "summary.txt"), "w", encoding="utf-8") as f:
+            f.write(self.summary() + "\n")
+        self.write_trace(os.path.join(directory, "trace.json"))
+        if rerender is None:
+            return
+        for number, (_, name) in enumerate(self.slowest(slowest), 1):
+            profile = cProfile.Profile()
+            profile.runcall(rerender, name)
+            safe_name = name.replace(os.sep, "_")
+            profile.dump_stats(os.path.join(directory, f"{number}-{safe_name}.prof"))
@@ -0,0 +1,163 @@
+from types import MappingProxyType
+from weakref import WeakValueDictionary
+
+from htmlnode import EMPTY_PROPS, LeafNode, ParentNode
+from textnode import TextNode
+
+
+def _set_once(self, name, value):
+    # The inherited constructors assign every field once; anything after
+    # that would change a node that other trees may share.
+    try:
+        getattr(self, name)
+    except AttributeError:
+        if name == "children" and isinstance(value, list):
+            value = tuple(value)
+        object.__setattr__(self, name, value)
+        return
+    raise AttributeError(f"{type(self).__name__} is immutable")
+
+
+def _no_delete(self, name):
+    raise AttributeError(f"{type(self).__name__} is immutable")
+
+
+def _same(self, other):
+    # Two interned nodes are equal only if they are the same object; against
+    # any other node, the other operand's __eq__ (or identity) decides
+    if other.__class__ is self.__class__:
+        return self is other
+    return NotImplemented
+
+
+class FrozenLeafNode(LeafNode):
+    """
+    LeafNode that cannot be modified once constructed. Built through a
+    NodeInterner, equal leaves are the same object, so == between two of
+    them is identity.
+    """
+    __slots__ = ("__weakref__",)
+    __setattr__ = _set_once
+    __delattr__ = _no_delete
+    __eq__ = _same
+    __hash__ = object.__hash__
+
+
+class FrozenParentNode(ParentNode):
+    """Immutable ParentNode; its children are kept as a tuple."""
+    __slots__ = ("__weakref__",)
+    __setattr__ = _set_once
+    __delattr__ = _no_delete
+    __eq__ = _same
+    __hash__ = object.__hash__
+
+
+class FrozenTextNode(TextNode):
+    __slots__ = ("__weakref__",)
+    __setattr__ = _set_once
+    __delattr__ = _no_delete
+    __eq__ = _same
+    __hash__ = object.__hash__
+
+
+class NodeInterner():
+    """
+    Hash-consing factory for immutable nodes: asking for a node equal to one
+    that is still alive returns that node instead of a new one, so identical
+    leaves, props and subtrees are stored once and compared by identity.
+
+    Nodes are built with the normal LeafNode/ParentNode/TextNode constructors,
+    so the same validation errors are raised. Interned nodes are only held
+    weakly and disappear with the last tree using them; props dicts are kept
+    for the interner's lifetime, as read-only mappings. Nodes from different
+    interners are never merged, so one interner should be shared by every
+    tree that is compared or combined.
+    """
+
+    def __init__(self):
+        self._props = {}
+        self._leaves = WeakValueDictionary()
+        self._parents = WeakValueDictionary()
+        self._texts = WeakValueDictionary()
+        self.hits = 0
+        self.misses = 0
+
+    def props(self, props):
+        """Shared read-only copy of a props dict (None and {} are kept as is)."""
+        if props is None:
+            return None
+        if not props:
+            return EMPTY_PROPS
+        items = tuple(props.items())
+        try:
+            shared = self._props.get(items)
+        except TypeError:
+            # Unhashable value: cannot be shared, but still made read-only
+            return MappingProxyType(dict(props))
+        if shared is None:
+            shared = self._props[items] = MappingProxyType(dict(props))
+        return shared
+
+    def _lookup(self, table, key, build):
+        try:
+            node = table.get(key)
+        except TypeError:
+            self.misses += 1
+            return build()
+        if node is None:
+            self.misses += 1
+            node = table[key] = build()
+        else:
+            self.hits += 1
+        return node
+
+    def leaf(self, tag, value, props=None):
+        props = self.props(props)
+        return self._lookup(self._leaves, (tag, value, id(props), props is None),
+                            lambda: FrozenLeafNode(tag, value, props))
+
+    def parent(self, tag, children, props=None):
+        """children must themselves come from this interner."""
+        props = self.props(props)
+        children = list(children) if children is not None else children
+        key = (tag, tuple(map(id, children or ())), id(props), props is None)
+        return self._lookup(self._parents, key, lambda: FrozenParentNode(tag, children, props))
+
+    def text(self, text, text_type, url=None):
+        return self._lookup(self._texts, (text, text_type, url),
+                            lambda: FrozenTextNode(text, text_type, url))
+
+    def intern(self, node):
+        """
+        Interned copy of a tree of HTMLNodes or a TextNode, built bottom-up
+        with an explicit stack so deep trees are fine. Nodes already from
+        this interner are returned as they are.
+        """
+        if isinstance(node, TextNode):
+            return self.text(node.text, node.text_type, node.url)
+        done = {}
+        stack = [(node, False)]
+        while stack:
+            current, visited = stack.pop()
+            if id(current) in done:
+                continue
+            if isinstance(current, (FrozenLeafNode, FrozenParentNode)):
+                done[id(current)] = current
+            elif not isinstance(current, ParentNode):
+                done[id(current)] = self.leaf(current.tag, current.value, current.props)
+            elif not visited:
+                stack.append((current, True))
+                stack.extend((child, False) for child in current.children or ())
+            else:
+                children = [done[id(child)] for child in current.children]
+                done[id(current)] = self.parent(current.tag, children, current.props)
+        return done[id(node)]
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "leaves": len(self._leaves),
+            "parents": len(self._parents),
+            "props": len(self._props),
+        }
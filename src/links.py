@@ -0,0 +1,78 @@
+import posixpath
+from urllib.parse import unquote, urlsplit
+
+HOME_PAGE = "index.html"
+
+
+def to_site_path(url, page_path, site_url=None):
+    """
+    Output path ("blog/post.html") an internal link on page_path points to,
+    or None for links that leave the site (other schemes or hosts) and for
+    links to the page itself ("#top", "").
+    """
+    if site_url and url.startswith(site_url.rstrip("/") + "/"):
+        url = url[len(site_url.rstrip("/")):]
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc:
+        return None
+    path = unquote(parts.path)
+    if not path:
+        return None
+    if not path.startswith("/"):
+        path = posixpath.join(posixpath.dirname("/" + page_path), path)
+    resolved = posixpath.normpath(path).lstrip("/")
+    if path.endswith("/") or not resolved:
+        resolved = posixpath.join(resolved, HOME_PAGE)
+    return resolved
+
+
+class LinkReport():
+    def __init__(self):
+        # (rel_source, tag, url) of links to paths that are not in the site
+        self.broken = []
+        # Pages no other page links to (the home page is never one)
+        self.orphans = []
+        self.checked = 0
+
+    def summary(self):
+        return (f"links: {self.checked} internal checked, {len(self.broken)} broken, "
+                f"{len(self.orphans)} orphan pages")
+
+    def details(self):
+        lines = [f"broken {tag} in {rel_source}: {url}" for rel_source, tag, url in self.broken]
+        lines.extend(f"orphan page: {rel_source}" for rel_source in self.orphans)
+        return "\n".join(lines)
+
+
+def check_links(pages, files, links, site_url=None):
+    """
+    Resolves recorded links against the site in one pass of set lookups.
+    pages maps each content file to its output path ("/"-separated), files
+    are the other output paths links may point to (static files), and links
+    yields (rel_source, tag, url) as recorded by site_index.PageCollector.
+    Links are taken from the build records rather than from the rendered
+    HTML, so checking costs nothing like a crawl.
+    """
+    report = LinkReport()
+    targets = set(pages.values())
+    targets.update(files)
+    linked = set()
+    for rel_source, tag, url in links:
+        page_path = pages.get(rel_source)
+        if page_path is None:
+            continue
+        path = to_site_path(url, page_path, site_url)
+        if path is None:
+            continue
+        report.checked += 1
+        if path not in targets:
+            # "/blog" for blog/index.html
+            path = posixpath.join(path, HOME_PAGE)
+        if path in targets:
+            if path != page_path:
+                linked.add(path)
+        else:
+            report.broken.append((rel_source, tag, url))
+    report.orphans = sorted(rel_source for rel_source, path in pages.items()
+                            if path not in linked and path != HOME_PAGE)
+    return report
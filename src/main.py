@@ -1,25 +1,145 @@
 from textnode import TextNode, TextType
 from htmlnode import LeafNode, HTMLNode, ParentNode
 
-def text_node_to_html_node(text_node):
- 
-    if text_node.text_type == TextType.TEXT:
-        return LeafNode(tag=None, value=text_node.text)
-    elif text_node.text_type == TextType.BOLD:
-        return LeafNode(tag="b", value=text_node.text)
-    elif text_node.text_type == TextType.ITALIC:
-        # ITALIC tipi: "i" tag'i, value metni.
-        return LeafNode(tag="i", value=text_node.text)
-    elif text_node.text_type == TextType.CODE:
-        # CODE tipi: "code" tag'i, value metni.
-        return LeafNode(tag="code", value=text_node.text)
-    elif text_node.text_type == TextType.LINK:
-         if text_node.url is None:
-              raise ValueError("Link TextNode must have a url")
-         return LeafNode(tag="a", value=text_node.text, props={"href": text_node.url})
-    elif text_node.text_type == TextType.IMAGE:
-         if text_node.url is None or text_node.text is None:
-              raise ValueError("Image TextNode must have both url and text for alt attribute")
-         return LeafNode(tag="img", value="", props={"src": text_node.url, "alt": text_node.text})
-    else:
+# TextType -> (tag, url prop, alt prop, error raised when they are missing)
+# TEXT, BOLD, ITALIC and CODE only differ by tag; LINK and IMAGE move the
+# url (and for images the text) into props.
+TEXT_TYPE_TEMPLATES = {
+    TextType.TEXT: (None, None, None, None),
+    TextType.BOLD: ("b", None, None, None),
+    TextType.ITALIC: ("i", None, None, None),
+    TextType.CODE: ("code", None, None, None),
+    TextType.LINK: ("a", "href", None, "Link TextNode must have a url"),
+    TextType.IMAGE: ("img", "src", "alt", "Image TextNode must have both url and text for alt attribute"),
+}
+
+
+def _template_for(text_node):
+    template = TEXT_TYPE_TEMPLATES.get(text_node.text_type)
+    if template is None:
         raise ValueError(f"Unhandled text node type: {text_node.text_type}")
+    if template[1] is not None and (
+        text_node.url is None or (template[2] is not None and text_node.text is None)
+    ):
+        raise ValueError(template[3])
+    return template
+
+
+def _build_leaf(text_node, template, make_leaf=LeafNode):
+    tag, url_prop, alt_prop, _ = template
+    if url_prop is None:
+        return make_leaf(tag, text_node.text)
+    if alt_prop is None:
+        return make_leaf(tag, text_node.text, {url_prop: text_node.url})
+    return make_leaf(tag, "", {url_prop: text_node.url, alt_prop: text_node.text})
+
+
+def text_node_to_html_node(text_node, interner=None):
+    """With an interning.NodeInterner, returns a shared immutable leaf."""
+    make_leaf = LeafNode if interner is None else interner.leaf
+    return _build_leaf(text_node, _template_for(text_node), make_leaf)
+
+
+def text_nodes_to_html_nodes(text_nodes, interner=None):
+    """
+    Converts a whole sequence of TextNodes to LeafNodes in one pass.
+    Templates are looked up and validated for every node first, so a bad
+    link or image raises before any LeafNode is built.
+    """
+    make_leaf = LeafNode if interner is None else interner.leaf
+    text_nodes = list(text_nodes)
+    templates = [_template_for(text_node) for text_node in text_nodes]
+    return [_build_leaf(text_node, template, make_leaf)
+            for text_node, template in zip(text_nodes, templates)]
+
+
+def main(argv=None):
+    import argparse
+    import os
+    # Imported here: build imports the conversion functions above from this module
+    from build import build_site
+
+    parser = argparse.ArgumentParser(description="Build or serve the static site.")
+    parser.add_argument("command", nargs="?", choices=["build", "serve"], default="build",
+                        help="build into --dest (default) or serve from memory")
+    parser.add_argument("--content", default="content", help="directory with the markdown pages")
+    parser.add_argument("--template", default="template.html", help="page layout template")
+    parser.add_argument("--dest", default="public", help="output directory")
+    parser.add_argument("--static", default="static", help="directory of assets copied into --dest (served as they are by serve)")
+    parser.add_argument("--hardlink", action="store_true",
+                        help="hard-link static files into --dest instead of copying them")
+    parser.add_argument("--fingerprint", action="store_true",
+                        help="also publish static files under content-hashed names and link pages to those")
+    parser.add_argument("--force", action="store_true", help="rebuild every page")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="number of worker processes (0 = one per CPU)")
+    parser.add_argument("--fragment-cache", metavar="DIR",
+                        help="cache rendered subtrees in DIR across builds")
+    parser.add_argument("--tree-cache", metavar="DIR",
+                        help="cache parsed pages in DIR so unchanged sources are not parsed again")
+    parser.add_argument("--site-url", metavar="URL",
+                        help="also write sitemap.xml, feed.xml and search/ with URLs under URL")
+    parser.add_argument("--minify", action="store_true",
+                        help="collapse whitespace and drop comments and optional quotes in the output")
+    parser.add_argument("--check-links", action="store_true",
+                        help="report broken internal links and pages nothing links to")
+    parser.add_argument("--memory-budget", type=int, metavar="MB",
+                        help="keep each build process under about MB MiB of memory")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="instrument the build (runs in one process) and write the report to DIR")
+    parser.add_argument("--profile-slowest", type=int, default=3, metavar="N",
+                        help="with --profile, cProfile the N slowest pages")
+    parser.add_argument("--watch", action="store_true",
+                        help="with serve, re-render pages when content or template change")
+    parser.add_argument("--host", default="127.0.0.1", help="with serve, address to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="with serve, port to listen on")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        from server import serve
+        serve(args.content, args.template, args.host, args.port, watch_files=args.watch,
+              static_dir=args.static if os.path.isdir(args.static) else None)
+        return
+
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+    profiler = None
+    if args.profile:
+        from instrument import Profiler
+        profiler = Profiler()
+    result = build_site(args.content, args.template, args.dest, force=args.force, jobs=jobs,
+                        fragment_cache_dir=args.fragment_cache, profiler=profiler,
+                        static_dir=args.static if os.path.isdir(args.static) else None,
+                        hardlink=args.hardlink, tree_cache_dir=args.tree_cache,
+                        site_url=args.site_url,
+                        memory_budget=args.memory_budget * 2**20 if args.memory_budget else None,
+                        check_links=args.check_links, minify=args.minify, fingerprint=args.fingerprint)
+    print(result.summary())
+    if result.static_stats is not None:
+        print(result.static_stats.summary())
+    if result.asset_stats is not None:
+        print(result.asset_stats.summary())
+    if profiler is not None:
+        from build import discard_page
+        from template import load_template
+        template = load_template(args.template, args.minify)
+        profiler.write_report(
+            args.profile,
+            rerender=lambda source_path: discard_page(source_path, template),
+            slowest=args.profile_slowest,
+        )
+        print(profiler.summary())
+        print(f"profile written to {args.profile}")
+    if result.fragment_stats is not None:
+        print(result.fragment_report())
+    if result.pooled:
+        print(result.worker_report())
+    if result.link_report is not None:
+        print(result.link_report.summary())
+        if result.link_report.broken or result.link_report.orphans:
+            print(result.link_report.details())
+    if result.peak_rss is not None:
+        print(result.memory_report())
+
+
+if __name__ == "__main__":
+    main()
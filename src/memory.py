@@ -0,0 +1,67 @@
+import gc
+import os
+import sys
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows: peak RSS is then not reported
+    resource = None
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None where unknown."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def peak_rss(children=False):
+    """
+    Peak resident set size in bytes of this process, or with children of
+    the largest of its terminated child processes (build workers). None
+    where unknown.
+    """
+    if resource is None:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def format_size(size):
+    return f"{size / 2**20:.1f} MiB"
+
+
+class MemoryBudget():
+    """
+    Soft limit on the resident memory of one build process. check() is
+    called between pages: when the process is over limit, the drop()
+    callbacks release whatever caches they hold and the garbage collector
+    runs, before the next page is started.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.relieved = 0
+        self._drops = []
+
+    def on_pressure(self, drop):
+        self._drops.append(drop)
+
+    def over(self):
+        rss = current_rss()
+        return rss is not None and rss > self.limit
+
+    def check(self):
+        if not self.over():
+            return False
+        for drop in self._drops:
+            drop()
+        gc.collect()
+        self.relieved += 1
+        return True
@@ -0,0 +1,170 @@
+from array import array
+
+from htmlnode import LeafNode, ParentNode, escape_text, props_to_html
+
+# Index 0 in the tag and props tables always means "no tag" / "no props".
+NO_INDEX = 0
+
+
+class NodeArena():
+    """
+    Flat storage for large HTML trees. Instead of one Python object per node,
+    every node is a row in a handful of parallel arrays:
+
+        kinds[i]       0 for a leaf, 1 for a parent
+        tags[i]        index into the interned tag table
+        values[i]      the leaf text (None for parents)
+        props[i]       index into the interned props table
+        child_start[i] / child_count[i]
+                       slice of the shared `child_ids` array
+
+    Tags and props dicts are interned, so the thousands of identical
+    {"href": ...}-less nodes on a page share a single table entry.
+    """
+
+    LEAF = 0
+    PARENT = 1
+
+    def __init__(self):
+        self.kinds = array("b")
+        self.tags = array("i")
+        self.values = []
+        self.props = array("i")
+        self.child_start = array("i")
+        self.child_count = array("i")
+        self.child_ids = array("i")
+        self._tag_table = [None]
+        self._tag_index = {None: NO_INDEX}
+        self._props_table = [None]
+        self._props_index = {}
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def _intern_tag(self, tag):
+        index = self._tag_index.get(tag)
+        if index is None:
+            index = len(self._tag_table)
+            self._tag_table.append(tag)
+            self._tag_index[tag] = index
+        return index
+
+    def _intern_props(self, props):
+        if not props:
+            return NO_INDEX
+        key = tuple(props.items())
+        try:
+            index = self._props_index.get(key)
+        except TypeError:
+            # Unhashable value: the dict gets a table entry of its own
+            self._props_table.append(dict(props))
+            return len(self._props_table) - 1
+        if index is None:
+            index = len(self._props_table)
+            self._props_table.append(dict(props))
+            self._props_index[key] = index
+        return index
+
+    def _append(self, kind, tag, value, props, start, count):
+        self.kinds.append(kind)
+        self.tags.append(self._intern_tag(tag))
+        self.values.append(value)
+        self.props.append(self._intern_props(props))
+        self.child_start.append(start)
+        self.child_count.append(count)
+        return len(self.kinds) - 1
+
+    def add_leaf(self, tag, value, props=None):
+        if value is None:
+            raise ValueError("LeafNode requires a value")
+        return self._append(self.LEAF, tag, value, props, 0, 0)
+
+    def add_parent(self, tag, children, props=None):
+        if tag is None or tag == "":
+            raise ValueError("ParentNode requires a tag")
+        if children is None or not isinstance(children, list) or len(children) == 0:
+            raise ValueError("ParentNode requires a non-empty list of children")
+        start = len(self.child_ids)
+        self.child_ids.extend(children)
+        return self._append(self.PARENT, tag, None, props, start, len(children))
+
+    def add_node(self, node):
+        """
+        Copies an existing LeafNode/ParentNode tree into the arena and returns
+        the index of its root. Children are stored before their parent.
+        """
+        # Post-order walk with an explicit stack, same as HTMLNode.iter_html
+        stack = [(node, False)]
+        ids = []
+        while stack:
+            current, visited = stack.pop()
+            if isinstance(current, ParentNode) and not visited:
+                stack.append((current, True))
+                for child in reversed(current.children):
+                    stack.append((child, False))
+            elif isinstance(current, ParentNode):
+                count = len(current.children)
+                children = ids[-count:]
+                del ids[-count:]
+                ids.append(self.add_parent(current.tag, children, current.props))
+            else:
+                ids.append(self.add_leaf(current.tag, current.value, current.props))
+        return ids[0]
+
+    def tag(self, index):
+        return self._tag_table[self.tags[index]]
+
+    def node_props(self, index):
+        return self._props_table[self.props[index]]
+
+    def children(self, index):
+        start = self.child_start[index]
+        return self.child_ids[start:start + self.child_count[index]].tolist()
+
+    def node(self, index):
+        """
+        Materializes the row at index (and its subtree) back into regular
+        LeafNode/ParentNode objects.
+        """
+        built = {}
+        stack = [(index, False)]
+        while stack:
+            current, visited = stack.pop()
+            if self.kinds[current] == self.PARENT and not visited:
+                stack.append((current, True))
+                stack.extend((child, False) for child in self.children(current))
+            elif self.kinds[current] == self.PARENT:
+                children = [built.pop(child) for child in self.children(current)]
+                built[current] = ParentNode(self.tag(current), children, self._copy_props(current))
+            else:
+                built[current] = LeafNode(self.tag(current), self.values[current], self._copy_props(current))
+        return built[index]
+
+    def _copy_props(self, index):
+        props = self.node_props(index)
+        return None if props is None else dict(props)
+
+    def iter_html(self, index):
+        """
+        Yields the HTML for the subtree rooted at index straight from the
+        arrays, without materializing any node objects.
+        """
+        stack = [index]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                yield item
+                continue
+            tag = self.tag(item)
+            attributes = props_to_html(self.node_props(item))
+            if self.kinds[item] == self.PARENT:
+                yield f"<{tag}{attributes}>"
+                stack.append(f"</{tag}>")
+                stack.extend(reversed(self.children(item)))
+            elif tag is None:
+                yield escape_text(self.values[item])
+            else:
+                yield f"<{tag}{attributes}>{escape_text(self.values[item])}</{tag}>"
+
+    def to_html(self, index):
+        return "".join(self.iter_html(index))
@@ -0,0 +1,304 @@
+import io
+import struct
+import sys
+from array import array
+
+from htmlnode import LeafNode, ParentNode
+from textnode import TextNode, TextType
+
+# File layout (all integers little-endian u32 unless noted):
+#
+#   MAGIC, FORMAT_VERSION (u8)
+#   block records, one per top-level node:
+#       int count, blob byte length, int width (u8), ints[int count], utf-8 blob
+#   string table: count, then (byte length, utf-8 bytes) per entry
+#   offset table: one offset per block record
+#   footer: string table offset (u64), block count
+#
+# The string table and offsets come last so blocks can be written as they
+# are produced. A reader loads the footer and tables up front and decodes a
+# block only when it is asked for.
+#
+# Inside a block, nodes are written in pre-order as runs of ints:
+#   leaf:      LEAF, tag, value length, props
+#   parent:    PARENT, tag, child count, props
+#   text node: TEXT, text type, text length + 1, url length + 1   (0 = None)
+# props is 0 for None, otherwise the number of pairs + 1, followed by
+# (key, value length) per pair. Tags, prop keys and TextType values are
+# indexes into the string table (0 = None); all other text is read in order
+# from the block's blob. The ints of a block are stored 1, 2 or 4 bytes wide,
+# whichever fits its largest one; in most blocks every int fits in a byte.
+MAGIC = b"SSNT"
+# Bump on any layout change: older files are then rejected and rebuilt
+FORMAT_VERSION = 2
+
+LEAF = 0
+PARENT = 1
+TEXT = 2
+
+_U32 = struct.Struct("<I")
+_RECORD_HEADER = struct.Struct("<IIB")
+# Array typecode for each int width, smallest first
+_WIDTHS = ((1, "B", 0xff), (2, "H", 0xffff), (4, "I", 0xffffffff))
+_TYPECODES = {width: typecode for width, typecode, _ in _WIDTHS}
+_FOOTER = struct.Struct("<QI")
+_TEXT_TYPES = {text_type.value: text_type for text_type in TextType}
+# What decoding a damaged file can raise
+DECODE_ERRORS = (ValueError, struct.error, IndexError, KeyError)
+
+
+class NodeEncoder():
+    """
+    Writes top-level nodes (HTMLNode trees or TextNodes) to a binary stream
+    one at a time with add(), then the tables with close().
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self._strings = [None]
+        self._string_index = {None: 0}
+        self._offsets = []
+        self._position = len(MAGIC) + 1
+        f.write(MAGIC)
+        f.write(bytes([FORMAT_VERSION]))
+
+    def _intern(self, value):
+        index = self._string_index.get(value)
+        if index is None:
+            index = len(self._strings)
+            self._strings.append(value)
+            self._string_index[value] = index
+        return index
+
+    def _props(self, ints, texts, props):
+        if props is None:
+            ints.append(0)
+            return
+        ints.append(len(props) + 1)
+        for key, value in props.items():
+            value = str(value)
+            ints.append(self._intern(key))
+            ints.append(len(value))
+            texts.append(value)
+
+    def add(self, node):
+        ints = array("I")
+        texts = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if isinstance(current, TextNode):
+                ints.extend((TEXT, self._intern(current.text_type.value),
+                             0 if current.text is None else len(current.text) + 1,
+                             0 if current.url is None else len(current.url) + 1))
+                if current.text is not None:
+                    texts.append(current.text)
+                if current.url is not None:
+                    texts.append(current.url)
+            elif isinstance(current, ParentNode):
+                ints.extend((PARENT, self._intern(current.tag), len(current.children)))
+                self._props(ints, texts, current.props)
+                stack.extend(reversed(current.children))
+            else:
+                value = str(current.value)
+                ints.extend((LEAF, self._intern(current.tag), len(value)))
+                texts.append(value)
+                self._props(ints, texts, current.props)
+        largest = max(ints)
+        for width, typecode, limit in _WIDTHS:
+            if largest <= limit:
+                break
+        if width < 4:
+            ints = array(typecode, ints)
+        if sys.byteorder != "little":
+            ints.byteswap()
+        blob = "".join(texts).encode("utf-8")
+        self._offsets.append(self._position)
+        self.f.write(_RECORD_HEADER.pack(len(ints), len(blob), width))
+        self.f.write(ints.tobytes())
+        self.f.write(blob)
+        self._position += _RECORD_HEADER.size + width * len(ints) + len(blob)
+
+    def close(self):
+        table_offset = self._position
+        self.f.write(_U32.pack(len(self._strings) - 1))
+        for value in self._strings[1:]:
+            data = value.encode("utf-8")
+            self.f.write(_U32.pack(len(data)))
+            self.f.write(data)
+        offsets = array("I", self._offsets)
+        if sys.byteorder != "little":
+            offsets.byteswap()
+        self.f.write(offsets.tobytes())
+        self.f.write(_FOOTER.pack(table_offset, len(self._offsets)))
+
+
+class LazyDocument():
+    """
+    Read side of the format. Only the footer, string table and offsets are
+    decoded up front; document[i] and iteration decode one top-level node
+    at a time, so one block can be read without decoding the others.
+    """
+
+    def __init__(self, data):
+        self.data = memoryview(data)
+        if bytes(self.data[:len(MAGIC)]) != MAGIC or len(data) < len(MAGIC) + 1 + _FOOTER.size:
+            raise ValueError("Not a node cache file")
+        version = self.data[len(MAGIC)]
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported node cache format version: {version}")
+        footer = len(data) - _FOOTER.size
+        table_offset, count = _FOOTER.unpack_from(self.data, footer)
+        if not len(MAGIC) + 1 <= table_offset <= footer - 4:
+            raise ValueError("Corrupt node cache file: bad string table offset")
+        pos = table_offset
+        (string_count,) = _U32.unpack_from(self.data, pos)
+        pos += 4
+        strings = [None]
+        for _ in range(string_count):
+            if pos + 4 > footer:
+                raise ValueError("Corrupt node cache file: truncated string table")
+            (length,) = _U32.unpack_from(self.data, pos)
+            pos += 4
+            if pos + length > footer:
+                raise ValueError("Corrupt node cache file: truncated string table")
+            strings.append(str(self.data[pos:pos + length], "utf-8"))
+            pos += length
+        if pos + 4 * count != footer:
+            raise ValueError("Corrupt node cache file: bad offset table")
+        self._strings = strings
+        self._table_offset = table_offset
+        self._offsets = array("I")
+        self._offsets.frombytes(self.data[pos:pos + 4 * count])
+        if sys.byteorder != "little":
+            self._offsets.byteswap()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __iter__(self):
+        for index in range(len(self._offsets)):
+            yield self[index]
+
+    def __getitem__(self, index):
+        offset = self._offsets[index]
+        if offset + _RECORD_HEADER.size > self._table_offset:
+            raise ValueError(f"Corrupt node cache record {index}: bad offset")
+        int_count, blob_length, width = _RECORD_HEADER.unpack_from(self.data, offset)
+        start = offset + _RECORD_HEADER.size
+        typecode = _TYPECODES.get(width)
+        if typecode is None:
+            raise ValueError(f"Corrupt node cache record: int width {width}")
+        if start + width * int_count + blob_length > self._table_offset:
+            raise ValueError(f"Corrupt node cache record {index}: lengths past its end")
+        ints = array(typecode)
+        ints.frombytes(self.data[start:start + width * int_count])
+        if sys.byteorder != "little":
+            ints.byteswap()
+        blob_start = start + width * int_count
+        text = str(self.data[blob_start:blob_start + blob_length], "utf-8")
+        return _decode(ints.tolist(), text, self._strings)
+
+
+def _decode_props(ints, i, text, t, strings):
+    count = ints[i]
+    i += 1
+    if count == 0:
+        return None, i, t
+    props = {}
+    for _ in range(count - 1):
+        length = ints[i + 1]
+        props[strings[ints[i]]] = text[t:t + length]
+        t += length
+        i += 2
+    return props, i, t
+
+
+def _decode(ints, text, strings):
+    i = 0
+    t = 0
+    # Parents still collecting children: [tag, props, children, expected]
+    open_parents = []
+    while True:
+        kind = ints[i]
+        if kind == LEAF:
+            tag = strings[ints[i + 1]]
+            length = ints[i + 2]
+            value = text[t:t + length]
+            t += length
+            if ints[i + 3]:
+                props, i, t = _decode_props(ints, i + 3, text, t, strings)
+            else:
+                props = None
+                i += 4
+            node = LeafNode(tag, value, props)
+        elif kind == PARENT:
+            tag = strings[ints[i + 1]]
+            expected = ints[i + 2]
+            if ints[i + 3]:
+                props, i, t = _decode_props(ints, i + 3, text, t, strings)
+            else:
+                props = None
+                i += 4
+            if expected:
+                open_parents.append([tag, props, [], expected])
+                continue
+            node = ParentNode(tag, [], props)
+        elif kind == TEXT:
+            text_type = _TEXT_TYPES[strings[ints[i + 1]]]
+            node_text = None
+            url = None
+            if ints[i + 2]:
+                node_text = text[t:t + ints[i + 2] - 1]
+                t += ints[i + 2] - 1
+            if ints[i + 3]:
+                url = text[t:t + ints[i + 3] - 1]
+                t += ints[i + 3] - 1
+            i += 4
+            node = TextNode(node_text, text_type, url)
+        else:
+            raise ValueError(f"Corrupt node cache record: unknown kind {kind}")
+        # Close every parent this node completes
+        while open_parents:
+            parent = open_parents[-1]
+            parent[2].append(node)
+            if len(parent[2]) < parent[3]:
+                break
+            open_parents.pop()
+            node = ParentNode(parent[0], parent[2], parent[1])
+        if not open_parents:
+            return node
+
+
+def dump(nodes, f):
+    """Write an iterable of top-level nodes to the binary file object f"""
+    encoder = NodeEncoder(f)
+    for node in nodes:
+        encoder.add(node)
+    encoder.close()
+
+
+def dumps(nodes):
+    buffer = io.BytesIO()
+    dump(nodes, buffer)
+    return buffer.getvalue()
+
+
+def loads(data):
+    """Decode every top-level node in data eagerly"""
+    return list(LazyDocument(data))
+
+
+def load_file(path):
+    """
+    Open a cached document lazily. Returns None when the file is missing,
+    damaged or was written by another format version, so callers fall back
+    to parsing. Blocks are only checked as they are decoded: decoding one
+    of a damaged file raises one of DECODE_ERRORS.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        return LazyDocument(data)
+    except (OSError,) + DECODE_ERRORS:
+        return None
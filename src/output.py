@@ -0,0 +1,208 @@
+import os
+import shutil
+import stat
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+COPY_CHUNK_SIZE = 1 << 24
+
+
+def _default_mode():
+    # The umask can only be read by setting it; done once, before any thread
+    # of ours could be creating files
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+# Mode of files written by atomic_open, as open() would have created them.
+# mkstemp creates 0600 files, which a web server running as another user
+# could not read.
+FILE_MODE = _default_mode()
+
+
+@contextmanager
+def atomic_open(path, mode=FILE_MODE):
+    """
+    Binary file for writing path atomically: data goes to a temporary file in
+    the same directory, which replaces path only if the block finishes
+    without an exception. Readers never see a half-written file. The file
+    gets permission bits mode (by default those of a newly created file).
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        os.fchmod(fd, mode)
+        with os.fdopen(fd, "wb") as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def atomic_write(path, data):
+    with atomic_open(path) as f:
+        f.write(data)
+
+
+def _copy_range(src, dst, size):
+    copied = 0
+    while copied < size:
+        n = os.copy_file_range(src, dst, min(COPY_CHUNK_SIZE, size - copied))
+        if n == 0:
+            break
+        copied += n
+    return copied
+
+
+def _send_range(src, dst, size):
+    copied = 0
+    while copied < size:
+        n = os.sendfile(dst, src, copied, min(COPY_CHUNK_SIZE, size - copied))
+        if n == 0:
+            break
+        copied += n
+    return copied
+
+
+# Kernel copy paths in order of preference, where the platform has them
+_KERNEL_COPIES = tuple(
+    copy for name, copy in (("copy_file_range", _copy_range), ("sendfile", _send_range))
+    if hasattr(os, name)
+)
+
+
+def copy_file(source_path, dest_path):
+    """
+    Copies a file atomically through the kernel: copy_file_range (which can
+    reflink or copy server-side), then sendfile, and a read/write loop only
+    where neither works. The copy gets the permission bits of the source.
+    """
+    st = os.stat(source_path)
+    size = st.st_size
+    with open(source_path, "rb") as src, atomic_open(dest_path, stat.S_IMODE(st.st_mode)) as dst:
+        for copy in _KERNEL_COPIES:
+            try:
+                if copy(src.fileno(), dst.fileno(), size) == size:
+                    return
+            except OSError:
+                pass
+            # Start over with the next method
+            src.seek(0)
+            dst.seek(0)
+            dst.truncate()
+        shutil.copyfileobj(src, dst)
+
+
+class CopyStats():
+    def __init__(self):
+        self.copied = 0
+        self.linked = 0
+        self.skipped = 0
+
+    def summary(self):
+        return f"static: {self.copied} copied, {self.linked} linked, {self.skipped} unchanged"
+
+
+def copy_tree(source_dir, dest_dir, hardlink=False):
+    """
+    Mirrors the files under source_dir into dest_dir. A file whose size and
+    mtime already match its copy is skipped (copies keep the source mtime,
+    so unchanged assets cost one stat per build). With hardlink, files are
+    linked instead of copied where the filesystem allows it.
+    Files in dest_dir that are not in source_dir are left alone, since
+    dest_dir also holds the rendered pages.
+    """
+    stats = CopyStats()
+    for root, dirs, files in os.walk(source_dir):
+        dirs.sort()
+        target_root = os.path.join(dest_dir, os.path.relpath(root, source_dir))
+        os.makedirs(target_root, exist_ok=True)
+        for name in sorted(files):
+            source_path = os.path.join(root, name)
+            dest_path = os.path.join(target_root, name)
+            st = os.stat(source_path)
+            try:
+                dest_st = os.stat(dest_path)
+            except FileNotFoundError:
+                dest_st = None
+            if dest_st is not None and (
+                os.path.samestat(st, dest_st)
+                or (dest_st.st_size == st.st_size and dest_st.st_mtime_ns == st.st_mtime_ns)
+            ):
+                stats.skipped += 1
+                continue
+            if hardlink and link_file(source_path, dest_path):
+                stats.linked += 1
+                continue
+            copy_file(source_path, dest_path)
+            os.utime(dest_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+            stats.copied += 1
+    return stats
+
+
+def link_file(source_path, dest_path):
+    """
+    Hard-links source_path to dest_path, replacing dest_path atomically.
+    Returns False where the filesystem cannot link (across devices, or no
+    hard links at all), so the caller can copy instead.
+    """
+    directory = os.path.dirname(dest_path)
+    tmp_path = os.path.join(directory, f".{os.path.basename(dest_path)}.{os.getpid()}.link")
+    try:
+        os.link(source_path, tmp_path)
+    except OSError:
+        return False
+    os.replace(tmp_path, dest_path)
+    return True
+
+
+class OutputWriter():
+    """
+    Writes files atomically on a bounded thread pool, so rendering the next
+    page overlaps with writing the previous one. submit() blocks once
+    max_pending writes are queued, which bounds the memory held by rendered
+    pages waiting for the disk. close() waits for all writes and re-raises
+    the first error.
+    """
+
+    def __init__(self, max_workers=4, max_pending=64):
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="output")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._futures = []
+        self.written = 0
+        self.bytes_written = 0
+
+    def submit(self, path, data):
+        self._slots.acquire()
+        try:
+            future = self._pool.submit(atomic_write, path, data)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        self._futures.append(future)
+        self.written += 1
+        self.bytes_written += len(data)
+        # Drop finished futures so a long build does not keep them all
+        if len(self._futures) >= 1024:
+            self._futures = [f for f in self._futures if not f.done() or f.exception()]
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        for future in self._futures:
+            future.result()
+        self._futures = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
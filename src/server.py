@@ -0,0 +1,357 @@
+import ctypes
+import ctypes.util
+import io
+import mimetypes
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+from block_markdown import iter_file_blocks, text_to_children
+from build import CONTENT_EXTENSION, HashingWriter, find_pages, output_path, page_title, write_page
+from interning import NodeInterner
+from template import load_template
+
+POLL_INTERVAL = 0.05
+# After the first change, wait this long for the rest of an editor's save
+# (write + rename + chmod) so the page is rebuilt once
+DEBOUNCE = 0.01
+
+
+class PollingWatcher():
+    """Finds changed files under root by comparing (mtime, size) snapshots."""
+
+    def __init__(self, root, interval=POLL_INTERVAL):
+        self.root = root
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for root, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                snapshot[os.path.relpath(path, self.root)] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def wait(self, timeout):
+        """Relative paths that were created, changed or deleted, after at most timeout seconds."""
+        deadline = time.monotonic() + timeout
+        while True:
+            snapshot = self._scan()
+            changed = {path for path in snapshot.keys() | self._snapshot.keys()
+                       if snapshot.get(path) != self._snapshot.get(path)}
+            self._snapshot = snapshot
+            remaining = deadline - time.monotonic()
+            if changed or remaining <= 0:
+                return changed
+            time.sleep(min(self.interval, remaining))
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher():
+    """
+    Linux inotify watcher for root and all directories below it. wait()
+    returns the same as PollingWatcher.wait, or None when the kernel queue
+    overflowed and the caller has to rescan.
+    """
+
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_Q_OVERFLOW = 0x4000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self, root):
+        self.root = root
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs = {}
+        self._add_tree(root)
+
+    def _add_tree(self, path):
+        """Watches path and its subdirectories; returns the files found in them."""
+        files = []
+        for root, dirs, names in os.walk(path):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(root), self.MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {root}")
+            self._dirs[wd] = root
+            files.extend(os.path.relpath(os.path.join(root, name), self.root) for name in names)
+        return files
+
+    def _read_events(self, changed):
+        try:
+            data = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return True
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & self.IN_Q_OVERFLOW:
+                return False
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO) and os.path.isdir(path):
+                    changed.update(self._add_tree(path))
+                continue
+            changed.add(os.path.relpath(path, self.root))
+        return True
+
+    def wait(self, timeout):
+        changed = set()
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return changed
+        while ready:
+            if not self._read_events(changed):
+                return None
+            ready, _, _ = select.select([self._fd], [], [], DEBOUNCE)
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+def make_watcher(root):
+    """inotify where the platform has it, polling otherwise."""
+    try:
+        return InotifyWatcher(root)
+    except (OSError, AttributeError, TypeError):
+        return PollingWatcher(root)
+
+
+class DevSite():
+    """
+    In-memory site for the dev server. The parsed block trees of every page
+    stay resident, so a content change re-parses only that file and a
+    template change re-renders every page without parsing anything.
+    With an interning.NodeInterner the trees are built from shared immutable
+    nodes, so content repeated across pages is held in memory once.
+
+    A file that cannot be read or parsed (an editor's half-written save, a
+    file deleted while it is read) keeps its last good rendering; the error
+    is kept in errors, by path, until the file is fixed, and passed to
+    on_error(path, error).
+    """
+
+    def __init__(self, content_dir, template_path, interner=None, on_error=None):
+        self.content_dir = content_dir
+        self.template_path = template_path
+        self.interner = interner
+        self.on_error = on_error
+        self.trees = {}
+        self.pages = {}
+        self.errors = {}
+        self.parse_count = 0
+        self._lock = threading.Lock()
+        self._template_mtime = None
+        self._load_template()
+        for rel_source in find_pages(content_dir):
+            self._refresh(rel_source)
+
+    def _load_template(self):
+        self._template_mtime = os.stat(self.template_path).st_mtime_ns
+        self.template = load_template(self.template_path)
+
+    def _parse(self, rel_source):
+        path = os.path.join(self.content_dir, rel_source)
+        interner = self.interner
+        if interner is None:
+            self.trees[rel_source] = list(iter_file_blocks(path))
+        else:
+            blocks = iter_file_blocks(path, lambda text: text_to_children(text, interner))
+            self.trees[rel_source] = [interner.intern(block) for block in blocks]
+        self.parse_count += 1
+
+    def _render(self, rel_source):
+        buffer = io.BytesIO()
+        write_page(HashingWriter(buffer), self.trees[rel_source], self.template, page_title(rel_source))
+        with self._lock:
+            self.pages[output_path(rel_source).replace(os.sep, "/")] = buffer.getvalue()
+
+    def _failed(self, path, error):
+        self.errors[path] = f"{type(error).__name__}: {error}"
+        if self.on_error is not None:
+            self.on_error(path, error)
+
+    def _refresh(self, rel_source):
+        """Parses and renders one page; False (and the old page kept) on errors."""
+        try:
+            self._parse(rel_source)
+            self._render(rel_source)
+        except Exception as error:
+            self._failed(rel_source, error)
+            return False
+        self.errors.pop(rel_source, None)
+        return True
+
+    def _drop(self, rel_source):
+        self.errors.pop(rel_source, None)
+        self.trees.pop(rel_source, None)
+        with self._lock:
+            self.pages.pop(output_path(rel_source).replace(os.sep, "/"), None)
+
+    def template_changed(self):
+        try:
+            return os.stat(self.template_path).st_mtime_ns != self._template_mtime
+        except FileNotFoundError:
+            return False
+
+    def update(self, changed):
+        """
+        Applies a set of changed paths relative to content_dir (None: rescan
+        everything) and returns the content files that were re-rendered.
+        """
+        if changed is None:
+            changed = set(find_pages(self.content_dir)) | set(self.trees)
+        rendered = []
+        for rel_source in sorted(changed):
+            if not rel_source.endswith(CONTENT_EXTENSION):
+                continue
+            if os.path.exists(os.path.join(self.content_dir, rel_source)):
+                if self._refresh(rel_source):
+                    rendered.append(rel_source)
+            else:
+                self._drop(rel_source)
+        if self.template_changed():
+            try:
+                # The new mtime is taken first, so a broken template is not
+                # loaded again until it is saved again
+                self._load_template()
+            except Exception as error:
+                self._failed(self.template_path, error)
+                return rendered
+            self.errors.pop(self.template_path, None)
+            for rel_source in sorted(self.trees):
+                self._render(rel_source)
+            rendered = sorted(self.trees)
+        return rendered
+
+    def lookup(self, url_path):
+        """Rendered page for a (percent-encoded) URL path: /, /dir/, /page and /page.html."""
+        path = unquote(url_path.split("?", 1)[0].split("#", 1)[0]).lstrip("/")
+        if path == "" or path.endswith("/"):
+            candidates = [path + "index.html"]
+        elif path.endswith(".html"):
+            candidates = [path]
+        else:
+            candidates = [path + ".html", path + "/index.html"]
+        with self._lock:
+            for candidate in candidates:
+                page = self.pages.get(candidate)
+                if page is not None:
+                    return page
+        return None
+
+
+def static_file(static_dir, url_path):
+    """
+    Path of the file under static_dir a URL path asks for, or None. Paths
+    leading outside static_dir ("/../x") are never resolved.
+    """
+    path = unquote(url_path.split("?", 1)[0].split("#", 1)[0])
+    parts = [part for part in path.split("/") if part not in ("", ".")]
+    if not parts or ".." in parts or any(os.sep in part or (os.altsep and os.altsep in part) for part in parts):
+        return None
+    candidate = os.path.join(static_dir, *parts)
+    return candidate if os.path.isfile(candidate) else None
+
+
+def make_handler(site, static_dir=None):
+    """Handler serving site's pages and, for other paths, the files under static_dir."""
+    class DevRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            page = site.lookup(self.path)
+            content_type = "text/html; charset=utf-8"
+            if page is None and static_dir is not None:
+                path = static_file(static_dir, self.path)
+                if path is not None:
+                    try:
+                        with open(path, "rb") as f:
+                            page = f.read()
+                    except OSError:
+                        page = None
+                    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            if page is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(page)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(page)
+
+        def log_message(self, format, *args):
+            pass
+
+    return DevRequestHandler
+
+
+def watch(site, watcher, stop, on_update=None):
+    """Applies watcher changes to site until the stop event is set."""
+    while not stop.is_set():
+        changed = watcher.wait(POLL_INTERVAL)
+        if changed is None or changed or site.template_changed():
+            start = time.perf_counter()
+            rendered = site.update(changed)
+            if on_update is not None and rendered:
+                on_update(rendered, time.perf_counter() - start)
+
+
+def serve(content_dir, template_path, host="127.0.0.1", port=8000, watch_files=False, static_dir=None):
+    """
+    Serves the site from memory on host:port until interrupted, along with
+    the files under static_dir (read from disk, so edits show up at once).
+    """
+    def report_error(path, error):
+        print(f"error in {path}: {type(error).__name__}: {error}", file=sys.stderr)
+
+    site = DevSite(content_dir, template_path, NodeInterner(), report_error)
+    server = ThreadingHTTPServer((host, port), make_handler(site, static_dir))
+    stop = threading.Event()
+    watcher = None
+    if watch_files:
+        watcher = make_watcher(content_dir)
+
+        def report(rendered, seconds):
+            print(f"re-rendered {len(rendered)} page(s) in {seconds * 1000:.1f} ms: {', '.join(rendered)}")
+
+        threading.Thread(target=watch, args=(site, watcher, stop, report), daemon=True).start()
+    print(f"serving {len(site.pages)} pages on http://{host}:{server.server_address[1]}/"
+          + (f" (watching {content_dir} with {type(watcher).__name__})" if watcher else ""))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        if watcher is not None:
+            watcher.close()
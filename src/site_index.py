@@ -0,0 +1,286 @@
+import heapq
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from html import escape
+from itertools import groupby
+
+from htmlnode import ParentNode
+from output import atomic_open
+
+SITEMAP_NAME = "sitemap.xml"
+FEED_NAME = "feed.xml"
+SEARCH_DIR = "search"
+SEARCH_INDEX_VERSION = 1
+# Bump when the SiteStore tables change
+STORE_VERSION = 1
+# Terms are sharded by their first characters; a browser looking up "node"
+# only fetches search/no.json
+SHARD_PREFIX_LENGTH = 2
+MIN_TERM_LENGTH = 2
+SUMMARY_LENGTH = 200
+FEED_ITEMS = 20
+
+_TERM = re.compile(r"\w+")
+
+
+def node_text(node, links=None):
+    """
+    Text of every leaf below node (image alt texts included), in order.
+    With a links list, [tag, url] of every a href and img src below node is
+    appended to it in the same walk.
+    """
+    parts = []
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, ParentNode):
+            stack.extend(reversed(current.children))
+            continue
+        props = current.props or {}
+        if current.tag == "img":
+            parts.append(props.get("alt", ""))
+            if links is not None and "src" in props:
+                links.append(["img", props["src"]])
+        else:
+            parts.append(str(current.value))
+            if links is not None and current.tag == "a" and "href" in props:
+                links.append(["a", props["href"]])
+    return "".join(parts)
+
+
+def _summary(text):
+    text = " ".join(text.split())
+    if len(text) <= SUMMARY_LENGTH:
+        return text
+    cut = text.rfind(" ", 0, SUMMARY_LENGTH)
+    return text[:cut if cut > 0 else SUMMARY_LENGTH] + "…"
+
+
+class PageCollector():
+    """
+    Gathers what the sitemap, feed, search index and link check need from
+    one page. It is fed each block as the block is rendered, while its tree
+    is still in memory, so the generated HTML never has to be read back.
+    """
+
+    def __init__(self):
+        self.title = None
+        self.summary = None
+        self.terms = set()
+        self.links = []
+
+    def add(self, block):
+        text = node_text(block, self.links)
+        self.terms.update(term for term in _TERM.findall(text.lower()) if len(term) >= MIN_TERM_LENGTH)
+        if self.summary is None and block.tag == "p":
+            self.summary = _summary(text)
+
+    def info(self):
+        """JSON-able record of the page, stored in the build manifest."""
+        return {"title": self.title, "summary": self.summary or "", "terms": sorted(self.terms),
+                "links": self.links}
+
+
+def page_url(rel_output):
+    """Site-relative URL of an output file; index.html maps to its directory."""
+    url = rel_output.replace(os.sep, "/")
+    if url == "index.html" or url.endswith("/index.html"):
+        url = url[:-len("index.html")]
+    return url
+
+
+def shard_name(term):
+    """
+    File name (without .json) of the shard holding term: its first
+    characters, with anything but ASCII letters and digits written as
+    _<hex code point>- ("été" -> "_e9-t"). Sorted terms fall into contiguous
+    shards, so shards can be written one after the other.
+    """
+    return "".join(c if c.isascii() and c.isalnum() else f"_{ord(c):x}-"
+                   for c in term[:SHARD_PREFIX_LENGTH])
+
+
+def _absolute(site_url, url):
+    return site_url.rstrip("/") + "/" + url
+
+
+def _modified(page):
+    return datetime.fromtimestamp(page["modified_ns"] / 1e9, timezone.utc)
+
+
+def write_sitemap(f, site_url, pages):
+    """
+    Writes a sitemap to the binary file f. pages are dicts with "url" and
+    "modified_ns", as produced by the build.
+    """
+    f.write(b'<?xml version="1.0" encoding="UTF-8"?>\n'
+            b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+    for page in pages:
+        f.write((f"<url><loc>{escape(_absolute(site_url, page['url']))}</loc>"
+                 f"<lastmod>{_modified(page).date().isoformat()}</lastmod></url>\n").encode("utf-8"))
+    f.write(b"</urlset>\n")
+
+
+def write_feed(f, site_url, site_title, pages, limit=FEED_ITEMS):
+    """
+    Writes an RSS 2.0 feed of the limit most recently changed pages. pages
+    may be any iterable; only limit of them are held at a time.
+    """
+    recent = heapq.nsmallest(limit, pages, key=lambda page: (-page["modified_ns"], page["url"]))
+    f.write((f'<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0"><channel>\n'
+             f"<title>{escape(site_title)}</title><link>{escape(_absolute(site_url, ''))}</link>"
+             f"<description>{escape(site_title)}</description>\n").encode("utf-8"))
+    for page in recent:
+        link = escape(_absolute(site_url, page["url"]))
+        f.write((f"<item><title>{escape(page['title'])}</title><link>{link}</link>"
+                 f'<guid isPermaLink="true">{link}</guid>'
+                 f"<pubDate>{format_datetime(_modified(page))}</pubDate>"
+                 f"<description>{escape(page['summary'])}</description></item>\n").encode("utf-8"))
+    f.write(b"</channel></rss>\n")
+
+
+def search_postings(pages):
+    """
+    Inverted index of a list of pages, as (term, [page numbers]) sorted by
+    term, page numbers being positions in pages.
+    """
+    terms = {}
+    for number, page in enumerate(pages):
+        for term in page["terms"]:
+            terms.setdefault(term, []).append(number)
+    return sorted(terms.items())
+
+
+def write_search_index(directory, pages, postings=None):
+    """
+    Writes the search index into directory. Every shard <name>.json maps its
+    terms to page numbers, and index.json lists the shards and the pages
+    ([url, title] by page number). postings are (term, [page numbers]) in
+    term order, computed from pages (then a list) when not given; they are
+    consumed as a stream, one shard file at a time and one term per line.
+    Shards left over from earlier builds are removed.
+    """
+    if postings is None:
+        postings = search_postings(pages)
+    shards = []
+    for name, group in groupby(postings, key=lambda posting: shard_name(posting[0])):
+        shards.append(name)
+        with atomic_open(os.path.join(directory, name + ".json")) as f:
+            f.write(b"{")
+            for number, (term, page_numbers) in enumerate(group):
+                entry = json.dumps(term, ensure_ascii=False) + ":" + json.dumps(page_numbers, separators=(",", ":"))
+                f.write(("\n" if number == 0 else ",\n").encode("utf-8") + entry.encode("utf-8"))
+            f.write(b"\n}\n")
+    with atomic_open(os.path.join(directory, "index.json")) as f:
+        f.write(b'{"version":%d,"prefix":%d,"shards":' % (SEARCH_INDEX_VERSION, SHARD_PREFIX_LENGTH))
+        f.write(json.dumps(shards, separators=(",", ":")).encode("utf-8"))
+        f.write(b',"pages":[')
+        for number, page in enumerate(pages):
+            entry = json.dumps([page["url"], page["title"]], ensure_ascii=False, separators=(",", ":"))
+            f.write(("\n" if number == 0 else ",\n").encode("utf-8") + entry.encode("utf-8"))
+        f.write(b"\n]}\n")
+    keep = set(shards)
+    for name in os.listdir(directory):
+        shard, extension = os.path.splitext(name)
+        if extension == ".json" and shard != "index" and shard not in keep:
+            os.remove(os.path.join(directory, name))
+
+
+class SiteStore():
+    """
+    SQLite file holding the PageCollector records of every page, for builds
+    too large to keep them in memory. Iterating a SiteStore yields the pages
+    (without their terms) in source order, straight from a cursor, and
+    postings() has SQLite sort the inverted index, so neither the pages nor
+    the index are ever loaded as a whole. A file written with another
+    STORE_VERSION is emptied, and its pages are then rendered again.
+    """
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != STORE_VERSION:
+            self.db.executescript("""
+                DROP TABLE IF EXISTS pages;
+                DROP TABLE IF EXISTS terms;
+                DROP TABLE IF EXISTS links;
+            """)
+            self.db.execute(f"PRAGMA user_version = {STORE_VERSION}")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                rel TEXT PRIMARY KEY, url TEXT, title TEXT, summary TEXT, modified_ns INTEGER);
+            CREATE TABLE IF NOT EXISTS terms (rel TEXT, term TEXT);
+            CREATE INDEX IF NOT EXISTS terms_by_rel ON terms (rel);
+            CREATE TABLE IF NOT EXISTS links (rel TEXT, tag TEXT, url TEXT);
+            CREATE INDEX IF NOT EXISTS links_by_rel ON links (rel);
+        """)
+
+    def has_page(self, rel_source):
+        return self.db.execute("SELECT 1 FROM pages WHERE rel = ?", (rel_source,)).fetchone() is not None
+
+    def title(self, rel_source):
+        row = self.db.execute("SELECT title FROM pages WHERE rel = ?", (rel_source,)).fetchone()
+        return row[0] if row is not None else None
+
+    def put(self, rel_source, url, modified_ns, info):
+        self.remove(rel_source)
+        self.db.execute("INSERT INTO pages VALUES (?, ?, ?, ?, ?)",
+                        (rel_source, url, info["title"], info["summary"], modified_ns))
+        self.db.executemany("INSERT INTO terms VALUES (?, ?)", ((rel_source, term) for term in info["terms"]))
+        self.db.executemany("INSERT INTO links VALUES (?, ?, ?)",
+                            ((rel_source, tag, url) for tag, url in info["links"]))
+
+    def remove(self, rel_source):
+        for table in ("pages", "terms", "links"):
+            self.db.execute(f"DELETE FROM {table} WHERE rel = ?", (rel_source,))
+
+    def retain(self, rel_sources):
+        """Drops every page not in rel_sources."""
+        self.db.execute("CREATE TEMP TABLE IF NOT EXISTS keep (rel TEXT PRIMARY KEY)")
+        self.db.execute("DELETE FROM keep")
+        self.db.executemany("INSERT OR IGNORE INTO keep VALUES (?)", ((rel,) for rel in rel_sources))
+        for table in ("pages", "terms", "links"):
+            self.db.execute(f"DELETE FROM {table} WHERE rel NOT IN (SELECT rel FROM keep)")
+
+    def __iter__(self):
+        cursor = self.db.execute("SELECT url, title, summary, modified_ns FROM pages ORDER BY rel")
+        for url, title, summary, modified_ns in cursor:
+            yield {"url": url, "title": title, "summary": summary, "modified_ns": modified_ns}
+
+    def postings(self):
+        """(term, [page numbers]) in term order, numbering pages as __iter__ does."""
+        cursor = self.db.execute("""
+            WITH numbered AS (SELECT rel, ROW_NUMBER() OVER (ORDER BY rel) - 1 AS number FROM pages)
+            SELECT term, number FROM terms JOIN numbered USING (rel) ORDER BY term, number
+        """)
+        for term, rows in groupby(cursor, key=lambda row: row[0]):
+            yield term, [number for _, number in rows]
+
+    def links(self):
+        """(rel_source, tag, url) of every recorded link."""
+        return self.db.execute("SELECT rel, tag, url FROM links ORDER BY rel, rowid")
+
+    def commit(self):
+        self.db.commit()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+
+def write_site_index(dest_dir, site_url, site_title, pages, postings=None):
+    """
+    Writes sitemap.xml, feed.xml and the search index into dest_dir. pages
+    is a list of dicts with "url", "modified_ns" and the PageCollector.info()
+    fields, or a SiteStore together with its postings().
+    """
+    with atomic_open(os.path.join(dest_dir, SITEMAP_NAME)) as f:
+        write_sitemap(f, site_url, pages)
+    with atomic_open(os.path.join(dest_dir, FEED_NAME)) as f:
+        write_feed(f, site_url, site_title, pages)
+    search_dir = os.path.join(dest_dir, SEARCH_DIR)
+    os.makedirs(search_dir, exist_ok=True)
+    write_search_index(search_dir, pages, postings)
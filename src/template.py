@@ -0,0 +1,152 @@
+import os
+import re
+
+from htmlnode import collapse_whitespace
+
+# {{ name }} with any inner whitespace; names are case-insensitive
+SLOT_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+CONTENT_SLOT = "content"
+
+# Comments, except IE conditional ones
+_COMMENT = re.compile(r"<!--(?!\[if).*?-->", re.S)
+# Elements whose text minify_markup must keep exactly as written
+_PROTECTED = re.compile(r"<(pre|textarea|script|style)\b.*?</\1\s*>", re.S | re.I)
+# Whitespace after a tag that is followed by another tag; groups are the
+# first tag, its name and the name of the second ("/" of end tags left out)
+_BETWEEN_TAGS = re.compile(r"(</?([^\s/<>]+)[^<>]*>)\s+(?=</?([^\s/<>]+))")
+# Elements the browser lays out as blocks (or does not display): whitespace
+# next to their tags is not rendered, so minify_markup drops it. Between
+# other tags (<b>x</b> <i>y</i>) it is a visible space and is kept as one.
+BLOCK_TAGS = frozenset((
+    "html", "head", "body", "title", "meta", "link", "base", "script", "style", "noscript", "template",
+    "div", "p", "main", "header", "footer", "nav", "section", "article", "aside", "address",
+    "h1", "h2", "h3", "h4", "h5", "h6", "hr", "pre", "blockquote", "figure", "figcaption",
+    "ul", "ol", "li", "dl", "dt", "dd", "details", "summary", "form", "fieldset", "legend",
+    "table", "caption", "colgroup", "col", "thead", "tbody", "tfoot", "tr", "th", "td",
+))
+
+
+# Stands in for a protected element while the rest is minified; it looks
+# like a tag so whitespace next to it is treated as between tags
+_PLACEHOLDER = re.compile("<\x00(\\d+)>")
+
+
+def minify_markup(text):
+    """
+    Minifies hand-written markup (a template): drops comments, removes
+    whitespace between tags when one of them is in BLOCK_TAGS (or is a
+    doctype or comment) and collapses other whitespace to one space,
+    leaving pre, textarea, script and style elements untouched.
+    """
+    protected = []
+
+    def protect(match):
+        protected.append(match.group(0))
+        return f"<\x00{len(protected) - 1}>"
+
+    def is_block(name):
+        if name.startswith("\x00"):
+            # A protected element, by its own tag name
+            name = _PROTECTED.match(protected[int(name[1:])]).group(1)
+        return name.startswith("!") or name.lower() in BLOCK_TAGS
+
+    def between_tags(match):
+        if is_block(match.group(2)) or is_block(match.group(3)):
+            return match.group(1)
+        return match.group(1) + " "
+    text = _PROTECTED.sub(protect, text)
+    text = _COMMENT.sub("", text)
+    text = _BETWEEN_TAGS.sub(between_tags, text)
+    text = collapse_whitespace(text)
+    return _PLACEHOLDER.sub(lambda match: protected[int(match.group(1))], text)
+
+
+class Template():
+    """
+    A page layout compiled once into alternating static byte chunks and slot
+    names:
+
+        static[0] slots[0] static[1] slots[1] ... slots[n-1] static[n]
+
+    Filling it is a join of the static chunks with the encoded slot values,
+    with no parsing. The content slot is split out so a page body can be
+    streamed between head and tail (see write_head / write_tail). A
+    template compiled with minify also asks for minified page content
+    (see HTMLNode.iter_html).
+    """
+
+    def __init__(self, static, slots, minify=False):
+        self.static = static
+        self.slots = slots
+        self.minify = minify
+        try:
+            self.content_index = slots.index(CONTENT_SLOT)
+        except ValueError:
+            self.content_index = None
+        end = len(slots) if self.content_index is None else self.content_index
+        # Slots that are filled before the content slot
+        self.head_slots = frozenset(slots[:end])
+
+    @classmethod
+    def compile(cls, text, minify=False):
+        """Compiles template text; with minify, its markup is minified first."""
+        if minify:
+            text = minify_markup(text)
+        static = []
+        slots = []
+        pos = 0
+        for match in SLOT_PATTERN.finditer(text):
+            static.append(text[pos:match.start()].encode("utf-8"))
+            slots.append(match.group(1).lower())
+            pos = match.end()
+        static.append(text[pos:].encode("utf-8"))
+        return cls(static, slots, minify)
+
+    def _write(self, write, first, last, values):
+        # static[first], then (slot, static) pairs up to static[last]
+        write(self.static[first])
+        for i in range(first, last):
+            value = values.get(self.slots[i], "")
+            write(value if isinstance(value, bytes) else str(value).encode("utf-8"))
+            write(self.static[i + 1])
+
+    def write_head(self, write, values):
+        """Writes everything before the content slot through write(bytes)."""
+        last = len(self.slots) if self.content_index is None else self.content_index
+        self._write(write, 0, last, values)
+
+    def write_tail(self, write, values):
+        """Writes everything after the content slot through write(bytes)."""
+        if self.content_index is not None:
+            self._write(write, self.content_index + 1, len(self.slots), values)
+
+    def render(self, values):
+        """The filled template as bytes; values maps slot names to str or bytes."""
+        parts = []
+        self._write(parts.append, 0, len(self.slots), values)
+        return b"".join(parts)
+
+
+# (path, minify) -> (mtime_ns, size, Template)
+_compiled = {}
+
+
+def load_template(path, minify=False, rewrite=None):
+    """
+    Compiled template for path. It is compiled again only when the file's
+    mtime or size changed, so thousands of pages share one compilation.
+    With rewrite, a function taking and returning the template text (see
+    assets.PageAssets.rewrite_markup), the text goes through it before it
+    is compiled; such templates are compiled on every call.
+    """
+    if rewrite is not None:
+        with open(path, encoding="utf-8") as f:
+            return Template.compile(rewrite(f.read()), minify)
+    st = os.stat(path)
+    cached = _compiled.get((path, minify))
+    if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    with open(path, encoding="utf-8") as f:
+        template = Template.compile(f.read(), minify)
+    _compiled[(path, minify)] = (st.st_mtime_ns, st.st_size, template)
+    return template
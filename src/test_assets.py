@@ -0,0 +1,162 @@
+import os
+import struct
+import tempfile
+import unittest
+from unittest import mock
+
+import assets
+from assets import ASSET_CACHE_NAME, Asset, AssetMap, fingerprint_assets, hashed_name, image_size
+from htmlnode import LeafNode, ParentNode
+
+
+def png(width, height):
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", width, height) + b"\x08\x06"
+
+
+def jpeg(width, height):
+    # SOI, an APP0 segment to skip, then a baseline start-of-frame
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    sof0 = b"\xff\xc0" + struct.pack(">HBHH", 11, 8, height, width) + b"\x01\x01\x11\x00"
+    return b"\xff\xd8" + app0 + sof0 + b"\xff\xd9"
+
+
+class AssetsTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.root = self._tmp.name
+        self.static = os.path.join(self.root, "static")
+        self.dest = os.path.join(self.root, "public")
+
+    def write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+
+class TestImageSize(AssetsTestCase):
+    def test_formats(self):
+        cases = {
+            "a.png": (png(640, 480), (640, 480)),
+            "a.gif": (b"GIF89a" + struct.pack("<HH", 32, 16) + b"\x00" * 4, (32, 16)),
+            "a.jpg": (jpeg(1024, 768), (1024, 768)),
+            "a.txt": (b"plain text", None),
+            "bad.png": (b"\x89PNG\r\n\x1a\n", None),
+            "bad.jpg": (b"\xff\xd8\xff\xe0\x00", None),
+        }
+        for name, (data, size) in cases.items():
+            path = os.path.join(self.root, name)
+            self.write(path, data)
+            self.assertEqual(image_size(path), size, name)
+
+    def test_missing_file(self):
+        self.assertIsNone(image_size(os.path.join(self.root, "nope.png")))
+
+
+class TestRewrite(unittest.TestCase):
+    asset_map = AssetMap({
+        "img/cat.png": Asset("a" * 32, hashed_name("img/cat.png", "a" * 32), (40, 30)),
+        "doc.pdf": Asset("b" * 32, hashed_name("doc.pdf", "b" * 32)),
+    })
+
+    def test_hashed_name(self):
+        self.assertEqual(hashed_name("img/cat.png", "0123456789abcdef"), "img/cat.0123456789.png")
+
+    def test_urls_are_rewritten(self):
+        page = self.asset_map.for_page("blog/post.html")
+        block = ParentNode("p", [
+            LeafNode("img", "", {"src": "../img/cat.png", "alt": "cat"}),
+            LeafNode("a", "pdf", {"href": "/doc.pdf#page=2"}),
+            LeafNode("a", "home", {"href": "/"}),
+            LeafNode(None, "text"),
+        ])
+        self.assertEqual(
+            page.rewrite(block).to_html(),
+            '<p><img src="../img/cat.aaaaaaaaaa.png" alt="cat" width="40" height="30"></img>'
+            '<a href="/doc.bbbbbbbbbb.pdf#page=2">pdf</a><a href="/">home</a>text</p>',
+        )
+        self.assertEqual(page.used, {"img/cat.png": "a" * 32, "doc.pdf": "b" * 32})
+        # The parsed tree itself is untouched
+        self.assertEqual(block.children[0].props["src"], "../img/cat.png")
+
+    def test_unchanged_blocks_are_kept(self):
+        block = ParentNode("p", [LeafNode("a", "x", {"href": "/other.png"}), LeafNode("img", "", {"src": "x.png"})])
+        page = self.asset_map.for_page("index.html")
+        self.assertIs(page.rewrite(block), block)
+        self.assertEqual(page.used, {})
+
+    def test_explicit_size_is_kept(self):
+        block = LeafNode("img", "", {"src": "/img/cat.png", "alt": "", "width": "10"})
+        self.assertEqual(self.asset_map.for_page("index.html").rewrite(block).props,
+                         {"src": "/img/cat.aaaaaaaaaa.png", "alt": "", "width": "10"})
+
+    def test_is_current(self):
+        self.assertTrue(self.asset_map.is_current({"doc.pdf": "b" * 32}))
+        self.assertTrue(self.asset_map.is_current({}))
+        self.assertFalse(self.asset_map.is_current({"doc.pdf": "c" * 32}))
+        self.assertFalse(self.asset_map.is_current({"gone.css": "b" * 32}))
+        self.assertFalse(self.asset_map.is_current(None))
+
+
+class TestFingerprintAssets(AssetsTestCase):
+    def publish(self):
+        # copy_tree has put the plain copies there first in a build
+        for name in ("img/cat.png", "site.css", "about.html"):
+            source = os.path.join(self.static, name)
+            if os.path.exists(source):
+                with open(source, "rb") as f:
+                    self.write(os.path.join(self.dest, name), f.read())
+        return fingerprint_assets(self.static, self.dest)
+
+    def test_publish_and_cache(self):
+        self.write(os.path.join(self.static, "img", "cat.png"), png(4, 3))
+        self.write(os.path.join(self.static, "site.css"), b"body {}")
+        self.write(os.path.join(self.static, "about.html"), b"<p>about</p>")
+        asset_map, stats = self.publish()
+        self.assertEqual(sorted(asset_map.assets), ["img/cat.png", "site.css"])
+        cat = asset_map.assets["img/cat.png"]
+        self.assertEqual(cat.size, (4, 3))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, cat.path)))
+        self.assertEqual((stats.assets, stats.hashed, stats.published), (2, 2, 2))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, ASSET_CACHE_NAME)))
+
+        # Unchanged files are not hashed again
+        with mock.patch.object(assets, "hash_asset") as hash_asset:
+            asset_map, stats = self.publish()
+        hash_asset.assert_not_called()
+        self.assertEqual(asset_map.assets["img/cat.png"].size, (4, 3))
+        self.assertEqual((stats.hashed, stats.published), (0, 0))
+
+    def test_hardlinked_plain_copy_is_not_shared(self):
+        css = os.path.join(self.static, "site.css")
+        self.write(css, b"body {}")
+        # As copy_tree(hardlink=True) leaves it
+        os.makedirs(self.dest)
+        os.link(css, os.path.join(self.dest, "site.css"))
+        asset_map, _ = fingerprint_assets(self.static, self.dest)
+        hashed = os.path.join(self.dest, asset_map.assets["site.css"].path)
+        # Editing the source in place must not change the published file
+        with open(css, "r+b") as f:
+            f.write(b"p")
+        with open(hashed, "rb") as f:
+            self.assertEqual(f.read(), b"body {}")
+
+    def test_changed_and_removed_files(self):
+        css = os.path.join(self.static, "site.css")
+        self.write(css, b"body {}")
+        self.write(os.path.join(self.static, "img", "cat.png"), png(4, 3))
+        old = self.publish()[0].assets["site.css"].path
+        self.write(css, b"body { margin: 0 }")
+        os.utime(css, ns=(1, 1))
+        os.remove(os.path.join(self.static, "img", "cat.png"))
+        asset_map, stats = self.publish()
+        new = asset_map.assets["site.css"].path
+        self.assertNotEqual(new, old)
+        self.assertEqual((stats.hashed, stats.published, stats.removed), (1, 1, 2))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, old)))
+        with open(os.path.join(self.dest, new), "rb") as f:
+            self.assertEqual(f.read(), b"body { margin: 0 }")
+
+
+if __name__ == "__main__":
+    unittest.main()
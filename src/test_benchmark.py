@@ -0,0 +1,40 @@
+import unittest
+from benchmark import BASELINE_VERSION, BENCHMARKS, Document, compare, mismatched_params, run_suite
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def test_document_shape(self):
+        doc = Document(100, depth=3, props_density=0.5)
+        self.assertEqual(len(doc.text_nodes), 100)
+        self.assertEqual(len(doc.leaves), 100)
+        html = doc.tree.to_html()
+        self.assertTrue(html.startswith("<body><article"))
+        self.assertIn('class="level-1"', html)
+
+    def test_document_is_deterministic(self):
+        self.assertEqual(Document(50).tree.to_html(), Document(50).tree.to_html())
+
+    def test_run_suite_scaling_points(self):
+        sizes, results = run_suite(30, 2, 0.2, 3, 1, list(BENCHMARKS))
+        self.assertEqual(sizes, [10, 20, 30])
+        for name in BENCHMARKS:
+            self.assertEqual(sorted(results[name]), ["10", "20", "30"])
+            self.assertGreater(results[name]["30"]["ops_per_sec"], 0)
+
+    def test_compare_flags_regressions(self):
+        baseline = {"results": {"convert": {"100": {"ops_per_sec": 1000.0}},
+                                "props": {"100": {"ops_per_sec": 1000.0}}}}
+        results = {"convert": {"100": {"ops_per_sec": 700.0}},
+                   "props": {"100": {"ops_per_sec": 900.0}}}
+        self.assertEqual(compare(results, baseline, 0.2), [("convert", "100", 0.7)])
+
+    def test_baseline_params_must_match(self):
+        params = {"size": 100, "depth": 3, "props_density": 0.2, "steps": 3}
+        baseline = {"version": BASELINE_VERSION, "params": dict(params)}
+        self.assertEqual(mismatched_params(params, baseline), [])
+        self.assertEqual(mismatched_params(dict(params, size=200), baseline), [("size", 100, 200)])
+        self.assertEqual(mismatched_params(params, {"results": {}})[0], ("version", None, BASELINE_VERSION))
+
+
+if __name__ == "__main__":
+    unittest.main()
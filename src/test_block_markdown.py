@@ -0,0 +1,74 @@
+import io
+import unittest
+from block_markdown import block_text, iter_blocks
+
+
+def render(markdown):
+    return "".join(block.to_html() for block in iter_blocks(io.StringIO(markdown)))
+
+
+class TestIterBlocks(unittest.TestCase):
+    def test_paragraphs(self):
+        self.assertEqual(
+            render("First line\nsecond **line**\n\n\nNext"),
+            "<p>First line second <b>line</b></p><p>Next</p>",
+        )
+
+    def test_headings(self):
+        self.assertEqual(
+            render("# One\n## Two\n###### Six\n####### Seven"),
+            "<h1>One</h1><h2>Two</h2><h6>Six</h6><p>####### Seven</p>",
+        )
+
+    def test_code_fence_keeps_text_raw(self):
+        self.assertEqual(
+            render("```\nfirst **line**\n\nsecond\n```\nafter"),
+            "<pre><code>first **line**\n\nsecond\n</code></pre><p>after</p>",
+        )
+
+    def test_unclosed_code_fence(self):
+        self.assertEqual(render("```\ncode"), "<pre><code>code\n</code></pre>")
+
+    def test_quote(self):
+        self.assertEqual(
+            render("> quoted\n> _text_\nlazy line"),
+            "<blockquote>quoted <i>text</i> lazy line</blockquote>",
+        )
+
+    def test_unordered_list(self):
+        self.assertEqual(
+            render("- one\n* two\n  continued"),
+            "<ul><li>one</li><li>two continued</li></ul>",
+        )
+
+    def test_ordered_list(self):
+        self.assertEqual(
+            render("1. one\n2. [two](/2)"),
+            '<ol><li>one</li><li><a href="/2">two</a></li></ol>',
+        )
+
+    def test_kind_change_starts_new_block(self):
+        self.assertEqual(
+            render("Paragraph\n- item\n# Head\nText"),
+            "<p>Paragraph</p><ul><li>item</li></ul><h1>Head</h1><p>Text</p>",
+        )
+
+    def test_yields_blocks_lazily(self):
+        def lines():
+            yield "# Title\n"
+            yield "\n"
+            raise AssertionError("read past the first block")
+
+        blocks = iter_blocks(lines())
+        self.assertEqual(next(blocks).to_html(), "<h1>Title</h1>")
+
+    def test_empty_list_item(self):
+        self.assertEqual(render("- \n- x"), "<ul><li></li><li>x</li></ul>")
+
+    def test_block_text(self):
+        block = next(iter_blocks(["# A **bold** title"]))
+        self.assertEqual(block_text(block), "A bold title")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,368 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import build
+
+from build import MANIFEST_NAME, Manifest, build_site, find_pages, output_path, render_page
+from htmlnode import LeafNode
+from template import Template
+
+TEMPLATE = "<html><title>{{ Title }}</title><body>{{ Content }}</body></html>"
+
+
+class BuildTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.root = self._tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.dest = os.path.join(self.root, "public")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, TEMPLATE)
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def write_page(self, rel, text):
+        self.write(os.path.join(self.content, rel), text)
+
+    def read_output(self, rel):
+        with open(os.path.join(self.dest, rel), encoding="utf-8") as f:
+            return f.read()
+
+
+class TestBuildSite(BuildTestCase):
+    def test_find_pages_and_output_path(self):
+        self.write_page("index.md", "# Home")
+        self.write_page("blog/post.md", "# Post")
+        self.write_page("blog/notes.txt", "ignored")
+        self.assertEqual(find_pages(self.content), ["blog/post.md", "index.md"])
+        self.assertEqual(output_path("blog/post.md"), "blog/post.html")
+
+    def test_first_build_renders_all_pages(self):
+        self.write_page("index.md", "# Home\n\nWelcome")
+        self.write_page("blog/post.md", "Untitled post")
+        result = build_site(self.content, self.template, self.dest)
+        self.assertEqual(result.built, ["blog/post.md", "index.md"])
+        self.assertEqual(
+            self.read_output("index.html"),
+            "<html><title>Home</title><body><h1>Home</h1><p>Welcome</p></body></html>",
+        )
+        self.assertIn("<title>post</title>", self.read_output("blog/post.html"))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, MANIFEST_NAME)))
+
+    def test_rebuild_skips_unchanged_pages(self):
+        self.write_page("a.md", "# A")
+        self.write_page("b.md", "# B")
+        build_site(self.content, self.template, self.dest)
+        self.write_page("b.md", "# B changed")
+        result = build_site(self.content, self.template, self.dest)
+        self.assertEqual(result.built, ["b.md"])
+        self.assertEqual(result.skipped, ["a.md"])
+        self.assertIn("B changed", self.read_output("b.html"))
+
+    def test_template_change_rebuilds_everything(self):
+        self.write_page("a.md", "# A")
+        build_site(self.content, self.template, self.dest)
+        self.write(self.template, "<main>{{ Content }}</main>")
+        result = build_site(self.content, self.template, self.dest)
+        self.assertEqual(result.built, ["a.md"])
+        self.assertEqual(self.read_output("a.html"), "<main><h1>A</h1></main>")
+
+    def test_missing_output_is_rebuilt(self):
+        self.write_page("a.md", "# A")
+        build_site(self.content, self.template, self.dest)
+        os.remove(os.path.join(self.dest, "a.html"))
+        result = build_site(self.content, self.template, self.dest)
+        self.assertEqual(result.built, ["a.md"])
+
+    def test_force_rebuilds_everything(self):
+        self.write_page("a.md", "# A")
+        build_site(self.content, self.template, self.dest)
+        result = build_site(self.content, self.template, self.dest, force=True)
+        self.assertEqual(result.built, ["a.md"])
+
+    def test_deleted_source_removes_output(self):
+        self.write_page("a.md", "# A")
+        self.write_page("b.md", "# B")
+        build_site(self.content, self.template, self.dest)
+        os.remove(os.path.join(self.content, "b.md"))
+        result = build_site(self.content, self.template, self.dest)
+        self.assertEqual(result.removed, ["b.md"])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "b.html")))
+        manifest = Manifest.load(os.path.join(self.dest, MANIFEST_NAME))
+        self.assertEqual(list(manifest.pages), ["a.md"])
+
+    def test_parallel_build_matches_serial_build(self):
+        for i in range(12):
+            self.write_page(f"section{i % 3}/page{i}.md", f"# Page {i}\n\nBody {i}")
+        serial_dest = os.path.join(self.root, "serial")
+        serial = build_site(self.content, self.template, serial_dest)
+        parallel = build_site(self.content, self.template, self.dest, jobs=3)
+        self.assertEqual(parallel.built, serial.built)
+        for rel in serial.built:
+            html = output_path(rel)
+            with open(os.path.join(serial_dest, html), encoding="utf-8") as f:
+                self.assertEqual(self.read_output(html), f.read())
+        self.assertEqual(sum(pages for pages, _ in parallel.worker_stats.values()), 12)
+        serial_manifest = Manifest.load(os.path.join(serial_dest, MANIFEST_NAME))
+        parallel_manifest = Manifest.load(os.path.join(self.dest, MANIFEST_NAME))
+        self.assertEqual(parallel_manifest.pages, serial_manifest.pages)
+
+    def test_markdown_blocks(self):
+        self.write_page("a.md", "# A\n\n- one\n- two\n\n```\nx = 1\n```\n")
+        build_site(self.content, self.template, self.dest)
+        self.assertEqual(
+            self.read_output("a.html"),
+            "<html><title>A</title><body><h1>A</h1><ul><li>one</li><li>two</li></ul>"
+            "<pre><code>x = 1\n</code></pre></body></html>",
+        )
+
+    def test_fragment_cache_directory(self):
+        body = "\n".join(f"- item {i}" for i in range(10))
+        self.write_page("a.md", body)
+        self.write_page("b.md", body)
+        cache_dir = os.path.join(self.root, "fragments")
+        result = build_site(self.content, self.template, self.dest, fragment_cache_dir=cache_dir)
+        self.assertEqual(result.fragment_stats["misses"], 1)
+        self.assertEqual(result.fragment_stats["hits"], 1)
+        self.assertEqual(self.read_output("a.html"), self.read_output("b.html").replace("<title>b", "<title>a"))
+
+    def test_tree_cache_skips_parsing_on_template_change(self):
+        self.write_page("a.md", "# A\n\nSome *text*")
+        self.write_page("b.md", "# B")
+        trees = os.path.join(self.root, "trees")
+        build_site(self.content, self.template, self.dest, tree_cache_dir=trees)
+        self.assertEqual(len(os.listdir(trees)), 2)
+        first = self.read_output("a.html")
+        self.write(self.template, TEMPLATE.replace("<body>", "<body class=x>"))
+        with mock.patch.object(build, "iter_file_blocks", side_effect=AssertionError("parsed")):
+            result = build_site(self.content, self.template, self.dest, tree_cache_dir=trees)
+        self.assertEqual(result.built, ["a.md", "b.md"])
+        self.assertEqual(self.read_output("a.html"), first.replace("<body>", "<body class=x>"))
+        # Trees of sources that changed or disappeared are dropped
+        self.write_page("a.md", "# A2")
+        os.remove(os.path.join(self.content, "b.md"))
+        build_site(self.content, self.template, self.dest, tree_cache_dir=trees)
+        self.assertEqual(len(os.listdir(trees)), 1)
+
+    def test_damaged_tree_cache_file_is_replaced(self):
+        self.write_page("a.md", "# A\n\nSome *text*")
+        trees = os.path.join(self.root, "trees")
+        build_site(self.content, self.template, self.dest, tree_cache_dir=trees)
+        first = self.read_output("a.html")
+        (name,) = os.listdir(trees)
+        with open(os.path.join(trees, name), "r+b") as f:
+            f.truncate(os.path.getsize(os.path.join(trees, name)) - 3)
+        for _ in range(2):
+            result = build_site(self.content, self.template, self.dest, tree_cache_dir=trees, force=True)
+            self.assertEqual(result.built, ["a.md"])
+            self.assertEqual(self.read_output("a.html"), first)
+        self.assertIsNotNone(build.load_file(os.path.join(trees, name)))
+
+    def test_tree_cache_is_dropped_on_parser_change(self):
+        self.write_page("a.md", "# A")
+        trees = os.path.join(self.root, "trees")
+        build_site(self.content, self.template, self.dest, tree_cache_dir=trees)
+        old = os.listdir(trees)
+        with mock.patch.object(build, "PARSER_VERSION", build.PARSER_VERSION + 1), \
+                mock.patch.object(build, "iter_file_blocks", wraps=build.iter_file_blocks) as parse:
+            build_site(self.content, self.template, self.dest, tree_cache_dir=trees, force=True)
+        parse.assert_called_once()
+        self.assertEqual(len(os.listdir(trees)), 1)
+        self.assertNotEqual(os.listdir(trees), old)
+
+    def test_site_index(self):
+        self.write_page("index.md", "# My Site\n\nWelcome home")
+        self.write_page("blog/post.md", "# Post\n\nAbout trees")
+        url = "https://example.com"
+        build_site(self.content, self.template, self.dest, site_url=url)
+        self.assertIn("<loc>https://example.com/blog/post.html</loc>", self.read_output("sitemap.xml"))
+        feed = self.read_output("feed.xml")
+        self.assertIn("<title>My Site</title>", feed)
+        self.assertIn("<description>About trees</description>", feed)
+        self.assertIn('"trees":[0]', self.read_output(os.path.join("search", "tr.json")))
+        # Skipped pages keep their entries, from the manifest
+        self.write_page("index.md", "# My Site\n\nWelcome back")
+        result = build_site(self.content, self.template, self.dest, site_url=url)
+        self.assertEqual(result.built, ["index.md"])
+        self.assertIn('"trees":[0]', self.read_output(os.path.join("search", "tr.json")))
+        self.assertIn('"back":[1]', self.read_output(os.path.join("search", "ba.json")))
+
+    def test_memory_budget_build(self):
+        self.write_page("index.md", "# My Site\n\nWelcome home")
+        self.write_page("blog/post.md", "# Post\n\nAbout trees")
+        url = "https://example.com"
+        build_site(self.content, self.template, self.dest, site_url=url)
+        expected = self.read_output(os.path.join("search", "tr.json"))
+        budget = 1 << 40
+        result = build_site(self.content, self.template, self.dest, site_url=url, memory_budget=budget, jobs=2)
+        self.assertEqual(result.built, ["blog/post.md", "index.md"])
+        self.assertEqual(self.read_output(os.path.join("search", "tr.json")), expected)
+        self.assertTrue(os.path.exists(os.path.join(self.dest, ".site.sqlite")))
+        self.assertGreater(result.peak_rss, 0)
+        self.assertIn("peak RSS", result.memory_report())
+        # Page records now live in the SQLite store, so nothing is rebuilt
+        self.assertNotIn("info", Manifest.load(os.path.join(self.dest, MANIFEST_NAME)).pages["index.md"])
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        result = build_site(self.content, self.template, self.dest, site_url=url, memory_budget=budget)
+        self.assertEqual(result.built, [])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "search", "tr.json")))
+
+    def test_memory_budget_drops_caches(self):
+        for i in range(3):
+            self.write_page(f"p{i}.md", "\n".join(f"- item {j}" for j in range(10)))
+        cache_dir = os.path.join(self.root, "fragments")
+        # A budget of one byte is always exceeded: caches are dropped after every page
+        result = build_site(self.content, self.template, self.dest, fragment_cache_dir=cache_dir, memory_budget=1)
+        self.assertEqual(len(result.built), 3)
+        self.assertEqual(self.read_output("p0.html"), self.read_output("p1.html").replace("p1", "p0"))
+
+    def test_check_links(self):
+        self.write_page("index.md", "[post](/blog/post.html) ![logo](/logo.png)")
+        self.write_page("blog/post.md", "[home](/) [gone](gone.html)")
+        self.write_page("orphan.md", "nothing links here")
+        self.write(os.path.join(self.root, "static", "logo.png"), "png")
+        static = os.path.join(self.root, "static")
+        result = build_site(self.content, self.template, self.dest, static_dir=static, check_links=True)
+        self.assertEqual(result.link_report.broken, [("blog/post.md", "a", "gone.html")])
+        self.assertEqual(result.link_report.orphans, ["orphan.md"])
+        # Only the changed page is rendered again; the others' links come from
+        # the manifest, or from the SQLite store with a memory budget
+        self.write_page("blog/post.md", "[home](/) [orphan](/orphan.html)")
+        for budget, built in ((None, ["blog/post.md"]), (1 << 40, ["blog/post.md", "index.md", "orphan.md"]),
+                              (1 << 40, [])):
+            result = build_site(self.content, self.template, self.dest, static_dir=static, check_links=True,
+                                memory_budget=budget)
+            self.assertEqual(result.built, built)
+            self.assertEqual(result.link_report.broken, [])
+            self.assertEqual(result.link_report.orphans, [])
+            self.assertEqual(result.link_report.checked, 4)
+
+    def test_site_index_needs_collected_pages(self):
+        self.write_page("a.md", "# A")
+        build_site(self.content, self.template, self.dest)
+        result = build_site(self.content, self.template, self.dest, site_url="https://example.com")
+        self.assertEqual(result.built, ["a.md"])
+
+    def test_minify(self):
+        self.write(self.template, "<html>\n  <!-- layout -->\n  <title>{{ Title }}</title>\n"
+                                  "  <body>{{ Content }}</body>\n</html>")
+        self.write_page("a.md", "# A  <b>\n\n[x](/a b.html)\n\n```\nif a  <  b:\n    pass\n```")
+        build_site(self.content, self.template, self.dest)
+        regular = self.read_output("a.html")
+        self.assertIn("<h1>A  &lt;b&gt;</h1>", regular)
+        result = build_site(self.content, self.template, self.dest, minify=True)
+        self.assertEqual(result.built, ["a.md"])
+        self.assertEqual(
+            self.read_output("a.html"),
+            "<html><title>A &lt;b&gt;</title><body><h1>A &lt;b&gt;</h1>"
+            '<p><a href="/a b.html">x</a></p><pre><code>if a  &lt;  b:\n    pass\n</code></pre></body></html>',
+        )
+
+    def test_fingerprint(self):
+        static = os.path.join(self.root, "static")
+        self.write(os.path.join(static, "img", "cat.gif"), "GIF89a\x20\x00\x10\x00")
+        self.write(os.path.join(static, "site.css"), "body {}")
+        self.write_page("index.md", "![cat](img/cat.gif) [post](blog/post.html)")
+        self.write_page("blog/post.md", "[style](../site.css)")
+        result = build_site(self.content, self.template, self.dest, static_dir=static, fingerprint=True,
+                            check_links=True)
+        self.assertEqual(result.asset_stats.assets, 2)
+        self.assertEqual(result.link_report.broken, [])
+        page = self.read_output("index.html")
+        self.assertRegex(page, r'<img src="img/cat\.[0-9a-f]{10}\.gif" alt="cat" width="32" height="16">')
+        cat = page.split('"')[1]
+        self.assertEqual(self.read_output(cat), "GIF89a\x20\x00\x10\x00")
+        # Only the page using a changed asset is rendered again
+        self.write(os.path.join(static, "site.css"), "body { margin: 0 }")
+        result = build_site(self.content, self.template, self.dest, static_dir=static, fingerprint=True)
+        self.assertEqual(result.built, ["blog/post.md"])
+        self.assertEqual(result.asset_stats.hashed, 1)
+        # Turning fingerprinting off rebuilds every page with the plain names
+        result = build_site(self.content, self.template, self.dest, static_dir=static)
+        self.assertEqual(result.built, ["blog/post.md", "index.md"])
+        self.assertIn('src="img/cat.gif"', self.read_output("index.html"))
+
+    def test_fingerprint_template_assets(self):
+        static = os.path.join(self.root, "static")
+        self.write(os.path.join(static, "index.css"), "body {}")
+        self.write(self.template, TEMPLATE.replace("<title>", '<link href="/index.css" rel="stylesheet" /><title>'))
+        self.write_page("index.md", "# Home")
+        self.write_page("blog/post.md", "# Post")
+        result = build_site(self.content, self.template, self.dest, static_dir=static, fingerprint=True,
+                            check_links=True)
+        self.assertEqual(result.link_report.broken, [])
+        page = self.read_output(os.path.join("blog", "post.html"))
+        self.assertRegex(page, r'<link href="/index\.[0-9a-f]{10}\.css" rel="stylesheet" />')
+        # The template refers to the stylesheet, so every page uses it
+        self.write(os.path.join(static, "index.css"), "body { margin: 0 }")
+        result = build_site(self.content, self.template, self.dest, static_dir=static, fingerprint=True)
+        self.assertEqual(result.built, ["blog/post.md", "index.md"])
+        self.assertNotEqual(self.read_output("index.html"), page.replace("Post", "Home"))
+        result = build_site(self.content, self.template, self.dest, static_dir=static, fingerprint=True)
+        self.assertEqual(result.built, [])
+
+    def test_static_files_are_copied(self):
+        self.write_page("a.md", "# A")
+        self.write(os.path.join(self.root, "static", "css", "site.css"), "body {}")
+        static = os.path.join(self.root, "static")
+        result = build_site(self.content, self.template, self.dest, static_dir=static)
+        self.assertEqual(result.static_stats.copied, 1)
+        self.assertEqual(self.read_output(os.path.join("css", "site.css")), "body {}")
+        result = build_site(self.content, self.template, self.dest, static_dir=static)
+        self.assertEqual(result.static_stats.skipped, 1)
+
+    def test_no_temporary_files_left(self):
+        self.write_page("a.md", "# A")
+        self.write_page("big.md", "x" * (1 << 20))
+        build_site(self.content, self.template, self.dest)
+        self.assertEqual(sorted(os.listdir(self.dest)), [MANIFEST_NAME, "a.html", "big.html"])
+
+
+class TestRenderPage(BuildTestCase):
+    def render(self, template, markdown):
+        self.write_page("page.md", markdown)
+        dest = os.path.join(self.dest, "page.html")
+        digest, size = render_page(os.path.join(self.content, "page.md"), dest, Template.compile(template))
+        self.assertEqual(size, os.path.getsize(dest))
+        return self.read_output("page.html")
+
+    def test_title_after_first_blocks(self):
+        html = self.render("<t>{{ Title }}</t>{{ Content }}", "Intro\n\n# Late title\n\nBody")
+        self.assertEqual(html, "<t>Late title</t><p>Intro</p><h1>Late title</h1><p>Body</p>")
+
+    def test_title_in_tail(self):
+        html = self.render("{{ Content }}<footer>{{ Title }}</footer>", "# Top\n\nBody")
+        self.assertEqual(html, "<h1>Top</h1><p>Body</p><footer>Top</footer>")
+
+    def test_title_falls_back_to_file_name(self):
+        html = self.render("<t>{{ Title }}</t>{{ Content }}", "## Not a title")
+        self.assertEqual(html, "<t>page</t><h2>Not a title</h2>")
+
+    def test_blocks_held_for_title_are_bounded(self):
+        consumed = []
+
+        def blocks():
+            for i in range(build.TITLE_BLOCKS * 3):
+                consumed.append(i)
+                yield LeafNode("p", str(i))
+            yield LeafNode("h1", "Too late")
+        rendered_at = []
+        writer = build.HashingWriter(io.BytesIO())
+        title = build.write_page(writer, blocks(), Template.compile("<t>{{ Title }}</t>{{ Content }}"), "page",
+                                 render=lambda block: rendered_at.append(len(consumed)))
+        self.assertEqual(title, "page")
+        # The head (and the first block) is written once TITLE_BLOCKS were read
+        self.assertEqual(rendered_at[0], build.TITLE_BLOCKS)
+        self.assertEqual(len(rendered_at), build.TITLE_BLOCKS * 3 + 1)
+        self.assertEqual(writer.f.getvalue(), b"<t>page</t>")
+
+
+if __name__ == "__main__":
+    unittest.main()
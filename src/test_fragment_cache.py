@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+from fragment_cache import FragmentCache, prune_store
+from htmlnode import LeafNode, ParentNode
+
+
+def nav():
+    return ParentNode(
+        "nav",
+        [ParentNode("ul", [
+            ParentNode("li", [LeafNode("a", name, {"href": f"/{name}"})])
+            for name in ("home", "blog", "about")
+        ])],
+        {"class": "menu"},
+    )
+
+
+def page(body):
+    return ParentNode("div", [nav(), ParentNode("main", [LeafNode("p", body)]), nav()])
+
+
+class TestStructuralHash(unittest.TestCase):
+    def test_equal_trees_hash_equal(self):
+        self.assertEqual(nav().structural_hash(), nav().structural_hash())
+
+    def test_differences_change_the_hash(self):
+        base = LeafNode("a", "x", {"href": "/"}).structural_hash()
+        self.assertNotEqual(base, LeafNode("a", "y", {"href": "/"}).structural_hash())
+        self.assertNotEqual(base, LeafNode("b", "x", {"href": "/"}).structural_hash())
+        self.assertNotEqual(base, LeafNode("a", "x", {"href": "/z"}).structural_hash())
+        self.assertNotEqual(base, LeafNode("a", "x").structural_hash())
+        self.assertNotEqual(
+            ParentNode("p", [LeafNode(None, "ab"), LeafNode(None, "c")]).structural_hash(),
+            ParentNode("p", [LeafNode(None, "a"), LeafNode(None, "bc")]).structural_hash(),
+        )
+
+
+class TestFragmentCache(unittest.TestCase):
+    def test_output_matches_uncached(self):
+        cache = FragmentCache(min_nodes=2)
+        tree = page("hello")
+        self.assertEqual(tree.to_html(fragment_cache=cache), tree.to_html())
+        self.assertEqual(tree.to_html(fragment_cache=cache), tree.to_html())
+
+    def test_repeated_subtrees_hit(self):
+        cache = FragmentCache(min_nodes=5)
+        page("one").to_html(fragment_cache=cache)
+        # First page: the whole div and the first nav miss, the second nav hits
+        self.assertEqual(cache.hits, 1)
+        page("two").to_html(fragment_cache=cache)
+        # Second page: its div misses, both navs hit
+        self.assertEqual(cache.hits, 3)
+        self.assertEqual(cache.bytes_saved, 3 * len(nav().to_html()))
+        self.assertGreater(cache.time_saved, 0)
+
+    def test_small_subtrees_are_not_cached(self):
+        cache = FragmentCache(min_nodes=100)
+        page("one").to_html(fragment_cache=cache)
+        self.assertEqual(cache.stats()["misses"], 0)
+
+    def test_lru_bound(self):
+        cache = FragmentCache(max_entries=2, min_nodes=1)
+        for i in range(5):
+            ParentNode("p", [LeafNode(None, str(i))]).to_html(fragment_cache=cache)
+        self.assertEqual(len(cache._entries), 2)
+
+    def test_minified_fragments_are_cached_separately(self):
+        cache = FragmentCache(min_nodes=5)
+        tree = page("one")
+        self.assertEqual(tree.to_html(fragment_cache=cache), tree.to_html())
+        self.assertEqual(tree.to_html(fragment_cache=cache, minify=True), tree.to_html(minify=True))
+        self.assertNotEqual(tree.to_html(minify=True), tree.to_html())
+        self.assertEqual(tree.to_html(fragment_cache=cache, minify=True), tree.to_html(minify=True))
+
+    def test_disk_store_survives_new_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            page("one").to_html(fragment_cache=FragmentCache(min_nodes=5, directory=directory))
+            fresh = FragmentCache(min_nodes=5, directory=directory)
+            html = page("one").to_html(fragment_cache=fresh)
+            self.assertEqual(html, page("one").to_html())
+            # The whole page comes from disk in one lookup
+            self.assertEqual(fresh.hits, 1)
+            self.assertEqual(fresh.misses, 0)
+
+    def test_prune_store_drops_least_recently_used(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = FragmentCache(min_nodes=5, directory=directory)
+            for name in ("one", "two", "three"):
+                page(name).to_html(fragment_cache=cache)
+            paths = sorted(os.path.join(root, name) for root, _, names in os.walk(directory) for name in names)
+            for number, path in enumerate(paths):
+                os.utime(path, ns=(number, number))
+            # Reading a fragment from disk marks it as recently used
+            key = os.path.relpath(paths[0], directory).replace(os.sep, "")[:-len(".html")]
+            self.assertIsNotNone(FragmentCache(directory=directory)._load(key))
+            with open(os.path.join(directory, "stale.1.tmp"), "w") as f:
+                f.write("x")
+            total = sum(os.path.getsize(path) for path in paths)
+            # The tmp file and the oldest fragment not read since
+            self.assertEqual(prune_store(directory, max_bytes=total - 1), 2)
+            self.assertEqual([os.path.exists(path) for path in paths[:3]], [True, False, True])
+            self.assertEqual(prune_store(directory, max_bytes=total), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,12 @@
+import io
+import sys
 import unittest
 from enum import Enum
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import (
+    EMPTY_PROPS, HTMLNode, LeafNode, ParentNode, escape_text, props_cache_clear, props_cache_info, props_to_html,
+)
 from textnode import TextNode, TextType
-from main import text_node_to_html_node
+from main import text_node_to_html_node, text_nodes_to_html_nodes
 
 class TestHTMLNode(unittest.TestCase):
     # ... (Daha önceki TestHTMLNode.props_to_html test metotları buraya gelecek)
@@ -31,6 +35,39 @@ class TestHTMLNode(unittest.TestCase):
         self.assertTrue(output.startswith(' '))
         self.assertEqual(len(output.split()), 4)
 
+    def test_props_to_html_escapes_values(self):
+        node = HTMLNode(tag="a", props={"href": "/search?q=a&b=<c>", "title": 'say "hi"'})
+        self.assertEqual(
+            node.props_to_html(),
+            ' href="/search?q=a&amp;b=&lt;c&gt;" title="say &quot;hi&quot;"',
+        )
+
+    def test_props_to_html_cache_hits(self):
+        props_cache_clear()
+        first = HTMLNode(tag="a", props={"class": "post"}).props_to_html()
+        second = HTMLNode(tag="span", props={"class": "post"}).props_to_html()
+        self.assertEqual(first, second)
+        info = props_cache_info()
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.hits, 1)
+
+    def test_props_to_html_unhashable_value(self):
+        node = HTMLNode(tag="div", props={"data-items": [1, 2]})
+        self.assertEqual(node.props_to_html(), ' data-items="[1, 2]"')
+
+    def test_empty_props_share_sentinel(self):
+        node1 = HTMLNode(tag="p", props={})
+        node2 = LeafNode("b", "x", {})
+        self.assertIs(node1.props, EMPTY_PROPS)
+        self.assertIs(node2.props, EMPTY_PROPS)
+        self.assertEqual(node1.props, {})
+        self.assertEqual(repr(node1), "HTMLNode(tag='p', value=None, children=None, props={})")
+
+    def test_nodes_have_no_instance_dict(self):
+        self.assertFalse(hasattr(LeafNode("b", "x"), "__dict__"))
+        self.assertFalse(hasattr(ParentNode("p", [LeafNode(None, "x")]), "__dict__"))
+        self.assertFalse(hasattr(TextNode("x", TextType.TEXT), "__dict__"))
+
 class TestLeafNode(unittest.TestCase):
     def test_to_html_paragraph(self):
         """
@@ -221,6 +258,85 @@ class TestParentNode(unittest.TestCase):
             node_empty.to_html()
         self.assertEqual(str(cm.exception), "Invalid HTML: ParentNode requires children to render")
 
+    # --- Streaming render (iter_html / render_to) ---
+
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " text")]),
+                LeafNode("a", "link", {"href": "/x"}),
+            ],
+            {"class": "post"},
+        )
+        self.assertEqual("".join(node.iter_html()), node.to_html())
+        self.assertEqual(
+            node.to_html(),
+            '<div class="post"><p><b>Bold</b> text</p><a href="/x">link</a></div>',
+        )
+
+    def test_render_to_stream(self):
+        node = ParentNode("ul", [LeafNode("li", str(i)) for i in range(10)])
+        stream = io.StringIO()
+        node.render_to(stream, buffer_size=3)
+        self.assertEqual(stream.getvalue(), node.to_html())
+
+    def test_to_html_deep_nesting_no_recursion_error(self):
+        depth = sys.getrecursionlimit() * 2
+        node = LeafNode(None, "x")
+        for _ in range(depth):
+            node = ParentNode("div", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<div>" * 3))
+        self.assertEqual(len(html), depth * len("<div></div>") + 1)
+
+    def test_iter_html_invalid_nested_child_raises_error(self):
+        child = ParentNode("span", [LeafNode(None, "x")])
+        child.children = []
+        node = ParentNode("div", [child])
+        with self.assertRaises(ValueError) as cm:
+            node.to_html()
+        self.assertEqual(str(cm.exception), "Invalid HTML: ParentNode requires children to render")
+
+    # --- Escaping and minified output ---
+
+    def test_text_is_escaped(self):
+        self.assertEqual(LeafNode(None, "a < b && c > d").to_html(), "a &lt; b &amp;&amp; c &gt; d")
+        self.assertEqual(LeafNode("code", "<br>").to_html(), "<code>&lt;br&gt;</code>")
+        # Quotes are only escaped in attribute values
+        self.assertEqual(LeafNode("q", 'say "hi"').to_html(), '<q>say "hi"</q>')
+        self.assertEqual(escape_text(42), "42")
+
+    def test_plain_text_is_not_copied(self):
+        text = "nothing to escape here"
+        self.assertIs(escape_text(text), text)
+
+    def test_minify(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode(None, "two  spaces\n and\tbreaks "), LeafNode("b", "x\u00a0 y")]),
+            LeafNode("a", "link", {"href": "/x", "title": "two words", "alt": ""}),
+            ParentNode("pre", [LeafNode("code", "keep  this\n  indented")]),
+        ], {"class": "post"})
+        self.assertEqual(
+            node.to_html(minify=True),
+            '<div class=post><p>two spaces and breaks <b>x\u00a0 y</b></p>'
+            '<a href=/x title="two words" alt>link</a>'
+            '<pre><code>keep  this\n  indented</code></pre></div>',
+        )
+        stream = io.StringIO()
+        node.render_to(stream, minify=True)
+        self.assertEqual(stream.getvalue(), node.to_html(minify=True))
+        self.assertEqual(props_to_html({"href": "a b"}, minify=True), ' href="a b"')
+        self.assertEqual(props_to_html({"href": "a&b"}, minify=True), " href=a&amp;b")
+
+    def test_render_options_are_keyword_only(self):
+        for node in (LeafNode("b", "x"), ParentNode("p", [LeafNode("b", "x")])):
+            self.assertEqual(node.to_html(fragment_cache=None, minify=True), node.to_html(minify=True))
+            with self.assertRaises(TypeError):
+                node.to_html(True)
+            with self.assertRaises(TypeError):
+                node.render_to(io.StringIO(), 1024, None)
+
 class TestTextNodeToHTMLNodeConversion(unittest.TestCase):
 
     # Kullanıcı tarafından sağlanan başlangıç testi
@@ -364,6 +480,39 @@ class TestTextNodeToHTMLNodeConversion(unittest.TestCase):
         self.assertEqual(str(cm.exception), f"Unhandled text node type: {UnhandledTextType.UNKNOWN}")
 
 
+    # --- Batch conversion (text_nodes_to_html_nodes) ---
+
+    def test_batch_matches_single_conversion(self):
+        nodes = [
+            TextNode("plain", TextType.TEXT),
+            TextNode("bold", TextType.BOLD),
+            TextNode("italic", TextType.ITALIC),
+            TextNode("code", TextType.CODE),
+            TextNode("link", TextType.LINK, "https://example.com"),
+            TextNode("alt text", TextType.IMAGE, "/img.png"),
+        ]
+        batch = text_nodes_to_html_nodes(iter(nodes))
+        self.assertEqual(len(batch), len(nodes))
+        for text_node, html_node in zip(nodes, batch):
+            single = text_node_to_html_node(text_node)
+            self.assertIsInstance(html_node, LeafNode)
+            self.assertEqual(html_node.tag, single.tag)
+            self.assertEqual(html_node.value, single.value)
+            self.assertEqual(html_node.props, single.props)
+        self.assertEqual(batch[5].props, {"src": "/img.png", "alt": "alt text"})
+
+    def test_batch_validates_before_converting(self):
+        nodes = [
+            TextNode("fine", TextType.BOLD),
+            TextNode("broken", TextType.LINK, None),
+        ]
+        with self.assertRaises(ValueError) as cm:
+            text_nodes_to_html_nodes(nodes)
+        self.assertEqual(str(cm.exception), "Link TextNode must have a url")
+
+    def test_batch_empty(self):
+        self.assertEqual(text_nodes_to_html_nodes([]), [])
+
 
 # This block allows you to run the tests directly from the script
 if __name__ == "__main__":
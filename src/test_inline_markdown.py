@@ -0,0 +1,111 @@
+import unittest
+from unittest import mock
+
+from inline_markdown import _Scanner, iter_text_nodes, text_to_textnodes
+from textnode import TextNode, TextType
+
+
+class TestTextToTextNodes(unittest.TestCase):
+    def test_all_types(self):
+        text = (
+            "This is **text** with an _italic_ word and a `code block` and an "
+            "![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)"
+        )
+        self.assertEqual(
+            text_to_textnodes(text),
+            [
+                TextNode("This is ", TextType.TEXT),
+                TextNode("text", TextType.BOLD),
+                TextNode(" with an ", TextType.TEXT),
+                TextNode("italic", TextType.ITALIC),
+                TextNode(" word and a ", TextType.TEXT),
+                TextNode("code block", TextType.CODE),
+                TextNode(" and an ", TextType.TEXT),
+                TextNode("obi wan image", TextType.IMAGE, "https://i.imgur.com/fJRm4Vk.jpeg"),
+                TextNode(" and a ", TextType.TEXT),
+                TextNode("link", TextType.LINK, "https://boot.dev"),
+            ],
+        )
+
+    def test_is_a_generator(self):
+        nodes = iter_text_nodes("a *b* c")
+        self.assertEqual(next(nodes), TextNode("a ", TextType.TEXT))
+
+    def test_plain_text(self):
+        self.assertEqual(text_to_textnodes("no markup here"), [TextNode("no markup here", TextType.TEXT)])
+
+    def test_empty(self):
+        self.assertEqual(text_to_textnodes(""), [])
+
+    def test_star_italic(self):
+        self.assertEqual(
+            text_to_textnodes("*one* and _two_"),
+            [
+                TextNode("one", TextType.ITALIC),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("two", TextType.ITALIC),
+            ],
+        )
+
+    def test_nested_markup_is_literal(self):
+        self.assertEqual(text_to_textnodes("**bold _not italic_**"), [TextNode("bold _not italic_", TextType.BOLD)])
+        self.assertEqual(text_to_textnodes("`**not bold**`"), [TextNode("**not bold**", TextType.CODE)])
+
+    def test_unmatched_delimiters_are_text(self):
+        for text in ["a **b", "a `b", "a _b", "[text](no close", "![alt]", "[a] (b)", "2 * 3 * 4", "****"]:
+            self.assertEqual(text_to_textnodes(text), [TextNode(text, TextType.TEXT)], text)
+
+    def test_unmatched_then_matched(self):
+        self.assertEqual(
+            text_to_textnodes("a ** b **c**"),
+            [TextNode("a ** b ", TextType.TEXT), TextNode("c", TextType.BOLD)],
+        )
+
+    def test_snake_case_is_not_italic(self):
+        self.assertEqual(
+            text_to_textnodes("call snake_case_name now"),
+            [TextNode("call snake_case_name now", TextType.TEXT)],
+        )
+
+    def test_italic_may_contain_underscore(self):
+        self.assertEqual(
+            text_to_textnodes("_a_b_ c"),
+            [TextNode("a_b", TextType.ITALIC), TextNode(" c", TextType.TEXT)],
+        )
+
+    def test_underscore_runs_are_text(self):
+        self.assertEqual(
+            text_to_textnodes("call __init__ or a__b, not _x_"),
+            [TextNode("call __init__ or a__b, not ", TextType.TEXT), TextNode("x", TextType.ITALIC)],
+        )
+
+    def test_star_does_not_close_on_double_star(self):
+        self.assertEqual(text_to_textnodes("*a **b** c*"), [TextNode("a **b** c", TextType.ITALIC)])
+        self.assertEqual(text_to_textnodes("***x***"), [TextNode("*x*", TextType.BOLD)])
+        self.assertEqual(
+            text_to_textnodes("*a **b"),
+            [TextNode("*a **b", TextType.TEXT)],
+        )
+        self.assertEqual(text_to_textnodes("***x*"), [TextNode("***x*", TextType.TEXT)])
+
+    def test_closers_are_examined_once(self):
+        # Every opener below looks for a closer past all the later ones;
+        # searches must not grow with the square of the delimiters
+        find = _Scanner.find
+        for unit in ("_a ", "*a ", "Use *args or *kwargs and _private names "):
+            for count in (100, 1000):
+                with mock.patch.object(_Scanner, "find", autospec=True, side_effect=find) as spy:
+                    nodes = text_to_textnodes(unit * count)
+                self.assertEqual(nodes, [TextNode(unit * count, TextType.TEXT)])
+                self.assertLessEqual(spy.call_count, 2 * unit.count("_") * count + 2 * unit.count("*") * count + 4,
+                                     unit)
+
+    def test_bang_without_image(self):
+        self.assertEqual(
+            text_to_textnodes("Hi! [x](/y)"),
+            [TextNode("Hi! ", TextType.TEXT), TextNode("x", TextType.LINK, "/y")],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
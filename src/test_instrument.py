@@ -0,0 +1,109 @@
+import io
+import os
+import tempfile
+import time
+import unittest
+from build import build_site, discard_page
+from htmlnode import LeafNode, ParentNode
+from instrument import Profiler
+from template import load_template
+
+
+class TestProfiler(unittest.TestCase):
+    def test_nested_phases_are_exclusive(self):
+        profiler = Profiler()
+        profiler.begin("outer")
+        profiler.begin("inner")
+        time.sleep(0.02)
+        profiler.end(10)
+        profiler.end()
+        outer_calls, outer_seconds, _ = profiler.phases["outer"]
+        inner_calls, inner_seconds, inner_bytes = profiler.phases["inner"]
+        self.assertEqual((outer_calls, inner_calls, inner_bytes), (1, 1, 10))
+        self.assertGreaterEqual(inner_seconds, 0.02)
+        self.assertLess(outer_seconds, 0.01)
+        self.assertEqual([event["name"] for event in profiler.events], ["inner", "outer"])
+
+    def test_render_matches_render_to(self):
+        node = ParentNode("div", [ParentNode("p", [LeafNode("b", "x"), LeafNode(None, "y")])], {"id": "a"})
+        stream = io.StringIO()
+        profiler = Profiler()
+        profiler.render(node, stream)
+        self.assertEqual(stream.getvalue(), node.to_html())
+        self.assertEqual(profiler.nodes[("ParentNode", "div")][0], 1)
+        self.assertEqual(profiler.nodes[("LeafNode", "b")][2], len("<b>x</b>"))
+        self.assertEqual(profiler.nodes[("LeafNode", None)][0], 1)
+        self.assertEqual(profiler.phases["write"][2], len(node.to_html()))
+
+    def test_timed_iter(self):
+        profiler = Profiler()
+        self.assertEqual(list(profiler.timed_iter("read", ["ab", "c"], len)), ["ab", "c"])
+        self.assertEqual(profiler.phases["read"][0], 3)
+        self.assertEqual(profiler.phases["read"][2], 3)
+
+
+class TestProfiledBuild(unittest.TestCase):
+    def test_build_records_phases_and_report(self):
+        with tempfile.TemporaryDirectory() as root:
+            content = os.path.join(root, "content")
+            os.makedirs(content)
+            for name in ("a", "b"):
+                with open(os.path.join(content, f"{name}.md"), "w", encoding="utf-8") as f:
+                    f.write(f"# Page {name}\n\nSome **bold** text\n\n- item\n")
+            template = os.path.join(root, "template.html")
+            with open(template, "w", encoding="utf-8") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+
+            profiler = Profiler()
+            plain = build_site(content, template, os.path.join(root, "plain"))
+            profiled = build_site(content, template, os.path.join(root, "public"), jobs=4, profiler=profiler)
+            self.assertEqual(profiled.built, plain.built)
+            with open(os.path.join(root, "public", "a.html"), encoding="utf-8") as f:
+                profiled_html = f.read()
+            with open(os.path.join(root, "plain", "a.html"), encoding="utf-8") as f:
+                self.assertEqual(profiled_html, f.read())
+
+            for phase in ("scan", "read", "tree", "tokenize", "convert", "render", "write", "page"):
+                self.assertIn(phase, profiler.phases)
+            self.assertEqual(len(profiler.pages), 2)
+            self.assertEqual(profiler.nodes[("ParentNode", "h1")][0], 2)
+            # jobs=4 is ignored: a profiled build renders in this process
+            self.assertFalse(profiled.pooled)
+            self.assertIsNone(profiled.peak_worker_rss)
+
+            report = os.path.join(root, "profile")
+            rendered = []
+
+            def rerender(source_path):
+                rendered.append(discard_page(source_path, load_template(template)))
+            profiler.write_report(report, rerender=rerender, slowest=1)
+            self.assertEqual(len(rendered), 1)
+            self.assertEqual(rendered[0][1], len(profiled_html.encode("utf-8")))
+            files = sorted(os.listdir(report))
+            self.assertEqual(files[1:], ["summary.txt", "trace.json"])
+            self.assertTrue(files[0].startswith("1-") and files[0].endswith(".prof"))
+
+    def test_build_uses_fragment_cache(self):
+        with tempfile.TemporaryDirectory() as root:
+            content = os.path.join(root, "content")
+            os.makedirs(content)
+            body = "\n".join(f"- item {i}" for i in range(10))
+            for name in ("a", "b"):
+                with open(os.path.join(content, f"{name}.md"), "w", encoding="utf-8") as f:
+                    f.write(body)
+            template = os.path.join(root, "template.html")
+            with open(template, "w", encoding="utf-8") as f:
+                f.write("{{ Content }}")
+
+            profiler = Profiler()
+            result = build_site(content, template, os.path.join(root, "public"), profiler=profiler,
+                                fragment_cache_dir=os.path.join(root, "fragments"))
+            self.assertEqual(result.fragment_stats["misses"], 1)
+            self.assertEqual(result.fragment_stats["hits"], 1)
+            self.assertEqual(profiler.nodes[("FragmentCache", "ul")][0], 2)
+            with open(os.path.join(root, "public", "b.html"), encoding="utf-8") as f:
+                self.assertEqual(f.read(), "<ul>" + "".join(f"<li>item {i}</li>" for i in range(10)) + "</ul>")
+
+
+if __name__ == "__main__":
+    unittest.main()
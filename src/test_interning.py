@@ -0,0 +1,110 @@
+import gc
+import unittest
+from block_markdown import iter_blocks, text_to_children
+from htmlnode import LeafNode, ParentNode
+from interning import FrozenLeafNode, FrozenParentNode, NodeInterner
+from main import text_node_to_html_node
+from textnode import TextNode, TextType
+
+
+class TestNodeInterner(unittest.TestCase):
+    def test_equal_leaves_are_shared(self):
+        interner = NodeInterner()
+        a = interner.leaf("a", "home", {"href": "/"})
+        self.assertIs(a, interner.leaf("a", "home", {"href": "/"}))
+        self.assertIsNot(a, interner.leaf("a", "home", {"href": "/x"}))
+        self.assertIsNot(a, interner.leaf("a", "home"))
+        self.assertIsNot(interner.leaf("a", "home"), interner.leaf("a", "home", {}))
+        self.assertIsInstance(a, FrozenLeafNode)
+        self.assertEqual(a.to_html(), '<a href="/">home</a>')
+
+    def test_props_are_shared_and_read_only(self):
+        interner = NodeInterner()
+        a = interner.leaf("a", "x", {"href": "/"})
+        b = interner.leaf("b", "y", {"href": "/"})
+        self.assertIs(a.props, b.props)
+        with self.assertRaises(TypeError):
+            a.props["href"] = "/evil"
+
+    def test_subtrees_are_shared(self):
+        interner = NodeInterner()
+
+        def item():
+            return interner.parent("li", [interner.leaf("a", "home", {"href": "/"})])
+        nav = interner.parent("ul", [item(), item()])
+        self.assertIs(nav.children[0], nav.children[1])
+        self.assertIs(nav, interner.parent("ul", [item(), item()]))
+        self.assertEqual(nav.to_html(), '<ul><li><a href="/">home</a></li><li><a href="/">home</a></li></ul>')
+
+    def test_nodes_are_immutable(self):
+        interner = NodeInterner()
+        leaf = interner.leaf("b", "x")
+        parent = interner.parent("p", [leaf])
+        with self.assertRaises(AttributeError):
+            leaf.value = "y"
+        with self.assertRaises(AttributeError):
+            del parent.tag
+        self.assertIsInstance(parent.children, tuple)
+
+    def test_equality_is_identity(self):
+        interner = NodeInterner()
+        self.assertEqual(interner.leaf("b", "x"), interner.leaf("b", "x"))
+        self.assertNotEqual(interner.leaf("b", "x"), LeafNode("b", "x"))
+        text = interner.text("x", TextType.BOLD)
+        self.assertIs(text, interner.text("x", TextType.BOLD))
+        self.assertEqual(len({text, interner.text("x", TextType.BOLD)}), 1)
+
+    def test_equality_with_plain_nodes(self):
+        interner = NodeInterner()
+        text = interner.text("a", TextType.TEXT)
+        self.assertEqual(TextNode("a", TextType.TEXT), text)
+        self.assertEqual(text, TextNode("a", TextType.TEXT))
+        self.assertNotEqual(text, TextNode("b", TextType.TEXT))
+        self.assertNotEqual(text, "a")
+        # Plain HTMLNodes compare by identity themselves
+        self.assertFalse(interner.leaf("b", "x") == LeafNode("b", "x"))
+
+    def test_constructor_validation(self):
+        interner = NodeInterner()
+        with self.assertRaises(ValueError):
+            interner.leaf("b", None)
+        with self.assertRaises(ValueError):
+            interner.parent(None, [interner.leaf("b", "x")])
+        with self.assertRaises(ValueError):
+            interner.parent("p", [])
+
+    def test_unused_nodes_are_released(self):
+        interner = NodeInterner()
+        interner.parent("p", [interner.leaf("b", "x")])
+        gc.collect()
+        self.assertEqual(interner.stats()["leaves"], 0)
+        self.assertEqual(interner.stats()["parents"], 0)
+
+    def test_intern_tree(self):
+        interner = NodeInterner()
+        markdown = ["- [home](/)\n", "- [home](/)\n", "\n", "[home](/)\n"]
+        blocks = [interner.intern(block) for block in iter_blocks(markdown)]
+        self.assertIsInstance(blocks[0], FrozenParentNode)
+        self.assertIs(blocks[0].children[0], blocks[0].children[1])
+        self.assertIs(blocks[0].children[0].children[0], blocks[1].children[0])
+        self.assertEqual("".join(b.to_html() for b in blocks),
+                         "".join(b.to_html() for b in iter_blocks(markdown)))
+        self.assertIs(interner.intern(blocks[0]), blocks[0])
+
+    def test_intern_deep_tree(self):
+        node = LeafNode("b", "x")
+        for _ in range(5000):
+            node = ParentNode("div", [node])
+        self.assertEqual(NodeInterner().intern(node).to_html(), node.to_html())
+
+    def test_conversion(self):
+        interner = NodeInterner()
+        link = TextNode("home", TextType.LINK, "/")
+        self.assertIs(text_node_to_html_node(link, interner), text_node_to_html_node(link, interner))
+        children = text_to_children("**a** and **a**", interner)
+        self.assertIs(children[0], children[2])
+        self.assertIs(text_to_children("", interner)[0], interner.leaf(None, ""))
+
+
+if __name__ == "__main__":
+    unittest.main()
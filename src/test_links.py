@@ -0,0 +1,47 @@
+import unittest
+from links import LinkReport, to_site_path, check_links
+
+
+class TestResolve(unittest.TestCase):
+    def test_internal_paths(self):
+        page = "blog/post.html"
+        self.assertEqual(to_site_path("/", page), "index.html")
+        self.assertEqual(to_site_path("x.html", page), "blog/x.html")
+        self.assertEqual(to_site_path("../a.html#top", page), "a.html")
+        self.assertEqual(to_site_path("/blog/", page), "blog/index.html")
+        self.assertEqual(to_site_path("img/a%20b.png?v=2", page), "blog/img/a b.png")
+        self.assertEqual(to_site_path("https://example.com/a.html", page, "https://example.com"), "a.html")
+
+    def test_external_and_same_page_links(self):
+        for url in ("https://other.org/", "//cdn.example.com/x.js", "mailto:me@example.com", "#top", ""):
+            self.assertIsNone(to_site_path(url, "index.html"), url)
+
+
+class TestCheckLinks(unittest.TestCase):
+    pages = {"index.md": "index.html", "blog/index.md": "blog/index.html", "blog/post.md": "blog/post.html",
+             "lost.md": "lost.html"}
+
+    def test_broken_links_and_orphans(self):
+        links = [
+            ("index.md", "a", "/blog"),
+            ("index.md", "img", "/logo.png"),
+            ("blog/index.md", "a", "post.html"),
+            ("blog/index.md", "a", "missing.html"),
+            ("blog/post.md", "img", "../nope.png"),
+            ("blog/post.md", "a", "https://example.org/"),
+            ("lost.md", "a", "lost.html"),
+        ]
+        report = check_links(self.pages, ["logo.png"], links)
+        self.assertEqual(report.broken, [("blog/index.md", "a", "missing.html"), ("blog/post.md", "img", "../nope.png")])
+        # Linking to itself does not make a page reachable
+        self.assertEqual(report.orphans, ["lost.md"])
+        self.assertEqual(report.checked, 6)
+        self.assertIn("2 broken", report.summary())
+        self.assertIn("broken a in blog/index.md: missing.html", report.details())
+
+    def test_empty_report(self):
+        self.assertEqual(LinkReport().details(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+from memory import MemoryBudget, current_rss, format_size, peak_rss
+
+
+class TestMemory(unittest.TestCase):
+    def test_rss(self):
+        rss = current_rss()
+        if rss is None:
+            self.skipTest("RSS not available on this platform")
+        self.assertGreater(rss, 0)
+        self.assertGreaterEqual(peak_rss(), rss // 2)
+
+    def test_budget_drops_caches_when_over(self):
+        if current_rss() is None:
+            self.skipTest("RSS not available on this platform")
+        dropped = []
+        budget = MemoryBudget(1)
+        budget.on_pressure(lambda: dropped.append(True))
+        self.assertTrue(budget.check())
+        self.assertEqual(dropped, [True])
+        self.assertEqual(budget.relieved, 1)
+
+    def test_budget_under_limit(self):
+        budget = MemoryBudget(1 << 50)
+        budget.on_pressure(self.fail)
+        self.assertFalse(budget.check())
+
+    def test_format_size(self):
+        self.assertEqual(format_size(3 * 2**20 // 2), "1.5 MiB")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from htmlnode import LeafNode, ParentNode
+from nodearena import NodeArena
+
+
+def sample_tree():
+    return ParentNode(
+        "div",
+        [
+            ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " and plain")]),
+            LeafNode("a", "link", {"href": "https://example.com"}),
+            LeafNode("a", "other link", {"href": "https://example.com"}),
+        ],
+        {"class": "post"},
+    )
+
+
+class TestNodeArena(unittest.TestCase):
+    def test_to_html_matches_node_tree(self):
+        tree = sample_tree()
+        arena = NodeArena()
+        root = arena.add_node(tree)
+        self.assertEqual(arena.to_html(root), tree.to_html())
+
+    def test_node_round_trip(self):
+        tree = sample_tree()
+        arena = NodeArena()
+        rebuilt = arena.node(arena.add_node(tree))
+        self.assertIsInstance(rebuilt, ParentNode)
+        self.assertEqual(rebuilt.to_html(), tree.to_html())
+        self.assertEqual(rebuilt.props, {"class": "post"})
+
+    def test_tags_and_props_are_interned(self):
+        arena = NodeArena()
+        arena.add_node(sample_tree())
+        # None, div, p, b, a
+        self.assertEqual(len(arena._tag_table), 5)
+        # None, {"class": "post"}, {"href": ...} shared by both links
+        self.assertEqual(len(arena._props_table), 3)
+        self.assertEqual(len(arena), 6)
+
+    def test_unhashable_props_are_not_shared(self):
+        arena = NodeArena()
+        first = arena.add_leaf("div", "x", {"data": [1]})
+        second = arena.add_leaf("div", "y", {"data": [1]})
+        self.assertEqual(arena.node_props(first), {"data": [1]})
+        self.assertIsNot(arena.node_props(first), arena.node_props(second))
+        self.assertEqual(arena.to_html(first), '<div data="[1]">x</div>')
+
+    def test_add_leaf_requires_value(self):
+        arena = NodeArena()
+        with self.assertRaises(ValueError) as cm:
+            arena.add_leaf("p", None)
+        self.assertEqual(str(cm.exception), "LeafNode requires a value")
+
+    def test_add_parent_requires_children(self):
+        arena = NodeArena()
+        with self.assertRaises(ValueError) as cm:
+            arena.add_parent("div", [])
+        self.assertEqual(str(cm.exception), "ParentNode requires a non-empty list of children")
+
+    def test_add_parent_from_ids(self):
+        arena = NodeArena()
+        children = [arena.add_leaf("li", "one"), arena.add_leaf("li", "two")]
+        root = arena.add_parent("ul", children)
+        self.assertEqual(arena.to_html(root), "<ul><li>one</li><li>two</li></ul>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import io
+import os
+import tempfile
+import unittest
+from htmlnode import LeafNode, ParentNode
+from nodecodec import DECODE_ERRORS, FORMAT_VERSION, MAGIC, LazyDocument, NodeEncoder, dumps, load_file, loads
+from textnode import TextNode, TextType
+
+
+def blocks():
+    return [
+        ParentNode("h1", [LeafNode(None, "Title ✓")]),
+        ParentNode("p", [
+            LeafNode(None, "see "),
+            LeafNode("a", "link", {"href": "/x?a=1&b=2"}),
+            LeafNode("img", "", {"src": "a.png", "alt": ""}),
+        ], {"class": "lead"}),
+        LeafNode("hr", "", None),
+    ]
+
+
+class TestNodeCodec(unittest.TestCase):
+    def test_round_trip(self):
+        original = blocks()
+        decoded = loads(dumps(original))
+        self.assertEqual([node.to_html() for node in decoded], [node.to_html() for node in original])
+        self.assertEqual(decoded[2].props, None)
+        self.assertEqual(decoded[1].props, {"class": "lead"})
+
+    def test_int_widths(self):
+        # Values longer than a byte or two can count need wider ints
+        nodes = [LeafNode("p", "x"), LeafNode("p", "y" * 300), LeafNode("p", "z" * 70000)]
+        data = dumps(nodes)
+        self.assertEqual([node.value for node in loads(data)], [node.value for node in nodes])
+        # A small block takes one byte per int: 4 ints, 9 header and 4 offset bytes
+        one = dumps([LeafNode("p", "x")])
+        two = dumps([LeafNode("p", "x"), LeafNode("p", "w")])
+        self.assertEqual(len(two) - len(one), 4 + 1 + 9 + 4)
+
+    def test_text_nodes(self):
+        nodes = [
+            TextNode("plain", TextType.TEXT),
+            TextNode("site", TextType.LINK, "https://example.com"),
+            TextNode("", TextType.IMAGE, ""),
+            TextNode(None, TextType.CODE),
+        ]
+        self.assertEqual(loads(dumps(nodes)), nodes)
+
+    def test_strings_are_interned(self):
+        many = [ParentNode("section", [LeafNode("span", str(i), {"class": "n"})]) for i in range(100)]
+        self.assertEqual(len(LazyDocument(dumps(many))._strings), 4)
+
+    def test_deep_tree(self):
+        node = LeafNode("b", "leaf")
+        for _ in range(5000):
+            node = ParentNode("div", [node])
+        decoded = loads(dumps([node]))[0]
+        self.assertEqual(list(decoded.iter_html()), list(node.iter_html()))
+
+    def test_lazy_access(self):
+        data = dumps(blocks())
+        document = LazyDocument(data)
+        self.assertEqual(len(document), 3)
+        self.assertEqual(document[1].children[1].value, "link")
+        self.assertEqual(document[-1].tag, "hr")
+
+    def test_streaming_encoder(self):
+        buffer = io.BytesIO()
+        encoder = NodeEncoder(buffer)
+        for block in blocks():
+            encoder.add(block)
+        encoder.close()
+        self.assertEqual(buffer.getvalue(), dumps(blocks()))
+
+    def test_other_versions_are_rejected(self):
+        data = dumps(blocks())
+        stale = MAGIC + bytes([FORMAT_VERSION + 1]) + data[len(MAGIC) + 1:]
+        with self.assertRaises(ValueError):
+            LazyDocument(stale)
+        with self.assertRaises(ValueError):
+            LazyDocument(b"<html>")
+
+    def test_load_file(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "page.ssnt")
+            self.assertIsNone(load_file(path))
+            with open(path, "wb") as f:
+                f.write(b"garbage")
+            self.assertIsNone(load_file(path))
+            with open(path, "wb") as f:
+                f.write(dumps(blocks()))
+            self.assertEqual(len(load_file(path)), 3)
+
+    def test_damaged_files(self):
+        data = dumps(blocks())
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "page.ssnt")
+            # Every truncation is rejected up front, never with struct.error
+            for cut in range(1, len(data)):
+                with open(path, "wb") as f:
+                    f.write(data[:-cut])
+                self.assertIsNone(load_file(path), cut)
+        # Bytes flipped inside a record: the header is fine, decoding fails
+        damaged = bytearray(data)
+        damaged[len(MAGIC) + 1] = 0xff
+        document = LazyDocument(bytes(damaged))
+        with self.assertRaises(DECODE_ERRORS):
+            list(document)
+
+
+if __name__ == "__main__":
+    unittest.main()
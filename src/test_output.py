@@ -0,0 +1,116 @@
+import os
+import stat
+import tempfile
+import unittest
+from unittest import mock
+
+import output
+from output import OutputWriter, atomic_open, atomic_write, copy_file, copy_tree
+
+
+class OutputTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.root = self._tmp.name
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def read(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+
+class TestAtomicWrites(OutputTestCase):
+    def test_atomic_write_creates_directories(self):
+        atomic_write(self.path("a", "b", "page.html"), b"<p>x</p>")
+        self.assertEqual(self.read(self.path("a", "b", "page.html")), b"<p>x</p>")
+
+    def test_failed_write_keeps_old_file(self):
+        target = self.path("page.html")
+        atomic_write(target, b"old")
+        with self.assertRaises(RuntimeError):
+            with atomic_open(target) as f:
+                f.write(b"half")
+                raise RuntimeError("render failed")
+        self.assertEqual(self.read(target), b"old")
+        self.assertEqual(os.listdir(self.root), ["page.html"])
+
+    def test_files_get_the_usual_mode(self):
+        # Same permissions as a file created with open(), not mkstemp's 0600
+        with open(self.path("plain.html"), "wb"):
+            pass
+        atomic_write(self.path("page.html"), b"<p>x</p>")
+        self.assertEqual(stat.S_IMODE(os.stat(self.path("page.html")).st_mode),
+                         stat.S_IMODE(os.stat(self.path("plain.html")).st_mode))
+        self.assertEqual(stat.S_IMODE(os.stat(self.path("page.html")).st_mode), output.FILE_MODE)
+
+
+class TestCopy(OutputTestCase):
+    def test_copy_file(self):
+        data = os.urandom(100_000)
+        self.write(self.path("src.bin"), data)
+        copy_file(self.path("src.bin"), self.path("out", "dst.bin"))
+        self.assertEqual(self.read(self.path("out", "dst.bin")), data)
+
+    def test_copy_file_keeps_mode(self):
+        self.write(self.path("run.sh"), b"#!/bin/sh\n")
+        os.chmod(self.path("run.sh"), 0o750)
+        copy_file(self.path("run.sh"), self.path("out", "run.sh"))
+        self.assertEqual(stat.S_IMODE(os.stat(self.path("out", "run.sh")).st_mode), 0o750)
+
+    def test_copy_file_without_kernel_paths(self):
+        self.write(self.path("src.bin"), b"abc" * 1000)
+        with mock.patch.object(output, "_KERNEL_COPIES", ()):
+            copy_file(self.path("src.bin"), self.path("dst.bin"))
+        self.assertEqual(self.read(self.path("dst.bin")), b"abc" * 1000)
+
+    def test_copy_tree_skips_unchanged_files(self):
+        self.write(self.path("static", "index.css"), b"body {}")
+        self.write(self.path("static", "img", "logo.png"), b"\x89PNG")
+        first = copy_tree(self.path("static"), self.path("public"))
+        self.assertEqual((first.copied, first.skipped), (2, 0))
+        self.assertEqual(self.read(self.path("public", "img", "logo.png")), b"\x89PNG")
+
+        second = copy_tree(self.path("static"), self.path("public"))
+        self.assertEqual((second.copied, second.skipped), (0, 2))
+
+        self.write(self.path("static", "index.css"), b"body { margin: 0 }")
+        third = copy_tree(self.path("static"), self.path("public"))
+        self.assertEqual((third.copied, third.skipped), (1, 1))
+        self.assertEqual(self.read(self.path("public", "index.css")), b"body { margin: 0 }")
+
+    def test_copy_tree_hardlinks(self):
+        self.write(self.path("static", "a.txt"), b"a")
+        stats = copy_tree(self.path("static"), self.path("public"), hardlink=True)
+        self.assertEqual(stats.linked, 1)
+        self.assertTrue(os.path.samefile(self.path("static", "a.txt"), self.path("public", "a.txt")))
+        self.assertEqual(copy_tree(self.path("static"), self.path("public"), hardlink=True).skipped, 1)
+
+
+class TestOutputWriter(OutputTestCase):
+    def test_writes_everything(self):
+        with OutputWriter(max_workers=2, max_pending=2) as writer:
+            for i in range(20):
+                writer.submit(self.path("out", f"{i}.html"), f"page {i}".encode())
+        self.assertEqual(writer.written, 20)
+        for i in range(20):
+            self.assertEqual(self.read(self.path("out", f"{i}.html")), f"page {i}".encode())
+
+    def test_close_raises_write_errors(self):
+        self.write(self.path("file"), b"x")
+        writer = OutputWriter()
+        # A path below a regular file cannot be created
+        writer.submit(self.path("file", "page.html"), b"x")
+        with self.assertRaises(OSError):
+            writer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
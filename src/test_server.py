@@ -0,0 +1,167 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+from server import DevSite, InotifyWatcher, PollingWatcher, make_handler, make_watcher, static_file, watch
+
+
+class DevSiteTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.content = os.path.join(self._tmp.name, "content")
+        self.template = os.path.join(self._tmp.name, "template.html")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nBody")
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+class TestDevSite(DevSiteTestCase):
+    def test_lookup(self):
+        site = DevSite(self.content, self.template)
+        self.assertEqual(site.lookup("/"), b"<title>Home</title><h1>Home</h1>")
+        self.assertEqual(site.lookup("/blog/post"), site.lookup("/blog/post.html?x=1"))
+        self.assertIsNone(site.lookup("/missing"))
+
+    def test_lookup_decodes_percent_escapes(self):
+        self.write(os.path.join(self.content, "my post.md"), "# Spaced")
+        site = DevSite(self.content, self.template)
+        self.assertEqual(site.lookup("/my%20post.html"), b"<title>Spaced</title><h1>Spaced</h1>")
+        self.assertEqual(site.lookup("/my%20post"), site.lookup("/my%20post.html"))
+
+    def test_update_reparses_only_changed_page(self):
+        site = DevSite(self.content, self.template)
+        self.assertEqual(site.parse_count, 2)
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nNew body")
+        rendered = site.update({os.path.join("blog", "post.md")})
+        self.assertEqual(rendered, [os.path.join("blog", "post.md")])
+        self.assertEqual(site.parse_count, 3)
+        self.assertIn(b"New body", site.lookup("/blog/post.html"))
+
+    def test_update_removes_deleted_page(self):
+        site = DevSite(self.content, self.template)
+        os.remove(os.path.join(self.content, "index.md"))
+        site.update({"index.md"})
+        self.assertIsNone(site.lookup("/"))
+        self.assertNotIn("index.md", site.trees)
+
+    def test_template_change_rerenders_without_parsing(self):
+        site = DevSite(self.content, self.template)
+        self.write(self.template, "<main>{{ Content }}</main>")
+        os.utime(self.template, ns=(0, 0))
+        rendered = site.update(set())
+        self.assertEqual(len(rendered), 2)
+        self.assertEqual(site.parse_count, 2)
+        self.assertEqual(site.lookup("/"), b"<main><h1>Home</h1></main>")
+
+
+    def test_broken_file_keeps_last_rendering(self):
+        errors = []
+        site = DevSite(self.content, self.template, on_error=lambda path, error: errors.append(path))
+        path = os.path.join(self.content, "index.md")
+        with open(path, "wb") as f:
+            f.write(b"# \xff bad")
+        self.assertEqual(site.update({"index.md"}), [])
+        self.assertEqual(site.lookup("/"), b"<title>Home</title><h1>Home</h1>")
+        self.assertIn("UnicodeDecodeError", site.errors["index.md"])
+        self.assertEqual(errors, ["index.md"])
+        self.write(path, "# Fixed")
+        self.assertEqual(site.update({"index.md"}), ["index.md"])
+        self.assertEqual(site.lookup("/"), b"<title>Fixed</title><h1>Fixed</h1>")
+        self.assertEqual(site.errors, {})
+
+    def test_broken_template_keeps_pages(self):
+        site = DevSite(self.content, self.template)
+        with open(self.template, "wb") as f:
+            f.write(b"\xff{{ Content }}")
+        os.utime(self.template, ns=(0, 0))
+        self.assertEqual(site.update(set()), [])
+        self.assertIn(self.template, site.errors)
+        self.assertFalse(site.template_changed())
+        self.assertEqual(site.lookup("/"), b"<title>Home</title><h1>Home</h1>")
+
+
+class TestWatchers(DevSiteTestCase):
+    def check_watcher(self, watcher):
+        self.addCleanup(watcher.close)
+        self.write(os.path.join(self.content, "index.md"), "# Changed")
+        self.write(os.path.join(self.content, "new", "page.md"), "# New")
+        changed = set()
+        for _ in range(20):
+            changed |= watcher.wait(0.05)
+            if {"index.md", os.path.join("new", "page.md")} <= changed:
+                break
+        self.assertIn("index.md", changed)
+        self.assertIn(os.path.join("new", "page.md"), changed)
+
+    def test_polling_watcher(self):
+        watcher = PollingWatcher(self.content, interval=0.01)
+        # Make sure the rewrite changes the mtime even on coarse clocks
+        os.utime(os.path.join(self.content, "index.md"), ns=(0, 0))
+        watcher._snapshot = watcher._scan()
+        self.check_watcher(watcher)
+
+    def test_inotify_watcher(self):
+        watcher = make_watcher(self.content)
+        if not isinstance(watcher, InotifyWatcher):
+            watcher.close()
+            self.skipTest("inotify is not available")
+        self.check_watcher(watcher)
+
+
+class TestServer(DevSiteTestCase):
+    def test_static_file(self):
+        static = os.path.join(self._tmp.name, "static")
+        self.write(os.path.join(static, "css", "index.css"), "body {}")
+        self.assertEqual(static_file(static, "/css/index.css?v=1"), os.path.join(static, "css", "index.css"))
+        self.assertEqual(static_file(static, "/css/%69ndex.css"), os.path.join(static, "css", "index.css"))
+        for url in ("/", "/css", "/css/missing.css", "/../template.html", "/css/%2e%2e/../template.html"):
+            self.assertIsNone(static_file(static, url), url)
+
+    def test_serves_and_watches(self):
+        static = os.path.join(self._tmp.name, "static")
+        self.write(os.path.join(static, "index.css"), "body {}")
+        site = DevSite(self.content, self.template)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(site, static))
+        self.addCleanup(server.server_close)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.shutdown)
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+
+        with urllib.request.urlopen(base + "/") as response:
+            self.assertEqual(response.read(), b"<title>Home</title><h1>Home</h1>")
+        with self.assertRaises(urllib.error.HTTPError) as cm:
+            urllib.request.urlopen(base + "/nope")
+        self.assertEqual(cm.exception.code, 404)
+        with urllib.request.urlopen(base + "/index.css") as response:
+            self.assertEqual(response.headers["Content-Type"], "text/css")
+            self.assertEqual(response.read(), b"body {}")
+
+        stop = threading.Event()
+        updated = threading.Event()
+        watcher = PollingWatcher(self.content, interval=0.01)
+        thread = threading.Thread(target=watch, args=(site, watcher, stop, lambda *_: updated.set()))
+        thread.start()
+        # A broken save does not stop the watch thread
+        with open(os.path.join(self.content, "index.md"), "wb") as f:
+            f.write(b"# \xff bad")
+        time.sleep(0.1)
+        self.write(os.path.join(self.content, "index.md"), "# Edited home page")
+        self.assertTrue(updated.wait(5))
+        stop.set()
+        thread.join()
+        with urllib.request.urlopen(base + "/") as response:
+            self.assertIn(b"Edited home page", response.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
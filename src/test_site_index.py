@@ -0,0 +1,145 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from htmlnode import LeafNode, ParentNode
+from site_index import (
+    PageCollector, SiteStore, node_text, page_url, search_postings, shard_name, write_feed,
+    write_search_index, write_sitemap,
+)
+
+
+def page(url, title, terms, modified_ns=0, summary=""):
+    return {"url": url, "title": title, "terms": terms, "summary": summary, "modified_ns": modified_ns}
+
+
+class TestPageCollector(unittest.TestCase):
+    def test_node_text(self):
+        block = ParentNode("p", [
+            LeafNode(None, "see "),
+            LeafNode("a", "docs", {"href": "/docs"}),
+            LeafNode("img", "", {"src": "x.png", "alt": " logo"}),
+        ])
+        self.assertEqual(node_text(block), "see docs logo")
+        links = []
+        node_text(block, links)
+        self.assertEqual(links, [["a", "/docs"], ["img", "x.png"]])
+
+    def test_collects_terms_and_summary(self):
+        collector = PageCollector()
+        collector.add(ParentNode("h1", [LeafNode(None, "Hello World")]))
+        collector.add(ParentNode("p", [LeafNode(None, "First  paragraph, a "), LeafNode("b", "bold")]))
+        collector.add(ParentNode("p", [LeafNode(None, "Second")]))
+        collector.title = "Hello World"
+        info = collector.info()
+        self.assertEqual(info["summary"], "First paragraph, a bold")
+        self.assertEqual(info["terms"], ["bold", "first", "hello", "paragraph", "second", "world"])
+        self.assertEqual(info["title"], "Hello World")
+
+    def test_long_summary_is_cut_at_a_word(self):
+        collector = PageCollector()
+        collector.add(ParentNode("p", [LeafNode(None, "word " * 100)]))
+        summary = collector.info()["summary"]
+        self.assertTrue(summary.endswith("word…"))
+        self.assertLessEqual(len(summary), 201)
+
+
+class TestOutputs(unittest.TestCase):
+    def test_page_url(self):
+        self.assertEqual(page_url("index.html"), "")
+        self.assertEqual(page_url(os.path.join("blog", "index.html")), "blog/")
+        self.assertEqual(page_url(os.path.join("blog", "post.html")), "blog/post.html")
+
+    def test_sitemap(self):
+        f = io.BytesIO()
+        write_sitemap(f, "https://example.com/", [page("", "Home", []), page("a&b.html", "A", [])])
+        xml = f.getvalue().decode()
+        self.assertIn("<loc>https://example.com/</loc><lastmod>1970-01-01</lastmod>", xml)
+        self.assertIn("<loc>https://example.com/a&amp;b.html</loc>", xml)
+
+    def test_feed_lists_newest_first(self):
+        f = io.BytesIO()
+        pages = [page("old.html", "Old", [], 1), page("new.html", "New <1>", [], 2 * 10**18, "Fresh")]
+        write_feed(f, "https://example.com", "Site", pages, limit=1)
+        xml = f.getvalue().decode()
+        self.assertIn("<title>New &lt;1&gt;</title>", xml)
+        self.assertIn("<description>Fresh</description>", xml)
+        self.assertNotIn("old.html", xml)
+
+    def test_search_postings(self):
+        postings = search_postings([page("a", "A", ["node", "tree"]), page("b", "B", ["node", "ünïcode"])])
+        self.assertEqual(postings, [("node", [0, 1]), ("tree", [0]), ("ünïcode", [1])])
+
+    def test_shard_names(self):
+        self.assertEqual(shard_name("node"), "no")
+        self.assertEqual(shard_name("été"), "_e9-t")
+        self.assertEqual(shard_name("_x"), "_5f-x")
+        terms = sorted(["ab", "aé", "aéz", "af", "zz", "日本"])
+        names = [shard_name(term) for term in terms]
+        # Each shard is one run of sorted terms
+        self.assertEqual(len(set(names)), len([n for i, n in enumerate(names) if i == 0 or names[i - 1] != n]))
+
+    def test_write_search_index(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "zz.json"), "w") as f:
+                f.write("{}")
+            write_search_index(directory, [page("a.html", "A", ["node", "tree"]), page("b.html", "B", ["node"])])
+            with open(os.path.join(directory, "index.json")) as f:
+                index = json.load(f)
+            with open(os.path.join(directory, "no.json")) as f:
+                shard = json.load(f)
+            self.assertEqual(index["shards"], ["no", "tr"])
+            self.assertEqual(index["pages"], [["a.html", "A"], ["b.html", "B"]])
+            self.assertEqual(shard, {"node": [0, 1]})
+            self.assertEqual(sorted(os.listdir(directory)), ["index.json", "no.json", "tr.json"])
+
+
+class TestSiteStore(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.store = SiteStore(os.path.join(self._tmp.name, "site.sqlite"))
+        self.addCleanup(self.store.close)
+
+    def put(self, rel, title, terms, links=()):
+        info = {"title": title, "summary": "", "terms": terms, "links": list(links)}
+        self.store.put(rel, rel.replace(".md", ".html"), 0, info)
+
+    def test_pages_and_postings(self):
+        self.put("b.md", "B", ["node", "tree"])
+        self.put("a.md", "A", ["node"])
+        self.assertTrue(self.store.has_page("a.md"))
+        self.assertEqual(self.store.title("b.md"), "B")
+        self.assertEqual([p["url"] for p in self.store], ["a.html", "b.html"])
+        self.assertEqual(list(self.store.postings()), [("node", [0, 1]), ("tree", [1])])
+
+    def test_put_replaces_and_retain_drops(self):
+        self.put("a.md", "A", ["node"])
+        self.put("a.md", "A2", ["tree"])
+        self.put("b.md", "B", ["node"])
+        self.assertEqual(list(self.store.postings()), [("node", [1]), ("tree", [0])])
+        self.store.retain(["b.md"])
+        self.assertFalse(self.store.has_page("a.md"))
+        self.assertEqual(list(self.store.postings()), [("node", [0])])
+
+    def test_links(self):
+        self.put("a.md", "A", [], [["a", "/b.html"], ["img", "x.png"]])
+        self.put("b.md", "B", [], [["a", "/"]])
+        self.store.retain(["a.md"])
+        self.assertEqual(list(self.store.links()), [("a.md", "a", "/b.html"), ("a.md", "img", "x.png")])
+
+    def test_matches_in_memory_index(self):
+        pages = [page("a.html", "A", ["node", "tree"]), page("b.html", "B", ["node"])]
+        for rel, p in zip(["a.md", "b.md"], pages):
+            self.put(rel, p["title"], p["terms"])
+        with tempfile.TemporaryDirectory() as memory, tempfile.TemporaryDirectory() as stored:
+            write_search_index(memory, pages)
+            write_search_index(stored, self.store, self.store.postings())
+            for name in sorted(os.listdir(memory)):
+                with open(os.path.join(memory, name)) as a, open(os.path.join(stored, name)) as b:
+                    self.assertEqual(a.read(), b.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+from template import Template, load_template, minify_markup
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile_splits_static_and_slots(self):
+        template = Template.compile("<title>{{ Title }}</title><body>{{content}}</body>")
+        self.assertEqual(template.static, [b"<title>", b"</title><body>", b"</body>"])
+        self.assertEqual(template.slots, ["title", "content"])
+        self.assertEqual(template.content_index, 1)
+        self.assertEqual(template.head_slots, {"title"})
+
+    def test_render(self):
+        template = Template.compile("<h1>{{ title }}</h1>{{ Content }}<p>{{ title }}</p>")
+        self.assertEqual(
+            template.render({"title": "Hi", "content": b"<b>x</b>"}),
+            b"<h1>Hi</h1><b>x</b><p>Hi</p>",
+        )
+
+    def test_missing_values_are_empty(self):
+        self.assertEqual(Template.compile("a{{ x }}b").render({}), b"ab")
+
+    def test_head_and_tail(self):
+        template = Template.compile("<t>{{ Title }}</t>{{ Content }}<f>{{ Title }}</f>")
+        parts = []
+        template.write_head(parts.append, {"title": "T"})
+        parts.append(b"BODY")
+        template.write_tail(parts.append, {"title": "T"})
+        self.assertEqual(b"".join(parts), b"<t>T</t>BODY<f>T</f>")
+
+    def test_no_content_slot(self):
+        template = Template.compile("<t>{{ Title }}</t>")
+        self.assertIsNone(template.content_index)
+        parts = []
+        template.write_head(parts.append, {"title": "T"})
+        template.write_tail(parts.append, {"title": "T"})
+        self.assertEqual(b"".join(parts), b"<t>T</t>")
+
+    def test_minify_markup(self):
+        text = ("<html>\n  <head>\n    <!-- layout -->\n    <title>{{ Title }}</title>\n  </head>\n"
+                "  <body>  <p>a   b</p>\n<pre>  keep\n  <!-- this --></pre>\n"
+                "<!--[if IE]>ie<![endif]-->\n  </body>\n</html>\n")
+        self.assertEqual(
+            minify_markup(text),
+            "<html><head><title>{{ Title }}</title></head><body><p>a b</p>"
+            "<pre>  keep\n  <!-- this --></pre><!--[if IE]>ie<![endif]--></body></html> ",
+        )
+        self.assertEqual(minify_markup("<nav>\n  <a href=/>Home</a>\n  <a href=/b>B</a>\n</nav>"),
+                         "<nav><a href=/>Home</a> <a href=/b>B</a></nav>")
+        template = Template.compile("<p>\n  {{ content }}\n</p>", minify=True)
+        self.assertTrue(template.minify)
+        self.assertEqual(template.static, [b"<p> ", b" </p>"])
+
+    def test_minify_markup_keeps_space_between_inline_elements(self):
+        self.assertEqual(minify_markup("<b>x</b>\n  <i>y</i>"), "<b>x</b> <i>y</i>")
+        self.assertEqual(minify_markup("<label>Name</label>\n<textarea> a\n b </textarea>"),
+                         "<label>Name</label> <textarea> a\n b </textarea>")
+        self.assertEqual(minify_markup("<div>\n  <span>x</span>\n</div>\n<p>y</p>"),
+                         "<div><span>x</span></div><p>y</p>")
+
+    def test_load_template_cached_by_mtime(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "template.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("<a>{{ Content }}</a>")
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("<b>{{ Content }}</b>")
+            os.utime(path, ns=(1, 1))
+            second = load_template(path)
+            self.assertIsNot(second, first)
+            self.assertEqual(second.static, [b"<b>", b"</b>"])
+
+
+if __name__ == "__main__":
+    unittest.main()